@@ -0,0 +1,228 @@
+"""Animations decoded as a unit into a shared atlas.
+
+An animation is either a directory of frame images, ordered by the
+numbers in their names ('walk/1.png', 'walk/2.png', ..., 'walk/10.png'),
+or a single animated image such as a GIF. Frames are decoded in parallel,
+then packed into a single atlas surface which they are subsurfaces of.
+
+Animated images are decoded with pygame.image.load_animation() where
+available (pygame-ce), or with Pillow if it is installed. Otherwise only
+their first frame is loaded.
+
+Usage
+-----
+walk = load.animation('walk', duration=80)
+screen.blit(walk.frame_at(pygame.time.get_ticks()), position)
+"""
+
+import bisect
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from .backends import namehint
+from .cache import AssetCache, asset_size
+
+try:
+    import PIL.Image
+    import PIL.ImageSequence
+except ImportError:
+    PIL = None
+
+
+# file extensions of frame images in animation directories
+FRAME_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tga',
+                    '.webp')
+
+# animations loaded by the animation loader
+cache = AssetCache(max_size=128 * 1024 * 1024)
+
+
+def frame_order(name):
+    """Sort key ordering frame names by the numbers they contain.
+
+    Parameters
+    ----------
+    name : str
+    """
+    return [int(part) if part.isdigit() else part
+            for part in re.split(r'(\d+)', name)]
+
+
+def is_frame(name):
+    """Return whether a file of an animation directory is a frame."""
+    return name.lower().endswith(FRAME_EXTENSIONS)
+
+
+def decode_frames(sources, max_workers=None):
+    """Decode frame images in parallel.
+
+    Parameters
+    ----------
+    sources : list of str or binary file objects
+    max_workers : int, optional
+        The number of decoding threads. Default is chosen by
+        concurrent.futures.ThreadPoolExecutor.
+
+    Returns
+    -------
+    frames : list of pygame.Surface
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            lambda source: pygame.image.load(source, namehint(source)),
+            sources))
+
+
+def decode_animated(source, duration=100):
+    """Decode the frames of an animated image.
+
+    Parameters
+    ----------
+    source : str or binary file object
+    duration : int, optional
+        Duration of frames, in milliseconds, used when the image does not
+        specify it. Default is 100.
+
+    Returns
+    -------
+    frames : list of pygame.Surface
+    durations : list of int
+    """
+    load_animation = getattr(pygame.image, 'load_animation', None)
+    if load_animation is not None:
+        frames = load_animation(source, namehint(source))
+        return ([surface for surface, _ in frames],
+                [delay or duration for _, delay in frames])
+    if PIL is None:
+        return [pygame.image.load(source, namehint(source))], [duration]
+    frames, durations = [], []
+    with PIL.Image.open(source) as image:
+        for frame in PIL.ImageSequence.Iterator(image):
+            rgba = frame.convert('RGBA')
+            frames.append(pygame.image.frombytes(
+                rgba.tobytes(), rgba.size, 'RGBA'))
+            durations.append(frame.info.get('duration') or duration)
+    return frames, durations
+
+
+def pack(sizes):
+    """Pack rectangles into an atlas, in rows of decreasing height.
+
+    Parameters
+    ----------
+    sizes : list of (int, int)
+
+    Returns
+    -------
+    rects : list of pygame.Rect
+        The rect of each size in the atlas, in order.
+    atlas_size : (int, int)
+    """
+    area = sum(width * height for width, height in sizes)
+    max_width = max([math.ceil(math.sqrt(area))]
+                    + [width for width, _ in sizes])
+    rects = [None] * len(sizes)
+    x = y = row_height = atlas_width = 0
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    for i in order:
+        width, height = sizes[i]
+        if x + width > max_width:
+            x, y, row_height = 0, y + row_height, 0
+        rects[i] = pygame.Rect(x, y, width, height)
+        x += width
+        row_height = max(row_height, height)
+        atlas_width = max(atlas_width, x)
+    return rects, (atlas_width, y + row_height)
+
+
+class Animation:
+    """Frames of an animation, stored in a single atlas surface.
+
+    Parameters
+    ----------
+    atlas : pygame.Surface
+    rects : list of pygame.Rect
+        The rect of each frame in the atlas.
+    durations : list of int
+        The duration of each frame, in milliseconds.
+    """
+
+    def __init__(self, atlas, rects, durations):
+        self.atlas = atlas
+        self.rects = rects
+        self.durations = durations
+        self.frames = [atlas.subsurface(rect) for rect in rects]
+        self._ends = []
+        end = 0
+        for duration in durations:
+            end += duration
+            self._ends.append(end)
+
+    @classmethod
+    def from_frames(cls, frames, durations, convert=None):
+        """Pack separately decoded frames into an animation.
+
+        Parameters
+        ----------
+        frames : list of pygame.Surface
+        durations : list of int
+        convert : function, optional
+            Takes the atlas surface and returns it converted for
+            blitting.
+        """
+        rects, size = pack([frame.get_size() for frame in frames])
+        flags = 0
+        # colorkeyed pixels, e.g. of GIF frames, stay transparent.
+        if any(frame.get_alpha() is not None
+               or frame.get_colorkey() is not None for frame in frames):
+            flags = pygame.SRCALPHA
+        atlas = pygame.Surface(size, flags, 32)
+        atlas.blits([(frame, rect) for frame, rect in zip(frames, rects)],
+                    doreturn=False)
+        if convert is not None:
+            atlas = convert(atlas)
+        return cls(atlas, rects, durations)
+
+    @property
+    def nbytes(self):
+        """Memory used by the atlas, in bytes."""
+        return asset_size(self.atlas)
+
+    @property
+    def duration(self):
+        """Total duration of the animation, in milliseconds."""
+        return self._ends[-1] if self._ends else 0
+
+    def frame_index(self, time, loop=True):
+        """Return the index of the frame shown at a given time.
+
+        Parameters
+        ----------
+        time : int
+            Milliseconds since the start of the animation.
+        loop : bool, optional
+            Whether the animation loops. If not, the last frame is shown
+            once the animation is over. Default is True.
+        """
+        if loop and self.duration:
+            time %= self.duration
+        return min(bisect.bisect_right(self._ends, time), len(self) - 1)
+
+    def frame_at(self, time, loop=True):
+        """Return the frame shown at a given time.
+
+        See frame_index().
+        """
+        return self.frames[self.frame_index(time, loop)]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def __iter__(self):
+        return iter(self.frames)
@@ -0,0 +1,555 @@
+"""Storage backends serving asset files to loaders.
+
+Backends are mounted on a config (see Config.mount()) and receive paths
+relative to their mount point.
+"""
+
+import hashlib
+import http.client
+import io
+import json
+import os
+import posixpath
+import queue
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+from .files import atomic_write
+
+
+def normalize(path):
+    """Return a path in the '/'-separated form used by archive backends.
+
+    Parameters
+    ----------
+    path : str
+    """
+    path = os.path.normpath(path).replace(os.sep, '/')
+    return '' if path == '.' else path
+
+
+def namehint(source):
+    """Return the name hint pygame needs to load a source served by a backend.
+
+    File objects served by backends carry their name, which pygame needs
+    to guess some file formats. Paths need no hint.
+
+    Parameters
+    ----------
+    source : str or binary file object
+    """
+    if isinstance(source, str):
+        return ''
+    return getattr(source, 'name', '')
+
+
+def _list_names(names, path):
+    # names of the files directly in a directory, among '/'-separated
+    # paths of files.
+    prefix = normalize(path)
+    if prefix:
+        prefix += '/'
+    return [name[len(prefix):] for name in names
+            if name.startswith(prefix) and '/' not in name[len(prefix):]]
+
+
+class Backend:
+    """Base class for storage backends.
+
+    Subclasses must implement exists() and open(). They can override
+    source() if they can serve loaders better than with a binary stream,
+    e.g. with a path on the local filesystem.
+    """
+
+    def exists(self, path):
+        """Return whether the backend has a file at path.
+
+        Parameters
+        ----------
+        path : str
+        """
+        raise NotImplementedError
+
+    def open(self, path):
+        """Return a binary file object to read the file at path.
+
+        Raises a FileNotFoundError if the backend has no such file.
+
+        Parameters
+        ----------
+        path : str
+        """
+        raise NotImplementedError
+
+    def listdir(self, path):
+        """Return the names of the files in the directory at path.
+
+        Subdirectories are not listed. Returns an empty list if there is
+        no such directory. Raises a NotImplementedError if the backend
+        cannot list its files.
+
+        Parameters
+        ----------
+        path : str
+
+        Returns
+        -------
+        names : list of str
+        """
+        raise NotImplementedError
+
+    def source(self, path):
+        """Return what loaders will receive to load the file at path.
+
+        Defaults to a binary file object as returned by .open().
+
+        Parameters
+        ----------
+        path : str
+
+        Returns
+        -------
+        source : str or binary file object
+        """
+        return self.open(path)
+
+    def signature(self, path):
+        """Return a cheap fingerprint of the file at path, or None.
+
+        The fingerprint must change whenever the file's content changes.
+        It allows to reuse content hashes computed earlier (see
+        pygame_assets.content). Default is None: no fingerprint.
+
+        Parameters
+        ----------
+        path : str
+
+        Returns
+        -------
+        signature : tuple or None
+        """
+        return None
+
+
+class LocalBackend(Backend):
+    """Serve files from a directory of the local filesystem.
+
+    Loaders receive plain file paths.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Directory the paths are relative to.
+        Default is the current working directory.
+    """
+
+    def __init__(self, directory=''):
+        self.directory = directory
+
+    def filepath(self, path):
+        """Return the local filesystem path of a file.
+
+        Parameters
+        ----------
+        path : str
+        """
+        return os.path.join(self.directory, path)
+
+    def exists(self, path):
+        return os.path.isfile(self.filepath(path))
+
+    def open(self, path):
+        return open(self.filepath(path), 'rb')
+
+    def listdir(self, path):
+        directory = self.filepath(path)
+        try:
+            names = os.listdir(directory or '.')
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        return [name for name in names
+                if os.path.isfile(os.path.join(directory, name))]
+
+    def source(self, path):
+        return self.filepath(path)
+
+    def signature(self, path):
+        stat = os.stat(self.filepath(path))
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def __repr__(self):
+        return 'LocalBackend({!r})'.format(self.directory)
+
+
+class ZipBackend(Backend):
+    """Serve files from a zip archive.
+
+    The archive is opened once and its central directory is read upfront,
+    so that looking up files does not touch the archive.
+    Files are decompressed in memory, never extracted to disk.
+
+    Parameters
+    ----------
+    archive : str or binary file object
+        The zip archive's path, or a file object to read it from.
+    """
+
+    def __init__(self, archive):
+        self._zipfile = zipfile.ZipFile(archive)
+        self._members = {
+            info.filename: info
+            for info in self._zipfile.infolist()
+            if not info.is_dir()
+        }
+        # ZipFile objects share a single file handle between reads.
+        self._lock = threading.Lock()
+
+    def exists(self, path):
+        return normalize(path) in self._members
+
+    def open(self, path):
+        name = normalize(path)
+        info = self._members.get(name)
+        if info is None:
+            raise FileNotFoundError(path)
+        with self._lock:
+            data = self._zipfile.read(info)
+        stream = io.BytesIO(data)
+        stream.name = name
+        return stream
+
+    def signature(self, path):
+        info = self._members.get(normalize(path))
+        if info is None:
+            raise FileNotFoundError(path)
+        return (info.file_size, info.CRC)
+
+    def listdir(self, path):
+        return _list_names(self._members, path)
+
+    def close(self):
+        """Close the underlying zip archive."""
+        self._zipfile.close()
+
+    def __repr__(self):
+        return 'ZipBackend({!r})'.format(self._zipfile.filename)
+
+
+class MemoryBackend(Backend):
+    """Serve files from an in-memory mapping of paths to bytes.
+
+    Parameters
+    ----------
+    files : dict of str to bytes, optional
+    """
+
+    def __init__(self, files=None):
+        self.files = {}
+        for path, data in (files or {}).items():
+            self.add(path, data)
+
+    def add(self, path, data):
+        """Add a file to the backend.
+
+        Parameters
+        ----------
+        path : str
+        data : bytes
+        """
+        self.files[normalize(path)] = bytes(data)
+
+    def exists(self, path):
+        return normalize(path) in self.files
+
+    def open(self, path):
+        name = normalize(path)
+        try:
+            data = self.files[name]
+        except KeyError:
+            raise FileNotFoundError(path) from None
+        stream = io.BytesIO(data)
+        stream.name = name
+        return stream
+
+    def listdir(self, path):
+        return _list_names(list(self.files), path)
+
+    def __repr__(self):
+        return 'MemoryBackend({} files)'.format(len(self.files))
+
+
+# suffix of the files holding the HTTP headers of cached files
+_META_SUFFIX = '.meta'
+
+
+class HTTPBackend(Backend):
+    """Serve files from an HTTP content server.
+
+    Files are downloaded into a bounded on-disk cache, and loaders receive
+    paths to the cached files. Cached files are revalidated against the
+    server using ETag or Last-Modified headers, so unchanged files are
+    only downloaded once.
+
+    Requests go through a small pool of persistent (keep-alive)
+    connections. Use .prefetch() to download files concurrently while
+    loading others.
+
+    If the server cannot be reached, files are considered missing, except
+    for those found in the cache, which are served as they are.
+
+    Parameters
+    ----------
+    url : str
+        The base URL of the served files, e.g. 'http://cdn.mygame.com/'.
+    cache_dir : str, optional
+        Directory of the on-disk cache.
+        Default is a new temporary directory.
+    max_cache_size : int, optional
+        Size in bytes above which least recently used files are evicted
+        from the cache. Default is 100 MB.
+    pool_size : int, optional
+        Maximum number of simultaneous connections to the server.
+        Default is 4.
+    revalidate_after : float, optional
+        Time in seconds during which a file checked against the server is
+        considered fresh. Default is 60.
+    timeout : float, optional
+        Timeout of network operations, in seconds. Default is 10.
+    """
+
+    def __init__(self, url, cache_dir=None, *, max_cache_size=100 * 2**20,
+                 pool_size=4, revalidate_after=60, timeout=10):
+        parts = urlsplit(url)
+        if parts.scheme == 'https':
+            self._connection_class = http.client.HTTPSConnection
+        elif parts.scheme == 'http':
+            self._connection_class = http.client.HTTPConnection
+        else:
+            raise ValueError('Unsupported URL scheme: {}'.format(url))
+        self.url = url
+        self._host = parts.netloc
+        self._prefix = parts.path.rstrip('/') + '/'
+        self.timeout = timeout
+
+        if cache_dir is None:
+            cache_dir = tempfile.mkdtemp(prefix='pygame-assets-')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_cache_size = max_cache_size
+        self.revalidate_after = revalidate_after
+
+        # idle connections; None stands for a connection not opened yet.
+        self._pool = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put(None)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+        self._lock = threading.Lock()
+        # path -> Future of the running download, or time of last check.
+        self._downloads = {}
+        self._checked = {}
+
+    # Connection pool
+
+    def _request(self, method, url, headers):
+        connection = self._pool.get()
+        try:
+            for attempt in range(2):
+                if connection is None:
+                    connection = self._connection_class(
+                        self._host, timeout=self.timeout)
+                try:
+                    connection.request(method, url, headers=headers)
+                    response = connection.getresponse()
+                    return response.status, response.headers, response.read()
+                except (http.client.RemoteDisconnected,
+                        ConnectionResetError, BrokenPipeError):
+                    # the server closed an idle keep-alive connection.
+                    connection.close()
+                    connection = None
+                    if attempt:
+                        raise
+                except Exception:
+                    connection.close()
+                    connection = None
+                    raise
+        finally:
+            self._pool.put(connection)
+
+    # On-disk cache
+
+    def _cache_path(self, path):
+        path = normalize(path)
+        key = hashlib.sha1(path.encode()).hexdigest()
+        # keep the extension, which loaders may rely on.
+        return os.path.join(self.cache_dir, key + posixpath.splitext(path)[1])
+
+    def _read_meta(self, path):
+        try:
+            with open(self._cache_path(path) + _META_SUFFIX) as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, path, data, headers):
+        filepath = self._cache_path(path)
+        meta = {
+            'path': normalize(path),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+        }
+        for target, content, mode in ((filepath, data, 'wb'),
+                                      (filepath + _META_SUFFIX,
+                                       json.dumps(meta), 'w')):
+            with atomic_write(target, mode) as cache_file:
+                cache_file.write(content)
+        self._evict(keep=os.path.basename(filepath))
+
+    def _discard(self, path):
+        filepath = self._cache_path(path)
+        for target in (filepath, filepath + _META_SUFFIX):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, keep=None):
+        # the file just stored (keep) is not evicted, even if it is larger
+        # than the maximum size of the cache on its own.
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith((_META_SUFFIX, '.tmp')) or name == keep:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            if keep is not None:
+                try:
+                    total += os.stat(
+                        os.path.join(self.cache_dir, keep)).st_size
+                except FileNotFoundError:
+                    pass
+            for _, size, name in sorted(entries):
+                if total <= self.max_cache_size:
+                    break
+                for target in (name, name + _META_SUFFIX):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, target))
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+    # Downloads
+
+    def _fetch(self, path):
+        """Download or revalidate a file. Return whether it exists."""
+        headers = {}
+        meta = self._read_meta(path)
+        filepath = self._cache_path(path)
+        if meta is not None and os.path.isfile(filepath):
+            if meta['etag']:
+                headers['If-None-Match'] = meta['etag']
+            elif meta['last_modified']:
+                headers['If-Modified-Since'] = meta['last_modified']
+        url = self._prefix + quote(normalize(path))
+        status, response_headers, data = self._request('GET', url, headers)
+        if status == 304:
+            # mark the file as recently used for cache eviction.
+            os.utime(filepath)
+        elif status == 200:
+            self._store(path, data, response_headers)
+        elif status in (403, 404, 410):
+            self._discard(path)
+            return False
+        else:
+            raise OSError('HTTP error {} while fetching {}'.format(
+                status, self._host + url))
+        return True
+
+    def _fetch_and_record(self, path):
+        try:
+            found = self._fetch(path)
+        except (OSError, http.client.HTTPException):
+            # the server cannot be reached: files are not found, except
+            # for those cached from previous sessions.
+            found = os.path.isfile(self._cache_path(path))
+        finally:
+            with self._lock:
+                self._downloads.pop(path, None)
+        with self._lock:
+            self._checked[path] = (time.monotonic(), found)
+        return found
+
+    def _download(self, path):
+        """Return a future of whether a file exists on the server."""
+        path = normalize(path)
+        with self._lock:
+            checked = self._checked.get(path)
+            if checked is not None:
+                checked_at, found = checked
+                if time.monotonic() - checked_at < self.revalidate_after:
+                    future = Future()
+                    future.set_result(found)
+                    return future
+            future = self._downloads.get(path)
+            if future is None:
+                future = self._executor.submit(self._fetch_and_record, path)
+                self._downloads[path] = future
+            return future
+
+    def prefetch(self, *paths):
+        """Start downloading files in the background.
+
+        Parameters
+        ----------
+        *paths : list of str
+            Paths relative to the backend's mount point.
+
+        Returns
+        -------
+        futures : list of concurrent.futures.Future
+            Futures resolving to whether each file exists on the server.
+        """
+        return [self._download(path) for path in paths]
+
+    def exists(self, path):
+        return self._download(path).result()
+
+    def source(self, path):
+        if not self.exists(path):
+            raise FileNotFoundError(path)
+        filepath = self._cache_path(path)
+        if not os.path.isfile(filepath):
+            # evicted from the cache since last checked: download it again.
+            with self._lock:
+                self._checked.pop(normalize(path), None)
+            if not self.exists(path):
+                raise FileNotFoundError(path)
+        return filepath
+
+    def open(self, path):
+        return open(self.source(path), 'rb')
+
+    def signature(self, path):
+        meta = self._read_meta(path)
+        if meta is None or not (meta['etag'] or meta['last_modified']):
+            return None
+        return (meta['etag'], meta['last_modified'])
+
+    def close(self):
+        """Close the backend's connections. The cache is kept on disk."""
+        self._executor.shutdown()
+        while not self._pool.empty():
+            connection = self._pool.get()
+            if connection is not None:
+                connection.close()
+
+    def __repr__(self):
+        return 'HTTPBackend({!r})'.format(self.url)
@@ -0,0 +1,167 @@
+"""Batched drawing of sprites with a single blits call.
+
+Calling Surface.blit() once per sprite costs a Python call, argument
+parsing and a clip computation per sprite. A Batch collects the draw
+commands of a frame, as asset keys and positions, skips those outside
+the target surface with integer comparisons, and issues the rest with a
+single Surface.blits() call, or Surface.fblits() where pygame provides
+it (pygame-ce).
+
+Asset keys are resolved into surfaces by a loader once per batch, so
+that loaders do not search for the asset on every frame.
+
+Usage
+-----
+batch = batches.Batch()
+
+# each frame
+for enemy in enemies:
+    batch.add('enemy.png', enemy.position)
+batch.add(tileset, (0, 0), area=tile_rect)
+batch.draw(screen, offset=camera.topleft)
+"""
+
+from .core import get_loader
+
+
+class Batch:
+    """Draw commands issued together with Surface.blits().
+
+    Parameters
+    ----------
+    loader : str, optional
+        The loader resolving asset keys into surfaces. Default is 'image'.
+    group : bool, optional
+        Whether to draw the commands grouped by source surface, subsurfaces
+        being grouped with their atlas. Only suitable for sprites drawn
+        from different sources which do not overlap, since it changes the
+        drawing order. Default is False: commands are drawn in order.
+    **loader_kwargs :
+        Passed to the loader.
+    """
+
+    def __init__(self, loader='image', group=False, **loader_kwargs):
+        self.loader = loader
+        self.group = group
+        self.loader_kwargs = loader_kwargs
+        # filename -> (surface, width, height)
+        self._resolved = {}
+        self._commands = []
+
+    def resolve(self, key):
+        """Return the surface of an asset key, loading it if needed.
+
+        Parameters
+        ----------
+        key : str or pygame.Surface
+            A filename passed to the loader, or a surface.
+        """
+        return self._resolve(key)[0]
+
+    def _resolve(self, key):
+        # (surface, width, height) of a key
+        if not isinstance(key, str):
+            # surfaces are not remembered, they may be drawn only once.
+            return (key,) + key.get_size()
+        entry = self._resolved.get(key)
+        if entry is None:
+            surface = get_loader(self.loader)(key, **self.loader_kwargs)
+            entry = self._resolved[key] = (surface,) + surface.get_size()
+        return entry
+
+    def add(self, key, position, area=None):
+        """Add a draw command.
+
+        Parameters
+        ----------
+        key : str or pygame.Surface
+            A filename passed to the loader, or a surface.
+        position : (int, int)
+            The top-left of the sprite, before the offset of draw().
+        area : pygame.Rect, optional
+            The part of the surface to draw, e.g. a frame of an atlas.
+        """
+        self._commands.append((key, position, area))
+
+    def extend(self, commands):
+        """Add draw commands.
+
+        Parameters
+        ----------
+        commands : iterable of (key, position) or (key, position, area)
+        """
+        self._commands.extend(
+            command if len(command) == 3 else (command[0], command[1], None)
+            for command in commands)
+
+    def __len__(self):
+        return len(self._commands)
+
+    def clear(self):
+        """Remove the draw commands."""
+        self._commands = []
+
+    def forget(self):
+        """Resolve asset keys again on next draw, e.g. after a reload."""
+        self._resolved.clear()
+
+    def draw(self, target, offset=(0, 0)):
+        """Draw the commands onto a surface, and remove them.
+
+        Commands outside the target's clipping area are skipped.
+
+        Parameters
+        ----------
+        target : pygame.Surface
+        offset : (int, int), optional
+            Subtracted from the positions of the commands, e.g. the
+            top-left of the camera. Default is (0, 0).
+
+        Returns
+        -------
+        drawn : int
+            The number of commands drawn.
+        """
+        clip = target.get_clip()
+        dx, dy = offset
+        left, top = clip.left + dx, clip.top + dy
+        right, bottom = clip.right + dx, clip.bottom + dy
+        commands, self._commands = self._commands, []
+        entries = {key: self._resolve(key)
+                   for key in {command[0] for command in commands}}
+        blits = []
+        append = blits.append
+        has_areas = False
+        for key, position, area in commands:
+            surface, width, height = entries[key]
+            x, y = position
+            if area is not None:
+                width, height = area[2], area[3]
+            if x >= right or y >= bottom or x + width <= left \
+                    or y + height <= top:
+                continue
+            if dx or dy:
+                position = (x - dx, y - dy)
+            if area is None:
+                append((surface, position))
+            else:
+                append((surface, position, area))
+                has_areas = True
+        if self.group:
+            groups = {}
+            for blit in blits:
+                groups.setdefault(_atlas(blit[0]), []).append(blit)
+            blits = [blit for group in groups.values() for blit in group]
+        # fblits does not take areas.
+        if not has_areas and hasattr(target, 'fblits'):
+            target.fblits(blits)
+        else:
+            target.blits(blits, doreturn=False)
+        return len(blits)
+
+
+def _atlas(surface):
+    # the surface a subsurface is part of
+    while surface.get_parent() is not None:
+        surface = surface.get_parent()
+    return surface
@@ -0,0 +1,289 @@
+"""Bitmap fonts: text drawn from glyph atlases.
+
+pygame.font and pygame.freetype rasterize text with FreeType each time it
+is rendered, into a new surface. A BitmapFont holds glyphs rasterized
+once into atlas surfaces: either by the BMFont tool ('.fnt' descriptors
+and their page images), or by baking a TTF or OTF font at a given size
+and color. Text is drawn with a single Surface.blits() call of glyph
+subsurfaces, without allocating surfaces.
+
+Usage
+-----
+hud_font = load.bitmap_font('hud.fnt')
+damage_font = load.bitmap_font('bebas-neue.otf', size=24,
+                               color=(255, 0, 0))
+
+# each frame
+damage_font.render_to(screen, (x, y), str(damage))
+"""
+
+import re
+from collections import namedtuple
+
+import pygame
+
+from .cache import AssetCache, asset_size
+
+
+# bitmap fonts, keyed by file content and baking parameters
+cache = AssetCache(max_size=16 * 1024 * 1024)
+
+# printable ASCII characters
+DEFAULT_CHARS = ''.join(chr(code) for code in range(32, 127))
+
+# width of baked atlases, in pixels
+ATLAS_WIDTH = 512
+
+Glyph = namedtuple('Glyph', ['surface', 'offset', 'advance'])
+Glyph.__doc__ = """A glyph of a bitmap font.
+
+surface : pygame.Surface or None
+    A subsurface of an atlas, None for blank glyphs such as spaces.
+offset : (int, int)
+    Where to draw the surface, relative to the pen position at the top of
+    the line.
+advance : int
+    How far to move the pen after the glyph, in pixels.
+"""
+
+_FNT_PAIR = re.compile(r'(\w+)=("[^"]*"|\S+)')
+
+
+def parse_fnt(text):
+    """Parse a BMFont descriptor in text format.
+
+    Raises a ValueError for descriptors in binary format.
+
+    Parameters
+    ----------
+    text : str
+
+    Returns
+    -------
+    tags : list of (str, dict)
+        The tag and attributes of each line, e.g. ('char', {'id': 65,
+        ...}). Integer values are converted, quotes are removed from
+        strings.
+    """
+    if text.startswith('BMF'):
+        raise ValueError('Binary BMFont files are not supported')
+    tags = []
+    for line in text.splitlines():
+        parts = line.split(None, 1)
+        if not parts:
+            continue
+        attributes = {}
+        for key, value in _FNT_PAIR.findall(parts[1] if len(parts) > 1
+                                            else ''):
+            if value.startswith('"'):
+                attributes[key] = value[1:-1]
+            else:
+                try:
+                    attributes[key] = int(value)
+                except ValueError:
+                    attributes[key] = value
+        tags.append((parts[0], attributes))
+    return tags
+
+
+def from_fnt(text, load_page):
+    """Build a bitmap font from a BMFont descriptor.
+
+    Parameters
+    ----------
+    text : str
+        The descriptor, in text format.
+    load_page : function
+        Takes the filename of a page image, as written in the descriptor,
+        and returns it as a surface.
+
+    Returns
+    -------
+    font : BitmapFont
+    """
+    common, pages, glyphs, kerning = {}, {}, {}, {}
+    for tag, attributes in parse_fnt(text):
+        if tag == 'common':
+            common = attributes
+        elif tag == 'page':
+            pages[attributes['id']] = load_page(attributes['file'])
+        elif tag == 'char':
+            rect = pygame.Rect(attributes['x'], attributes['y'],
+                               attributes['width'], attributes['height'])
+            surface = None
+            if rect.width and rect.height:
+                surface = pages[attributes.get('page', 0)].subsurface(rect)
+            glyphs[chr(attributes['id'])] = Glyph(
+                surface, (attributes['xoffset'], attributes['yoffset']),
+                attributes['xadvance'])
+        elif tag == 'kerning':
+            kerning[chr(attributes['first']),
+                    chr(attributes['second'])] = attributes['amount']
+    return BitmapFont(glyphs, common['lineHeight'], common['base'], kerning)
+
+
+def bake(font, chars=DEFAULT_CHARS, color=(255, 255, 255), antialias=True):
+    """Rasterize the glyphs of a font into an atlas.
+
+    Characters the font has no glyph for are left out.
+
+    Parameters
+    ----------
+    font : pygame.font.Font
+    chars : str, optional
+        Default is the printable ASCII characters.
+    color : color, optional
+        Default is white.
+    antialias : bool, optional
+        Default is True.
+
+    Returns
+    -------
+    font : BitmapFont
+    """
+    rendered = []
+    for char in dict.fromkeys(chars):
+        metrics = font.metrics(char)[0]
+        if metrics is None:
+            continue
+        rendered.append((char, font.render(char, antialias, color),
+                         metrics[4]))
+
+    # shelf packing: glyphs of a font line all have the same height.
+    width = max([ATLAS_WIDTH] + [surface.get_width() + 1
+                                 for _, surface, _ in rendered])
+    height = max([surface.get_height() for _, surface, _ in rendered] + [1])
+    positions, x, y = [], 0, 0
+    for _, surface, _ in rendered:
+        if x + surface.get_width() > width:
+            x, y = 0, y + height + 1
+        positions.append((x, y))
+        x += surface.get_width() + 1
+    atlas = pygame.Surface((width, y + height), pygame.SRCALPHA)
+    if pygame.display.get_surface() is not None:
+        atlas = atlas.convert_alpha()
+    atlas.blits([(surface, position) for (_, surface, _), position
+                 in zip(rendered, positions)], doreturn=False)
+
+    glyphs = {}
+    for (char, surface, advance), position in zip(rendered, positions):
+        glyph_surface = None
+        if surface.get_width():
+            glyph_surface = atlas.subsurface(position, surface.get_size())
+        glyphs[char] = Glyph(glyph_surface, (0, 0), advance)
+    return BitmapFont(glyphs, font.get_linesize(), font.get_ascent())
+
+
+class BitmapFont:
+    """A font of prerendered glyphs.
+
+    Characters without a glyph are drawn with the '?' glyph if the font
+    has one, and skipped otherwise.
+
+    Parameters
+    ----------
+    glyphs : dict
+        Mapping of characters to Glyph.
+    line_height : int
+        The distance between lines, in pixels.
+    base : int
+        The distance from the top of a line to the baseline, in pixels.
+    kerning : dict, optional
+        Mapping of pairs of characters to the adjustment of the advance
+        between them, in pixels.
+    """
+
+    def __init__(self, glyphs, line_height, base, kerning=None):
+        self.glyphs = glyphs
+        self.line_height = line_height
+        self.base = base
+        self.kerning = kerning or {}
+        self._fallback = glyphs.get('?')
+
+    @property
+    def nbytes(self):
+        """Memory used by the atlases of the glyphs, in bytes."""
+        atlases = {}
+        for glyph in self.glyphs.values():
+            surface = glyph.surface
+            if surface is None:
+                continue
+            while surface.get_parent() is not None:
+                surface = surface.get_parent()
+            atlases[id(surface)] = surface
+        return sum(asset_size(atlas) for atlas in atlases.values())
+
+    def _layout(self, text, dest):
+        # glyph blits and the width of the widest line.
+        left, y = dest
+        x, previous, width = left, None, 0
+        glyphs, kerning, fallback = self.glyphs, self.kerning, self._fallback
+        blits = []
+        for char in text:
+            if char == '\n':
+                width = max(width, x - left)
+                x, y, previous = left, y + self.line_height, None
+                continue
+            glyph = glyphs.get(char, fallback)
+            if glyph is None:
+                continue
+            if kerning:
+                x += kerning.get((previous, char), 0)
+            if glyph.surface is not None:
+                blits.append((glyph.surface,
+                              (x + glyph.offset[0], y + glyph.offset[1])))
+            x += glyph.advance
+            previous = char
+        return blits, max(width, x - left)
+
+    def blits(self, text, dest=(0, 0)):
+        """Return the glyphs of a text, ready for blitting.
+
+        Lines are separated by '\\n'.
+
+        Parameters
+        ----------
+        text : str
+        dest : (int, int), optional
+            The top-left of the text. Default is (0, 0).
+
+        Returns
+        -------
+        blits : list of (pygame.Surface, (int, int))
+            As expected by Surface.blits().
+        """
+        return self._layout(text, dest)[0]
+
+    def size(self, text):
+        """Return the size of a text, in pixels.
+
+        Parameters
+        ----------
+        text : str
+
+        Returns
+        -------
+        size : (int, int)
+        """
+        width = self._layout(text, (0, 0))[1]
+        return width, (text.count('\n') + 1) * self.line_height
+
+    def render_to(self, surface, dest, text):
+        """Draw a text onto a surface.
+
+        Parameters
+        ----------
+        surface : pygame.Surface
+        dest : (int, int)
+            The top-left of the text.
+        text : str
+
+        Returns
+        -------
+        rect : pygame.Rect
+            The area of the text.
+        """
+        blits, width = self._layout(text, dest)
+        surface.blits(blits, doreturn=False)
+        return pygame.Rect(dest, (width, (text.count('\n') + 1)
+                                  * self.line_height))
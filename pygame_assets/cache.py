@@ -0,0 +1,212 @@
+"""Caching of loaded assets."""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import pygame
+
+
+def make_key(*parts):
+    """Build a cache key from loader arguments.
+
+    Lists, sets, dicts and colors are turned into tuples, so that keyword
+    arguments such as color mappings can be part of a key.
+
+    Raises a TypeError if a part cannot be hashed.
+
+    Parameters
+    ----------
+    *parts : list
+    """
+    def freeze(value):
+        if isinstance(value, dict):
+            return tuple(sorted((freeze(key), freeze(item))
+                                for key, item in value.items()))
+        if isinstance(value, (list, tuple, pygame.Color)):
+            return tuple(freeze(item) for item in value)
+        if isinstance(value, (set, frozenset)):
+            return frozenset(freeze(item) for item in value)
+        return value
+
+    key = freeze(parts)
+    hash(key)
+    return key
+
+
+def asset_size(asset):
+    """Estimate the memory used by a loaded asset, in bytes.
+
+    Assets made of surfaces, e.g. animations, report their size as an
+    nbytes attribute.
+
+    Parameters
+    ----------
+    asset : object
+    """
+    if isinstance(asset, pygame.Surface):
+        return asset.get_pitch() * asset.get_height()
+    if isinstance(asset, pygame.mask.Mask):
+        width, height = asset.get_size()
+        return (width * height + 7) // 8
+    if isinstance(asset, pygame.mixer.Sound):
+        frequency, size, channels = pygame.mixer.get_init() or (0, 0, 0)
+        samples = int(asset.get_length() * frequency)
+        return samples * channels * abs(size) // 8
+    if isinstance(asset, (list, tuple)):
+        return sum(asset_size(item) for item in asset)
+    nbytes = getattr(asset, 'nbytes', None)
+    if nbytes is not None:
+        return nbytes
+    return sys.getsizeof(asset)
+
+
+class AssetCache:
+    """Thread-safe cache of loaded assets.
+
+    Keeps track of hits and misses. If the cache has a maximum size, the
+    least recently used assets are evicted once the estimated size of the
+    cached assets (see asset_size()) exceeds it.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        In bytes. Default is no limit.
+
+    Attributes
+    ----------
+    size : int
+        Estimated size of the cached assets, in bytes.
+    """
+
+    def __init__(self, max_size=None):
+        # least recently used first
+        self._assets = OrderedDict()
+        self._sizes = {}
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        """Maximum size of the cached assets in bytes, or None."""
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, max_size):
+        with self._lock:
+            self._max_size = max_size
+            if max_size is not None:
+                self._evict(max_size)
+
+    def _evict(self, size):
+        while self.size > size and self._assets:
+            key, _ = self._assets.popitem(last=False)
+            self.size -= self._sizes.pop(key)
+
+    def _store(self, key, asset):
+        if key in self._assets:
+            self.size -= self._sizes[key]
+        self._assets[key] = asset
+        self._assets.move_to_end(key)
+        self._sizes[key] = asset_size(asset)
+        self.size += self._sizes[key]
+        if self._max_size is not None:
+            self._evict(self._max_size)
+
+    def get(self, key, default=None):
+        """Return the asset cached under key, or default.
+
+        Parameters
+        ----------
+        key : hashable
+        default : object, optional
+        """
+        with self._lock:
+            try:
+                asset = self._assets[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._assets.move_to_end(key)
+            self.hits += 1
+            return asset
+
+    def get_or_load(self, key, load):
+        """Return the asset cached under key, loading it if needed.
+
+        Parameters
+        ----------
+        key : hashable
+        load : function
+            Called without arguments to load the asset on cache misses.
+
+        Returns
+        -------
+        asset : object
+        cached : bool
+            Whether the asset was found in the cache.
+        """
+        missing = object()
+        asset = self.get(key, missing)
+        if asset is not missing:
+            return asset, True
+        asset = load()
+        with self._lock:
+            # another thread may have loaded the same asset meanwhile.
+            if key in self._assets:
+                return self._assets[key], False
+            self._store(key, asset)
+            return asset, False
+
+    def put(self, key, asset):
+        """Cache an asset.
+
+        Parameters
+        ----------
+        key : hashable
+        asset : object
+        """
+        with self._lock:
+            self._store(key, asset)
+
+    def discard(self, key):
+        """Remove an asset from the cache, if present.
+
+        Parameters
+        ----------
+        key : hashable
+        """
+        with self._lock:
+            if key in self._assets:
+                del self._assets[key]
+                self.size -= self._sizes.pop(key)
+
+    def evict(self, size=0):
+        """Remove the least recently used assets until the cached assets
+        use at most size bytes.
+
+        Parameters
+        ----------
+        size : int, optional
+            In bytes. Default is 0: unlike clear(), statistics are kept.
+        """
+        with self._lock:
+            self._evict(size)
+
+    def clear(self):
+        """Remove all assets from the cache and reset statistics."""
+        with self._lock:
+            self._assets.clear()
+            self._sizes.clear()
+            self.size = self.hits = self.misses = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._assets
+
+    def __len__(self):
+        with self._lock:
+            return len(self._assets)
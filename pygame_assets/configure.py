@@ -1,6 +1,13 @@
-"""Per-project configuration API."""
+"""Per-project configuration API.
+
+Configs are read by loaders on every load, possibly from many threads.
+Their search directories and mounts are updated copy-on-write under a
+lock, so that reads need no locking and never see a half-made change.
+"""
 import os
+import threading
 from .exceptions import NoSuchConfigurationParameterError
+from .backends import LocalBackend, normalize
 
 
 _CONFIG_ENV_VAR = 'PYGAME_ASSETS_CONFIG'
@@ -8,6 +15,9 @@ _CONFIG_ENV_VAR = 'PYGAME_ASSETS_CONFIG'
 # TODO turn into a ConfigsManager to make it more easily testable
 CONFIGS = {}
 
+# serializes updates of search directories and mounts
+_lock = threading.RLock()
+
 
 class ConfigMeta(type):
     """Metaclass for Config objects.
@@ -23,6 +33,9 @@ class ConfigMeta(type):
         'base',
         'default_font_size',
         'custom_loaders_location',
+        'deduplicate',
+        'target_scale',
+        'cache_dir',
     )
 
     def __new__(meta, name, bases, namespace):
@@ -82,6 +95,17 @@ class Config(metaclass=ConfigMeta):
         base = './assets'
         default_font_size = 20
         custom_loaders_location = 'asset_loaders'
+        # share loaded assets between files with identical content
+        deduplicate = False
+        # display density images are loaded for, e.g. 2 for player@2x.png
+        target_scale = 1
+        # directory where generated assets are cached, if not None
+        cache_dir = None
+
+    def __init__(self):
+        # (mount point, backend) pairs, searched in order.
+        # By default, search paths are read from the local filesystem.
+        self.mounts = [('', LocalBackend())]
 
     def __getattr__(self, name):
         try:
@@ -92,7 +116,7 @@ class Config(metaclass=ConfigMeta):
     def __eq__(self, other):
         return all([
             self.name == other.name,
-            self.dirs == other.dirs,
+            dict(self.dirs) == dict(other.dirs),
             self._meta == other._meta,
         ])
 
@@ -105,9 +129,10 @@ class Config(metaclass=ConfigMeta):
         *search_dirs : list of str, optional
             The list of directories this loader will search into.
         """
-        self.dirs.setdefault(loader_name, [])
-        for default_dir in search_dirs:
-            self.dirs[loader_name].append(default_dir)
+        with _lock:
+            # lists of directories are replaced, never changed in place.
+            dirs = self.dirs.get(loader_name, [])
+            self.dirs[loader_name] = dirs + list(search_dirs)
 
     def remove_search_dirs(self, loader_name):
         """Remove search directories for a loader.
@@ -116,7 +141,8 @@ class Config(metaclass=ConfigMeta):
         ----------
         loader_name : str
         """
-        self.dirs.pop(loader_name)
+        with _lock:
+            self.dirs.pop(loader_name)
 
     def search_dirs(self, loader_name):
         """Return directories where a loader will search for assets.
@@ -139,6 +165,62 @@ class Config(metaclass=ConfigMeta):
         search_dirs = self.search_dirs(loader_name)
         return [os.path.join(dir_, filename) for dir_ in search_dirs]
 
+    def mount(self, backend, at=None):
+        """Mount a storage backend.
+
+        Search paths located under the mount point will be looked up
+        in the backend, after previously mounted backends.
+
+        Parameters
+        ----------
+        backend : pygame_assets.backends.Backend
+        at : str, optional
+            The backend's mount point.
+            Default is the config's base directory.
+        """
+        if at is None:
+            at = self.base
+        with _lock:
+            self.mounts = self.mounts + [(normalize(at), backend)]
+
+    def unmount(self, backend):
+        """Unmount a storage backend from all its mount points.
+
+        Parameters
+        ----------
+        backend : pygame_assets.backends.Backend
+        """
+        with _lock:
+            self.mounts = [
+                (mountpoint, mounted) for mountpoint, mounted in self.mounts
+                if mounted is not backend
+            ]
+
+    def resolve(self, filepath):
+        """Return the backends which may serve a search path.
+
+        Parameters
+        ----------
+        filepath : str
+            A search path, as returned by .search_paths().
+
+        Returns
+        -------
+        resolved : list of (Backend, str) tuples
+            The backends whose mount point contains filepath, in mount
+            order, along with the path relative to the mount point.
+        """
+        filepath = normalize(filepath)
+        resolved = []
+        for mountpoint, backend in self.mounts:
+            if not mountpoint:
+                resolved.append((backend, filepath))
+            elif filepath == mountpoint:
+                resolved.append((backend, ''))
+            elif filepath.startswith(mountpoint + '/'):
+                resolved.append((backend, filepath[len(mountpoint) + 1:]))
+        return resolved
+
     def __str__(self):
         # TODO print the config's parameters
         return super().__str__()
@@ -0,0 +1,212 @@
+"""Content-addressed deduplication of loaded assets.
+
+When the config's `deduplicate` parameter is True, core.load_asset
+identifies asset files by a hash of their content, so that byte-identical
+files share a single loaded asset. Built-in loaders which do not load
+through core.load_asset, such as image and sound, share their assets
+through the same deduplicator.
+"""
+
+import hashlib
+import json
+import threading
+
+from . import tracing
+from .cache import AssetCache, asset_size, make_key
+from .files import atomic_write
+
+
+class ContentIndex:
+    """Index of content hashes of asset files.
+
+    Hashes are remembered along with each file's backend signature, so
+    that a file is only hashed again when it changes. The index can be
+    saved to and loaded from a JSON file, e.g. prebuilt with the game's
+    assets, so that hashes do not need to be computed at runtime.
+    """
+
+    def __init__(self):
+        # (backend repr, path) -> (signature, digest)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry_key(backend, path):
+        return '{!r}:{}'.format(backend, path)
+
+    def digest(self, backend, path):
+        """Return the content hash of a file.
+
+        Parameters
+        ----------
+        backend : pygame_assets.backends.Backend
+        path : str
+            The file's path in the backend.
+
+        Returns
+        -------
+        digest : str
+        """
+        key = self._entry_key(backend, path)
+        signature = backend.signature(path)
+        if signature is not None:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+
+        hasher = hashlib.blake2b(digest_size=20)
+        with tracing.span('hash', path=path):
+            with backend.open(path) as asset_file:
+                for block in iter(lambda: asset_file.read(2**16), b''):
+                    hasher.update(block)
+        digest = hasher.hexdigest()
+
+        if signature is not None:
+            with self._lock:
+                self._entries[key] = (signature, digest)
+        return digest
+
+    def save(self, filepath):
+        """Save the index to a JSON file.
+
+        Parameters
+        ----------
+        filepath : str
+        """
+        with self._lock:
+            entries = {key: [list(signature), digest]
+                       for key, (signature, digest) in self._entries.items()}
+        with atomic_write(filepath, 'w') as index_file:
+            json.dump(entries, index_file, indent=1, sort_keys=True)
+
+    def load(self, filepath):
+        """Add entries from a JSON file written by .save().
+
+        Parameters
+        ----------
+        filepath : str
+        """
+        with open(filepath) as index_file:
+            entries = json.load(index_file)
+        with self._lock:
+            for key, (signature, digest) in entries.items():
+                self._entries[key] = (tuple(signature), digest)
+
+    def clear(self):
+        """Remove all entries from the index."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class Deduplicator:
+    """Share loaded assets between files with identical content.
+
+    Keeps statistics about the memory saved by sharing assets. Shared
+    assets are kept in a cache evicting the least recently used ones:
+    evicted assets are loaded again, and not shared with the copies in
+    use.
+
+    Parameters
+    ----------
+    index : ContentIndex
+    max_size : int, optional
+        The maximum size of the shared assets kept, in bytes, or None.
+        Default is 128 MiB.
+    """
+
+    def __init__(self, index, max_size=128 * 1024 * 1024):
+        self.index = index
+        self.cache = AssetCache(max_size=max_size)
+        self._lock = threading.Lock()
+        # cache key -> files the asset was loaded for
+        self._files = {}
+        self.shared = 0
+        self.saved_bytes = 0
+
+    def load(self, get_asset, backend, path, *args, **kwargs):
+        """Load an asset, sharing it with files of identical content.
+
+        Assets loaded with unhashable arguments are not shared.
+
+        Parameters
+        ----------
+        get_asset : function
+            The function being decorated by pygame_assets.loader.
+        backend : pygame_assets.backends.Backend
+        path : str
+            The asset file's path in the backend.
+        *args, **kwargs :
+            Passed to get_asset.
+        """
+        def load():
+            return get_asset(backend.source(path), *args, **kwargs)
+
+        try:
+            key = make_key(get_asset, args, kwargs)
+        except TypeError:
+            return load()
+        return self.share(backend, path, key, load)
+
+    def share(self, backend, path, key, load):
+        """Load an asset, sharing it with files of identical content.
+
+        For loaders which find and load their files themselves.
+
+        Parameters
+        ----------
+        backend : pygame_assets.backends.Backend
+        path : str
+            The asset file's path in the backend.
+        key : hashable
+            Identifies the loader and its arguments.
+        load : function
+            Called without arguments to load the asset if no file of
+            identical content was loaded with the same key.
+        """
+        key = (key, self.index.digest(backend, path))
+        asset, cached = self.cache.get_or_load(key, load)
+        with self._lock:
+            files = self._files.setdefault(key, set())
+            new_file = (backend, path) not in files
+            files.add((backend, path))
+            if cached and new_file:
+                # another copy of this asset would have been loaded.
+                self.shared += 1
+                self.saved_bytes += asset_size(asset)
+        return asset
+
+    def stats(self):
+        """Return deduplication statistics.
+
+        Returns
+        -------
+        stats : dict
+            unique: number of distinct loaded assets.
+            files: number of files these assets were loaded for.
+            shared: number of files which reused an existing asset.
+            saved_bytes: estimated memory saved by sharing assets.
+        """
+        with self._lock:
+            return {
+                'unique': len(self._files),
+                'files': sum(len(files) for files in self._files.values()),
+                'shared': self.shared,
+                'saved_bytes': self.saved_bytes,
+            }
+
+    def clear(self):
+        """Release shared assets and reset statistics."""
+        self.cache.clear()
+        with self._lock:
+            self._files.clear()
+            self.shared = self.saved_bytes = 0
+
+
+# the content index and deduplicator used by core.load_asset
+index = ContentIndex()
+deduplicator = Deduplicator(index)
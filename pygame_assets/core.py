@@ -1,11 +1,24 @@
 """The core of pygame-assets."""
-import os
+import fnmatch
+import functools
+import posixpath
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 from .exceptions import AssetNotFoundError
 from .configure import get_config
+from . import content, pipelines, tracing
 
 
 # mapping of names to the corresponding loader.
+# It is replaced rather than changed in place (copy-on-write), so that
+# loaders are looked up without locking, even while others register.
 loaders = {}
+_registry_lock = threading.Lock()
+
+# functions called on loads made through `load`, see add_hook().
+_hooks = ()
 
 
 def register(name, asset_loader, returned=None):
@@ -19,21 +32,32 @@ def register(name, asset_loader, returned=None):
         An asset loader as returned by the pygame_assets.loader decorator.
     returned : function, optional
         Must take an asset as its only parameter and return the final
-        loaded asset.
+        loaded asset. If asset_loader was declared with stages, returned
+        is added as a last memoized stage named after the loader.
 
     Returns
     -------
     loader : function
         The registered loader.
     """
-    if returned is not None:
+    pipeline = getattr(asset_loader, 'pipeline', None)
+    if returned is not None and pipeline is not None:
+        loader = _pipeline_loader(asset_loader.search_name,
+                                  pipeline.extend(name, returned))
+    elif returned is not None:
         def loader_with_returned(filename, *args, **kwargs):
             asset = asset_loader(filename, *args, **kwargs)
             return returned(asset)
         loader = loader_with_returned
     else:
         loader = asset_loader
-    loaders[name] = loader
+    loader.glob = functools.partial(glob_assets, name)
+    loader.all = functools.partial(all_assets, name)
+    global loaders
+    with _registry_lock:
+        registry = dict(loaders)
+        registry[name] = loader
+        loaders = registry
     return loader
 
 
@@ -50,16 +74,117 @@ def unregister(name, in_config=True):
         If True (the default), unregisters the loader from search
         directories in the config (as obtained by get_config()).
     """
-    del loaders[name]
+    global loaders
+    with _registry_lock:
+        registry = dict(loaders)
+        del registry[name]
+        loaders = registry
     if in_config:
         get_config().remove_search_dirs(name)
 
 
-def loader(*, name=None, dirs=None):
+def add_hook(hook):
+    """Add a function called on each load made through pygame_assets.load.
+
+    The hook is called with (loader_name, filename, args, kwargs) before
+    the load. If it returns a concurrent.futures.Future which did not
+    fail, the load is served with the future's result instead of calling
+    the loader. Hooks are also called for loads made by bulk loading
+    methods and load queues, possibly from other threads.
+
+    Used by pygame_assets.sessions to record and preload assets.
+
+    Parameters
+    ----------
+    hook : function
+    """
+    global _hooks
+    with _registry_lock:
+        _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook):
+    """Remove a hook added by add_hook().
+
+    Raises a ValueError if the hook was not added.
+
+    Parameters
+    ----------
+    hook : function
+    """
+    global _hooks
+    with _registry_lock:
+        hooks = list(_hooks)
+        hooks.remove(hook)
+        _hooks = tuple(hooks)
+
+
+def _hooked_loader(loader_name, asset_loader, hooks):
+    # a loader calling hooks before each load.
+    @functools.wraps(asset_loader)
+    def hooked_loader(filename, *args, **kwargs):
+        served = None
+        for hook in hooks:
+            future = hook(loader_name, filename, args, kwargs)
+            if served is None and future is not None:
+                served = future
+        if served is not None and served.exception() is None:
+            return served.result()
+        return asset_loader(filename, *args, **kwargs)
+
+    return hooked_loader
+
+
+def _traced_loader(loader_name, asset_loader):
+    # a loader recording each load as a span (see pygame_assets.tracing).
+    @functools.wraps(asset_loader)
+    def traced_loader(filename, *args, **kwargs):
+        with tracing.span('{} {}'.format(loader_name, filename), 'load',
+                          loader=loader_name, filename=filename):
+            return asset_loader(filename, *args, **kwargs)
+
+    return traced_loader
+
+
+def get_loader(name):
+    """Return a registered loader, as exposed by pygame_assets.load.
+
+    Raises a KeyError if no loader called `name` exists.
+
+    Parameters
+    ----------
+    name : str
+    """
+    asset_loader = loaders[name]
+    hooks = _hooks
+    if hooks:
+        asset_loader = _hooked_loader(name, asset_loader, hooks)
+    if tracing.tracer is not None:
+        asset_loader = _traced_loader(name, asset_loader)
+    return asset_loader
+
+
+def _pipeline_loader(loader_name, pipeline):
+    # a loader running a pipeline on assets found in the search
+    # directories of loader_name.
+    def asset_loader(filename, *args, **kwargs):
+        search_paths = get_config().search_paths(loader_name, filename)
+        backend, path = find_asset(filename, search_paths)
+        return pipeline.run(backend, path, *args, **kwargs)
+
+    asset_loader.pipeline = pipeline
+    asset_loader.search_name = loader_name
+    return asset_loader
+
+
+def loader(*, name=None, dirs=None, stages=None, deduplicate=False):
     """Decorator to register a loader.
 
     The decorated function must take a filepath as its first argument.
     It can then have any other positional or keyword arguments.
+    Depending on the storage backend the asset is found in, the filepath
+    may be a binary file object instead of a path (see
+    pygame_assets.backends).
 
     Unless explicitely passed, the loader's name will be the decorated
     function's name.
@@ -81,6 +206,17 @@ def loader(*, name=None, dirs=None):
     def special_image(filepath):
         # special_image will search into the `image` folder.
 
+    @loader(stages=[('convert', convert), ('outline', outline)])
+    def sprite(filepath):
+        # decode the sprite. Outlined sprites are cached, and loaders
+        # derived from sprite resume from them (see
+        # pygame_assets.pipelines).
+
+    @loader(deduplicate=True)
+    def level(filepath):
+        # levels of identical content are shared if the config's
+        # deduplicate parameter is True.
+
     Parameters
     ----------
     name : str, optional, kwarg only.
@@ -90,6 +226,16 @@ def loader(*, name=None, dirs=None):
         By default, it only looks in the directory named after itself.
         Note that if the dirs paramereter is passed, you should include
         the loader's name in it if needed.
+    stages : list of (str, function), kwarg only.
+        Named stages the decoded asset is passed through. If given, the
+        loader returns the output of the last stage, cached by content
+        hash and arguments, the decorated function being the first
+        'decode' stage. Stages receive the keyword arguments they accept.
+    deduplicate : bool, kwarg only.
+        Whether assets of identical content may be shared when the
+        config's deduplicate parameter is True. Only suitable for loaders
+        without side effects returning assets which are not modified,
+        e.g. not for music or sound streams. Default is False.
     """
     def create_asset_loader(get_asset):
         loader_name = name or get_asset.__name__
@@ -98,11 +244,17 @@ def loader(*, name=None, dirs=None):
         # register search directories for the loader
         get_config().add_search_dirs(loader_name, *search_dirs)
 
+        if stages is not None:
+            pipeline = pipelines.Pipeline(get_asset, stages)
+            asset_loader = _pipeline_loader(loader_name, pipeline)
+            register(loader_name, asset_loader)
+            return asset_loader
+
         # build the asset loader using load()
         def asset_loader(filename, *args, **kwargs):
             search_paths = get_config().search_paths(loader_name, filename)
             asset = load_asset(get_asset, filename, search_paths,
-                               *args, **kwargs)
+                               *args, deduplicate=deduplicate, **kwargs)
             return asset
 
         register(loader_name, asset_loader)
@@ -111,12 +263,18 @@ def loader(*, name=None, dirs=None):
     return create_asset_loader
 
 
-def load_asset(get_asset, filename, search_paths, *args, **kwargs):
+def load_asset(get_asset, filename, search_paths, *args, deduplicate=False,
+               **kwargs):
     """Core function to load an asset.
 
-    This function tries to call get_asset on each of the search paths.
+    This function tries to call get_asset on each of the search paths,
+    looking them up in the backends mounted on the config.
     If no asset was found, raises an AssetNotFoundError.
 
+    If deduplicate and the config's deduplicate parameter are True, files
+    with identical content share the same loaded asset (see
+    pygame_assets.content).
+
     Parameters
     ----------
     get_asset : function
@@ -125,25 +283,164 @@ def load_asset(get_asset, filename, search_paths, *args, **kwargs):
         List of paths where the loader will search for the asset.
     filename : str
         The asset's filename.
+    deduplicate : bool, optional, kwarg only.
+        Whether the loaded asset may be shared. Default is False.
     """
-    for filepath in search_paths:
-        if not os.path.isfile(filepath):
-            continue
+    config = get_config()
+    found = _find_all(search_paths)
+    while True:
+        with tracing.span('resolve'):
+            location = next(found, None)
+        if location is None:
+            raise AssetNotFoundError(filename, search_paths)
+        backend, path = location
         try:
-            return get_asset(filepath, *args, **kwargs)
+            if deduplicate and config.deduplicate:
+                with tracing.span('decode'):
+                    return content.deduplicator.load(
+                        get_asset, backend, path, *args, **kwargs)
+            with tracing.span('read'):
+                source = backend.source(path)
+            with tracing.span('decode'):
+                return get_asset(source, *args, **kwargs)
         except FileNotFoundError:
             pass
-    raise AssetNotFoundError(filename, search_paths)
+
+
+def _find_all(search_paths):
+    # the backends and paths of the files found for search paths, in
+    # order of priority.
+    config = get_config()
+    for filepath in search_paths:
+        for backend, path in config.resolve(filepath):
+            if backend.exists(path):
+                yield backend, path
+
+
+def find_asset(filename, search_paths):
+    """Return where an asset would be loaded from, without loading it.
+
+    Raises an AssetNotFoundError if the asset was not found.
+
+    Parameters
+    ----------
+    filename : str
+        The asset's filename.
+    search_paths : list of str
+        List of paths where the loader will search for the asset.
+
+    Returns
+    -------
+    backend : pygame_assets.backends.Backend
+    path : str
+        The asset's path in the backend.
+    """
+    with tracing.span('resolve'):
+        location = next(_find_all(search_paths), None)
+    if location is None:
+        raise AssetNotFoundError(filename, search_paths)
+    return location
+
+
+def list_assets(search_paths):
+    """Return the files found in directories, across mounted backends.
+
+    Files of earlier search paths and backends shadow files with the same
+    name found later, as when loading assets. Backends which cannot list
+    their files are skipped.
+
+    Parameters
+    ----------
+    search_paths : list of str
+        Paths of directories, e.g. as returned by config.search_paths()
+        for a directory name.
+
+    Returns
+    -------
+    assets : collections.OrderedDict
+        Mapping of file names to (backend, path) tuples, sorted by name.
+    """
+    config = get_config()
+    found = {}
+    for dirpath in search_paths:
+        for backend, path in config.resolve(dirpath):
+            try:
+                names = backend.listdir(path)
+            except NotImplementedError:
+                continue
+            for name in names:
+                found.setdefault(name, (backend, posixpath.join(path, name)))
+    return OrderedDict(sorted(found.items()))
+
+
+def glob_assets(loader_name, pattern, *args, max_workers=None, **kwargs):
+    """Load all assets matching a pattern, concurrently.
+
+    Matching files are searched in all search directories of the loader
+    and in all backends, files found first shadowing files with the same
+    name found later, as when loading assets one by one.
+
+    Registered loaders expose this function as their .glob() method,
+    e.g. load.image.glob('enemies/*.png').
+
+    Parameters
+    ----------
+    loader_name : str
+    pattern : str
+        A filename pattern, as understood by fnmatch, relative to the
+        loader's search directories. Only the last component of the
+        pattern may contain wildcards.
+    *args : any
+        Passed to the loader.
+    max_workers : int, optional
+        The number of loading threads. Default is chosen by
+        concurrent.futures.ThreadPoolExecutor.
+    **kwargs : any
+        Passed to the loader.
+
+    Returns
+    -------
+    assets : collections.OrderedDict
+        Mapping of filenames, as they would be passed to the loader, to
+        loaded assets, sorted by filename.
+    """
+    load_one = get_loader(loader_name)
+    dirname, name_pattern = posixpath.split(pattern)
+    search_paths = get_config().search_paths(loader_name, dirname)
+    filenames = [posixpath.join(dirname, name)
+                 for name in list_assets(search_paths)
+                 if fnmatch.fnmatchcase(name, name_pattern)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        assets = executor.map(
+            lambda filename: load_one(filename, *args, **kwargs), filenames)
+        return OrderedDict(zip(filenames, assets))
+
+
+def all_assets(loader_name, dirname='', *args, **kwargs):
+    """Load all assets of a directory, concurrently.
+
+    Registered loaders expose this function as their .all() method,
+    e.g. load.sound.all('footsteps'). See glob_assets().
+
+    Parameters
+    ----------
+    loader_name : str
+    dirname : str, optional
+        A directory relative to the loader's search directories.
+        Default is the search directories themselves.
+    """
+    return glob_assets(loader_name, posixpath.join(dirname, '*'),
+                       *args, **kwargs)
 
 
 class LoaderIndex:
     """Allow to access registered loaders by attribute."""
 
     def __getattr__(self, name):
-        loader = loaders.get(name)
-        if loader is None:
-            raise AttributeError('No such loader: {}'.format(name))
-        return loader
+        try:
+            return get_loader(name)
+        except KeyError:
+            raise AttributeError('No such loader: {}'.format(name)) from None
 
     def __contains__(self, loader_name):
         return loader_name in loaders
@@ -0,0 +1,41 @@
+"""Helpers to write files."""
+
+import contextlib
+import os
+import threading
+
+
+@contextlib.contextmanager
+def atomic_write(filepath, mode='wb'):
+    """Open a file which replaces filepath once written, as a whole.
+
+    The file is written next to filepath under a name unique to the
+    writing thread, ending with '.tmp', then moved over filepath: readers
+    and concurrent writers never see a partially written file. If writing
+    fails, the temporary file is removed. Missing directories are
+    created.
+
+    Usage
+    -----
+    with atomic_write('cache/index.json', 'w') as index_file:
+        json.dump(index, index_file)
+
+    Parameters
+    ----------
+    filepath : str
+    mode : str, optional
+        The mode the file is opened in, 'wb' or 'w'. Default is 'wb'.
+    """
+    directory = os.path.dirname(filepath) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # unlike mkstemp() files, files get the usual permissions.
+    tmp_path = '{}.{}-{}.tmp'.format(filepath, os.getpid(),
+                                     threading.get_ident())
+    try:
+        with open(tmp_path, mode) as tmp_file:
+            yield tmp_file
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
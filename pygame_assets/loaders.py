@@ -1,55 +1,474 @@
 """Built-in function-based loaders."""
 
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import pygame
 import pygame.freetype
-from .core import register, loader
+from . import animations, bitmapfonts, colorkeys, content, masks, \
+    pipelines, playlists, rawimages, recolor, sequences, sounds, streams, \
+    tilemaps, tiles, tracing, variants
+from .backends import LocalBackend, namehint, normalize
+from .core import register, loader, find_asset, list_assets
 from .configure import get_config
+from .exceptions import AssetNotFoundError
+
+
+def _convert(img, convert_alpha=None):
+    if convert_alpha is None:
+        convert_alpha = img.get_alpha()
+    if convert_alpha:
+        img = img.convert_alpha()
+    else:
+        img = img.convert()
+    return img
+
+
+def _decode_image(filepath):
+    if rawimages.is_raw(filepath):
+        return rawimages.load(filepath)
+    return pygame.image.load(filepath, namehint(filepath))
+
+
+def _convert_image(img, *, convert_alpha=None, rle=False):
+    if rle:
+        keyed = colorkeys.to_colorkey(img)
+        if keyed is not None:
+            return keyed
+    # converting would copy the pixels of memory-mapped raw images.
+    if rawimages.matches_display(img, convert_alpha):
+        return img
+    return _convert(img, convert_alpha)
+
+
+# converted images are cached, decoded images are not kept.
+_image_pipeline = pipelines.Pipeline(_decode_image,
+                                     [('convert', _convert_image)])
 
 
-@loader()
-def image(filepath, *, convert_alpha=None):
+def image(filename, *, convert_alpha=None, scale=None, palette_map=None,
+          tint=None, rle=False):
     """Load an image.
 
     Calls .convert() on the surface before returning it.
     If image has alpha, .convert_alpha() is called instead for faster blitting.
     See pygame's documentation about .convert() and .convert_alpha().
 
+    Converted images are cached by content (see pygame_assets.pipelines):
+    loading an image again returns the same surface. Copy it before
+    drawing on it. If the config's deduplicate parameter is True, images
+    of identical content are counted in the deduplicator's statistics
+    (see pygame_assets.content).
+
+    Loads the variant of the image matching the scale if it exists, e.g.
+    'player@2x.png' for a scale of 2. Otherwise, the closest variant is
+    smoothly scaled, preferably from a higher density. Scaled variants
+    are cached (see pygame_assets.variants).
+
+    If palette_map or tint are given, returns a cached recolored copy of
+    the image (see pygame_assets.recolor and image_variants()).
+
+    If rle is True, images whose pixels are all either opaque or fully
+    transparent are returned as colorkey surfaces with RLE acceleration,
+    which blit faster than surfaces with per-pixel alpha but are slow to
+    draw on (see pygame_assets.colorkeys). Scaled variants keep their
+    per-pixel alpha, since smooth scaling softens their edges.
+
+    Raw surface files ('.pgraw') are memory-mapped instead of decoded,
+    and not converted if already in the display's format (see
+    pygame_assets.rawimages).
+
     Note: as in regular pygame, pygame.display.set_mode() must have been
     called to load images.
 
     Parameters
     ----------
-    filepath : str
+    filename : str
     convert_alpha : bool, optional
         Can be used to force alpha conversion.
         Default behavior is to detect alpha using .get_alpha().
+    scale : float, optional
+        The density of the wanted image.
+        Default is the config's target_scale.
+    palette_map : dict, optional
+        Mapping of colors to replace to their replacement colors.
+    tint : color, optional
+        Color the image is multiplied with.
+    rle : bool, optional
+        Whether to return images with hard-edged transparency as RLE
+        colorkey surfaces. Default is False.
 
     Returns
     -------
     pygame.Surface
     """
-    img = pygame.image.load(filepath)
+    if palette_map or tint is not None:
+        spec = {'palette_map': palette_map, 'tint': tint}
+        return image_variants(filename, [spec], convert_alpha=convert_alpha,
+                              scale=scale)[0]
+
+    config = get_config()
+    if scale is None:
+        scale = config.target_scale
+
+    def load_variant(name, memoize=True, rle=False):
+        backend, path = find_asset(name, config.search_paths('image', name))
+        return _image_pipeline.run(backend, path, memoize=memoize,
+                                   convert_alpha=convert_alpha, rle=rle)
+
+    def load_deduplicated(name):
+        backend, path = find_asset(name, config.search_paths('image', name))
+        return content.deduplicator.share(
+            backend, path, ('image', convert_alpha, rle),
+            lambda: _image_pipeline.run(backend, path,
+                                        convert_alpha=convert_alpha,
+                                        rle=rle))
+
+    try:
+        name = variants.variant_filename(filename, scale)
+        if config.deduplicate:
+            return load_deduplicated(name)
+        return load_variant(name, rle=rle)
+    except AssetNotFoundError:
+        pass
+
+    variant_scale, variant = variants.find_variant('image', filename, scale)
+    # only the scaled image is cached, not the variant it is scaled from.
+    return variants.load_scaled(
+        'image', variant, scale / variant_scale,
+        load=lambda: load_variant(variant, memoize=False),
+        convert=lambda img: _convert(img, convert_alpha),
+        options=convert_alpha)
+
+
+def image_variants(filename, specs, *, convert_alpha=None, scale=None):
+    """Load recolored variants of an image.
+
+    The image is loaded and its pixels are processed once for all
+    variants. Recolored images are cached, keyed by the image's content
+    and recoloring parameters.
+
+    Searches in
+    -----------
+    image
+
+    Parameters
+    ----------
+    filename : str
+    specs : list of dict
+        Recoloring parameters of each variant: palette_map and/or tint,
+        as accepted by image().
+    convert_alpha : bool, optional
+    scale : float, optional
+        See image().
+
+    Returns
+    -------
+    list of pygame.Surface
+    """
+    config = get_config()
+    if scale is None:
+        scale = config.target_scale
+    _, variant = variants.find_variant('image', filename, scale)
+    backend, path = find_asset(variant, config.search_paths('image', variant))
+    digest = content.index.digest(backend, path)
+
+    keys = [(digest, scale, convert_alpha, recolor.spec_key(**spec))
+            for spec in specs]
+    surfaces = [recolor.cache.get(key) for key in keys]
+    missing = [i for i, surface in enumerate(surfaces) if surface is None]
+    if missing:
+        base = image(filename, convert_alpha=convert_alpha, scale=scale)
+        recolored = recolor.recolor_many(base, [specs[i] for i in missing])
+        for i, surface in zip(missing, recolored):
+            recolor.cache.put(keys[i], surface)
+            surfaces[i] = surface
+    return surfaces
+
+
+def mask(filename, *, threshold=127, frame_size=None):
+    """Load the collision mask of an image.
+
+    Masks are computed once per image content, then cached in memory and
+    in the config's cache_dir if set (see pygame_assets.masks).
+    Cached masks are shared: copy them before modifying them.
+
+    Searches in
+    -----------
+    image
+
+    Parameters
+    ----------
+    filename : str
+    threshold : int, optional
+        Alpha value above which pixels are set in the mask.
+        Default is 127.
+    frame_size : (int, int), optional
+        If given, the image is a spritesheet of frames of this size, and
+        a list of masks is returned, one per frame, row by row.
+
+    Returns
+    -------
+    pygame.mask.Mask, or list of pygame.mask.Mask if frame_size is given
+    """
+    config = get_config()
+    backend, path = find_asset(filename, config.search_paths('mask', filename))
+
+    def get_surface():
+        source = backend.source(path)
+        return pygame.image.load(source, namehint(source))
+
+    frame_masks = masks.load(content.index.digest(backend, path),
+                             get_surface, config.cache_dir,
+                             threshold=threshold, frame_size=frame_size)
+    return frame_masks if frame_size is not None else frame_masks[0]
+
+
+def tiled_image(filename, *, tile_size=512, cache_size=64, prefetch=True):
+    """Load a huge image as tiles decoded on demand.
+
+    filename may name a pyramid directory built offline with
+    tiles.build_pyramid(), e.g. 'world.tiles', found in the local search
+    directories: it is used as it is. Otherwise the first load of an
+    image cuts it into a tile pyramid, stored in the config's cache_dir
+    (or in the system's temporary directory if not set) and keyed by the
+    image's content hash. Later loads only read the pyramid's manifest.
+    See pygame_assets.tiles.
+
+    Searches in
+    -----------
+    image
+
+    Parameters
+    ----------
+    filename : str
+    tile_size : int, optional
+        The side of tiles, in pixels. Default is 512.
+    cache_size : int, optional
+        Maximum number of decoded tiles kept in memory. Default is 64.
+    prefetch : bool, optional
+        Whether to decode tiles ahead of the scrolling direction in a
+        background thread. Default is True.
+
+    Returns
+    -------
+    pygame_assets.tiles.TiledImage
+    """
+    config = get_config()
+    manifest = os.path.join(filename, tiles.MANIFEST)
+    try:
+        backend, path = find_asset(
+            manifest, config.search_paths('tiled_image', manifest))
+    except AssetNotFoundError:
+        pass
+    else:
+        # tiles are read from the filesystem, one by one.
+        if isinstance(backend, LocalBackend):
+            return tiles.TiledImage(
+                os.path.dirname(backend.filepath(path)),
+                cache_size=cache_size, prefetch=prefetch)
+    backend, path = find_asset(
+        filename, config.search_paths('tiled_image', filename))
+    cache_dir = config.cache_dir
+    if cache_dir is None:
+        cache_dir = os.path.join(tempfile.gettempdir(), 'pygame_assets')
+    directory = os.path.join(cache_dir, 'tiles', '{}-{}'.format(
+        content.index.digest(backend, path), tile_size))
+    if tiles.read_manifest(directory) is None:
+        source = backend.source(path)
+        # the decoded image is released once cut into tiles.
+        tiles.build_pyramid(pygame.image.load(source, namehint(source)),
+                            directory, tile_size)
+    return tiles.TiledImage(directory, cache_size=cache_size,
+                            prefetch=prefetch)
+
+
+def _companion_image(backend, path, convert_alpha=None):
+    # an image referenced by another asset file, e.g. a tileset: looked
+    # up in the backend of the file, then by the image loader.
+    if backend.exists(path):
+        return _image_pipeline.run(backend, path,
+                                   convert_alpha=convert_alpha)
+    return image(os.path.basename(path), convert_alpha=convert_alpha)
+
+
+def tilemap(filename, *, chunk_size=16, cache_size=256,
+            convert_alpha=None):
+    """Load a map made with the Tiled editor, in TMX or JSON format.
+
+    Tilesets and their images are looked up relatively to the file which
+    references them, as in Tiled. Tileset images which are not found
+    there are loaded by the image loader, by filename. Tiles are sliced
+    from tileset images as subsurfaces, and layers are drawn from
+    prerendered chunks. See pygame_assets.tilemaps.
+
+    Each load returns a new map, so that editing a map does not change
+    the others. Tileset images are cached by the image loader.
+
+    Searches in
+    -----------
+    tilemap
+
+    Parameters
+    ----------
+    filename : str
+    chunk_size : int, optional
+        The side of prerendered chunks, in tiles. Default is 16.
+    cache_size : int, optional
+        Maximum number of chunks kept rendered. Default is 256.
+    convert_alpha : bool, optional
+        See the image loader.
+
+    Returns
+    -------
+    pygame_assets.tilemaps.TileMap
+    """
+    config = get_config()
+    backend, path = find_asset(filename,
+                               config.search_paths('tilemap', filename))
+
+    def read_file(file_path):
+        with backend.open(file_path) as tileset_file:
+            return tileset_file.read()
+
+    def load_image(image_path):
+        return _companion_image(backend, image_path, convert_alpha)
 
-    def convert(img, alpha):
-        if alpha:
-            img = img.convert_alpha()
+    return tilemaps.load_map(read_file(path), path, read_file, load_image,
+                             chunk_size=chunk_size, cache_size=cache_size)
+
+
+def _find_frames(search_paths):
+    # frames of a directory, ordered by the numbers in their names.
+    frames = [(filename, location)
+              for filename, location in list_assets(search_paths).items()
+              if animations.is_frame(filename)]
+    frames.sort(key=lambda frame: animations.frame_order(frame[0]))
+    return [location for _, location in frames]
+
+
+def animation(name, *, duration=100, convert_alpha=None, max_workers=None):
+    """Load an animation from a directory of frames or an animated image.
+
+    Frames are decoded in parallel and packed into a single atlas
+    surface. The animation is cached as a unit, keyed by the content
+    hashes of its files. See pygame_assets.animations.
+
+    Searches in
+    -----------
+    image
+
+    Parameters
+    ----------
+    name : str
+        The name of a directory of frames, e.g. 'walk', or the filename
+        of an animated image, e.g. 'walk.gif'.
+    duration : int, optional
+        Duration of frames, in milliseconds, where the files do not
+        specify it. Default is 100.
+    convert_alpha : bool, optional
+        See the image loader.
+    max_workers : int, optional
+        The number of decoding threads. Default is chosen by
+        concurrent.futures.ThreadPoolExecutor.
+
+    Returns
+    -------
+    pygame_assets.animations.Animation
+    """
+    search_paths = get_config().search_paths('animation', name)
+    try:
+        files = [find_asset(name, search_paths)]
+        animated = True
+    except AssetNotFoundError:
+        files = _find_frames(search_paths)
+        if not files:
+            raise
+        animated = False
+    key = (tuple(content.index.digest(backend, path)
+                 for backend, path in files),
+           duration, convert_alpha)
+
+    def build():
+        sources = [backend.source(path) for backend, path in files]
+        if animated:
+            frames, durations = animations.decode_animated(sources[0],
+                                                           duration)
         else:
-            img = img.convert()
-        return img
+            frames = animations.decode_frames(sources, max_workers)
+            durations = [duration] * len(frames)
+        return animations.Animation.from_frames(
+            frames, durations,
+            lambda atlas: _convert(atlas, convert_alpha))
 
-    img = convert(
-        img, img.get_alpha() if convert_alpha is None else convert_alpha)
+    anim, _ = animations.cache.get_or_load(key, build)
+    return anim
 
-    return img
 
+def sequence(name, *, buffer_size=8, loop=False):
+    """Load a long image sequence, streamed through a ring buffer.
+
+    Frames are decoded ahead on a worker thread into a fixed number of
+    surfaces, so that memory use does not depend on the length of the
+    sequence. See pygame_assets.sequences.
+
+    Searches in
+    -----------
+    image
 
-@loader()
-def sound(filepath, *, volume=1):
+    Parameters
+    ----------
+    name : str
+        The name of a directory of frames, ordered by the numbers in
+        their names. The directory may be in any backend which can list
+        its files, e.g. a mounted zip archive.
+    buffer_size : int, optional
+        The number of frame surfaces, including the one being shown.
+        Default is 8.
+    loop : bool, optional
+        Whether to start over after the last frame. Default is False.
+
+    Returns
+    -------
+    pygame_assets.sequences.SequenceStream
+    """
+    search_paths = get_config().search_paths('sequence', name)
+    files = _find_frames(search_paths)
+    if not files:
+        raise AssetNotFoundError(name, search_paths)
+    return sequences.SequenceStream(files, buffer_size=buffer_size,
+                                    loop=loop)
+
+
+get_config().add_search_dirs('image', 'image')
+register('image', image)
+register('image_variants', image_variants)
+get_config().add_search_dirs('tiled_image', 'image')
+register('tiled_image', tiled_image)
+get_config().add_search_dirs('tilemap', 'tilemap')
+register('tilemap', tilemap)
+get_config().add_search_dirs('animation', 'image')
+register('animation', animation)
+get_config().add_search_dirs('sequence', 'image')
+register('sequence', sequence)
+get_config().add_search_dirs('mask', 'image')
+register('mask', mask)
+
+
+def sound(filename, *, volume=1):
     """Load a sound.
 
+    The sound's data, decoded in the mixer's format, is cached in memory
+    and in the config's cache_dir if set (see pygame_assets.sounds), so
+    that the file is only decoded once. If the config's deduplicate
+    parameter is True, sounds of identical content loaded with the same
+    volume share a single Sound object (see pygame_assets.content).
+
     Parameters
     ----------
-    filepath : str
+    filename : str
     volume : float, optional
         The volume of the sound, between 0 and 1.
         Default is 1.
@@ -58,9 +477,56 @@ def sound(filepath, *, volume=1):
     -------
     pygame.mixer.Sound
     """
-    sound = pygame.mixer.Sound(filepath)
-    sound.set_volume(volume)
-    return sound
+    config = get_config()
+    backend, path = find_asset(filename,
+                               config.search_paths('sound', filename))
+
+    def load():
+        digest = content.index.digest(backend, path)
+        with tracing.span('decode'):
+            pcm = sounds.load_pcm(digest, lambda: backend.source(path),
+                                  config.cache_dir)
+        sound = pygame.mixer.Sound(buffer=pcm)
+        sound.set_volume(volume)
+        return sound
+
+    if config.deduplicate:
+        return content.deduplicator.share(backend, path, ('sound', volume),
+                                          load)
+    return load()
+
+
+def sound_bank(filenames, *, volume=1, max_workers=None):
+    """Load many sounds, decoding them in parallel.
+
+    Searches in
+    -----------
+    sound
+
+    Parameters
+    ----------
+    filenames : list of str
+    volume : float, optional
+        The volume of the sounds, between 0 and 1.
+        Default is 1.
+    max_workers : int, optional
+        The number of decoding threads. Default is chosen by
+        concurrent.futures.ThreadPoolExecutor.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Mapping of filenames to pygame.mixer.Sound objects.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        loaded = executor.map(lambda filename: sound(filename, volume=volume),
+                              filenames)
+        return OrderedDict(zip(filenames, loaded))
+
+
+get_config().add_search_dirs('sound', 'sound')
+register('sound', sound)
+register('sound_bank', sound_bank)
 
 
 @loader(dirs=['sound'])
@@ -85,11 +551,97 @@ def music(filepath, *, volume=1, **kwargs):
     -------
     None
     """
-    pygame.mixer.music.load(filepath)
+    pygame.mixer.music.load(filepath, namehint(filepath))
     pygame.mixer.music.set_volume(volume)
 
 
-@loader()
+def playlist(filenames, *, volume=1, loop=False, on_track_end=None):
+    """Load a playlist of music tracks.
+
+    All tracks are found before anything plays. While a track plays, the
+    next one is prepared in the background and queued in the mixer for a
+    gapless transition. See pygame_assets.playlists.
+
+    The playback will not start. Call .play() on the returned playlist to
+    start the playback, pass events to its .handle_event() method and
+    call its .update() method once per frame.
+
+    Searches in
+    -----------
+    sound
+
+    Parameters
+    ----------
+    filenames : list of str
+    volume : float, optional
+        The volume of the music, between 0 and 1.
+        Default is 1.
+    loop : bool, optional
+        Whether to start over after the last track. Default is False.
+    on_track_end : function, optional
+        Called with the filename of each track that ends.
+
+    Returns
+    -------
+    pygame_assets.playlists.Playlist
+    """
+    config = get_config()
+    tracks = []
+    for filename in filenames:
+        backend, path = find_asset(
+            filename, config.search_paths('playlist', filename))
+        tracks.append((filename, backend, path))
+    return playlists.Playlist(tracks, volume=volume, loop=loop,
+                              on_track_end=on_track_end)
+
+
+get_config().add_search_dirs('playlist', 'sound')
+register('playlist', playlist)
+
+
+@loader(dirs=['sound'])
+def stream(filepath, *, loop=False, volume=1, chunk_duration=0.5,
+           buffer_chunks=3, channel=None):
+    """Load a sound to be streamed in chunks on a mixer channel.
+
+    Unlike music, many streams can play at once. Unlike sounds, memory
+    use does not depend on the sound's length. Only WAV files can be
+    streamed. See pygame_assets.streams.
+
+    The playback will not start. Call .play() on the returned stream to
+    start the playback, then call its .update() method (or
+    pygame_assets.streams.update_all()) once per frame.
+
+    Searches in
+    -----------
+    sound
+
+    Parameters
+    ----------
+    filepath : str
+    loop : bool, optional
+        Whether to loop the sound forever. Default is False.
+    volume : float, optional
+        The volume of the stream, between 0 and 1.
+        Default is 1.
+    chunk_duration : float, optional
+        Duration of decoded chunks, in seconds. Default is 0.5.
+    buffer_chunks : int, optional
+        Maximum number of decoded chunks waiting to be played.
+        Default is 3.
+    channel : pygame.mixer.Channel, optional
+        Default is a channel reserved for the stream while it plays.
+
+    Returns
+    -------
+    pygame_assets.streams.SoundStream
+    """
+    return streams.SoundStream(filepath, loop=loop, volume=volume,
+                               chunk_duration=chunk_duration,
+                               buffer_chunks=buffer_chunks, channel=channel)
+
+
+@loader(deduplicate=True)
 def font(filepath, *, size=None):
     """Load a font.
 
@@ -109,7 +661,7 @@ def font(filepath, *, size=None):
     return pygame.font.Font(filepath, size)
 
 
-@loader(dirs=['font'])
+@loader(dirs=['font'], deduplicate=True)
 def freetype(filepath, *, size=None):
     """Load a font using pygame.freetype.
 
@@ -137,6 +689,76 @@ def freetype(filepath, *, size=None):
     return pygame.freetype.Font(filepath, size)
 
 
+def bitmap_font(filename, *, size=None, color=(255, 255, 255),
+                antialias=True, chars=None):
+    """Load a bitmap font, which draws text without rasterizing it.
+
+    BMFont descriptors ('.fnt' files in text format) are loaded with
+    their page images, looked up relatively to the descriptor, then by
+    the image loader. Other fonts, e.g. TTF or OTF files, are rasterized
+    once at the given size and color into a glyph atlas. Bitmap fonts are
+    cached by file content and baking parameters. See
+    pygame_assets.bitmapfonts.
+
+    Searches in
+    -----------
+    font
+
+    Parameters
+    ----------
+    filename : str
+    size : int, optional
+        The size to rasterize fonts at, in pixels.
+        Default is the config's default_font_size. Ignored for BMFont
+        descriptors, as are the following parameters.
+    color : color, optional
+        Default is white.
+    antialias : bool, optional
+        Default is True.
+    chars : str, optional
+        The characters to rasterize.
+        Default is the printable ASCII characters.
+
+    Returns
+    -------
+    pygame_assets.bitmapfonts.BitmapFont
+    """
+    config = get_config()
+    backend, path = find_asset(filename,
+                               config.search_paths('bitmap_font', filename))
+    digest = content.index.digest(backend, path)
+
+    if os.path.splitext(path)[1].lower() == '.fnt':
+        def build():
+            with backend.open(path) as descriptor:
+                text = descriptor.read().decode('utf-8')
+            return bitmapfonts.from_fnt(text, lambda page: _companion_image(
+                backend, normalize(os.path.join(os.path.dirname(path),
+                                                page))))
+
+        bitmap, _ = bitmapfonts.cache.get_or_load((digest,), build)
+        return bitmap
+
+    if size is None:
+        size = config.default_font_size
+    if chars is None:
+        chars = bitmapfonts.DEFAULT_CHARS
+
+    def build():
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(backend.source(path), size)
+        return bitmapfonts.bake(font, chars, color, antialias)
+
+    key = (digest, size, tuple(pygame.Color(color)), antialias, chars)
+    bitmap, _ = bitmapfonts.cache.get_or_load(key, build)
+    return bitmap
+
+
+get_config().add_search_dirs('bitmap_font', 'font')
+register('bitmap_font', bitmap_font)
+
+
 # register other built-in loaders
 
 image_with_rect = register('image_with_rect', image,
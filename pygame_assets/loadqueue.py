@@ -0,0 +1,263 @@
+"""Priority load queue served by worker threads.
+
+Usage
+-----
+queue = LoadQueue(workers=2)
+ticket = queue.request('image', 'chunk-3-4.png', priority=10)
+
+# the camera moved: chunk-3-4 is now far away, or not needed at all.
+queue.update_priority(ticket, 1)
+queue.cancel(ticket)
+
+# requests are concurrent.futures.Future objects.
+surface = ticket.result()
+"""
+
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+
+from .cache import make_key
+from .core import load
+
+
+class LoadTicket(Future):
+    """A queued load request, as returned by LoadQueue.request().
+
+    Being a concurrent.futures.Future, it gives access to the loaded
+    asset through .result().
+
+    Attributes
+    ----------
+    loader_name : str
+    filename : str
+    args : tuple
+    kwargs : dict
+    priority : float
+    """
+
+    def __init__(self, loader_name, filename, args, kwargs, priority):
+        super().__init__()
+        self.loader_name = loader_name
+        self.filename = filename
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        # number of merged requests this ticket serves
+        self._requesters = 1
+        # key under which identical requests are merged
+        self._key = None
+        # sequence number of the ticket's valid entry in the queue's heap
+        self._seq = None
+
+    def __repr__(self):
+        return '<LoadTicket {}({!r}) priority={}>'.format(
+            self.loader_name, self.filename, self.priority)
+
+
+class LoadQueue:
+    """Load assets on worker threads, highest priority first.
+
+    Identical requests (same loader, filename and arguments) are merged
+    while pending or running. Pending requests can be re-prioritized or
+    cancelled.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Number of worker threads. Default is 2.
+    """
+
+    def __init__(self, workers=2):
+        # heap of (-priority, seq, ticket), with stale entries skipped
+        self._heap = []
+        self._counter = itertools.count()
+        # merge key -> pending or running ticket
+        self._tickets = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True,
+                             name='pygame-assets-loader-{}'.format(i))
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _push(self, ticket):
+        ticket._seq = next(self._counter)
+        heapq.heappush(self._heap, (-ticket.priority, ticket._seq, ticket))
+        self._condition.notify()
+
+    def request(self, loader_name, filename, *args, priority=0, **kwargs):
+        """Request an asset to be loaded.
+
+        If an identical request is pending or running, it is returned
+        instead, and its priority is raised to priority if lower. It is
+        then only cancelled once cancelled by each of its requesters.
+
+        Parameters
+        ----------
+        loader_name : str
+            The name of a registered loader.
+        filename : str
+        *args, **kwargs :
+            Passed to the loader.
+        priority : float, optional, kwarg only.
+            Requests with a higher priority are loaded first. Default is 0.
+
+        Returns
+        -------
+        ticket : LoadTicket
+        """
+        try:
+            key = make_key(loader_name, filename, args, kwargs)
+        except TypeError:
+            # unhashable arguments: the request cannot be merged.
+            key = object()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Cannot request loads from a closed queue')
+            ticket = self._tickets.get(key)
+            if ticket is not None:
+                ticket._requesters += 1
+                if priority > ticket.priority and not ticket.running():
+                    ticket.priority = priority
+                    self._push(ticket)
+                return ticket
+            ticket = LoadTicket(loader_name, filename, args, kwargs, priority)
+            ticket._key = key
+            self._tickets[key] = ticket
+            self._push(ticket)
+            return ticket
+
+    def update_priority(self, ticket, priority):
+        """Change the priority of a pending request.
+
+        Has no effect if the request is already running or done.
+
+        Parameters
+        ----------
+        ticket : LoadTicket
+        priority : float
+        """
+        with self._condition:
+            if ticket._seq is not None and not ticket.done():
+                ticket.priority = priority
+                self._push(ticket)
+
+    def reprioritize(self, get_priority):
+        """Recompute the priority of all pending requests.
+
+        Parameters
+        ----------
+        get_priority : function
+            Takes a LoadTicket and returns its new priority,
+            e.g. based on the distance between the asset and the player.
+        """
+        with self._condition:
+            pending = [ticket for ticket in self._tickets.values()
+                       if ticket._seq is not None]
+            self._heap = []
+            for ticket in pending:
+                ticket.priority = get_priority(ticket)
+                ticket._seq = next(self._counter)
+                self._heap.append((-ticket.priority, ticket._seq, ticket))
+            heapq.heapify(self._heap)
+
+    def cancel(self, ticket):
+        """Cancel a pending request.
+
+        Merged requests are only cancelled by their last requester.
+
+        Parameters
+        ----------
+        ticket : LoadTicket
+
+        Returns
+        -------
+        cancelled : bool
+            False if the request is still wanted by other requesters, or
+            is already running or done.
+        """
+        with self._condition:
+            if ticket._seq is not None and ticket._requesters > 1:
+                ticket._requesters -= 1
+                return False
+            if not ticket.cancel():
+                return False
+            ticket._seq = None
+            self._tickets.pop(ticket._key, None)
+            return True
+
+    def _next_ticket(self):
+        """Pop the highest-priority pending ticket, or None when closed."""
+        with self._condition:
+            while True:
+                while self._heap:
+                    _, seq, ticket = heapq.heappop(self._heap)
+                    if seq != ticket._seq:
+                        # stale entry of a re-prioritized ticket.
+                        continue
+                    ticket._seq = None
+                    if ticket.set_running_or_notify_cancel():
+                        return ticket
+                    self._tickets.pop(ticket._key, None)
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+    def _work(self):
+        while True:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            try:
+                loader = getattr(load, ticket.loader_name)
+                asset = loader(ticket.filename, *ticket.args, **ticket.kwargs)
+            except Exception as exc:
+                with self._condition:
+                    self._tickets.pop(ticket._key, None)
+                ticket.set_exception(exc)
+            else:
+                with self._condition:
+                    self._tickets.pop(ticket._key, None)
+                ticket.set_result(asset)
+
+    @property
+    def pending(self):
+        """Number of requests waiting for a worker."""
+        with self._condition:
+            return sum(ticket._seq is not None
+                       for ticket in self._tickets.values())
+
+    def close(self, cancel_pending=False, wait=True):
+        """Stop the worker threads once pending requests are loaded.
+
+        Parameters
+        ----------
+        cancel_pending : bool, optional
+            If True, cancel pending requests instead of loading them.
+            Default is False.
+        wait : bool, optional
+            Whether to wait for worker threads to exit. Default is True.
+        """
+        with self._condition:
+            self._closed = True
+            if cancel_pending:
+                for ticket in list(self._tickets.values()):
+                    if ticket._seq is not None:
+                        ticket.cancel()
+                        ticket._seq = None
+                        self._tickets.pop(ticket._key, None)
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,162 @@
+"""Collision masks computed once and persisted.
+
+Masks are cached in memory, and on disk if the config's cache_dir is set,
+keyed by the content hash of their source image. Later runs then read the
+mask bits back instead of decoding the image and computing them again.
+
+Mask files hold the bits as laid out in memory by pygame, in machine
+words: they are copied into masks as they are, and are only valid on
+machines with the same word size and byte order.
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import zlib
+
+import pygame
+
+from .cache import AssetCache
+from .files import atomic_write
+
+
+# masks loaded by the mask loader
+cache = AssetCache(max_size=32 * 1024 * 1024)
+
+_MAGIC = b'PGMB'
+# magic, number of masks, word size, byte order
+_HEADER = struct.Struct('<4sIBc')
+_MASK_HEADER = struct.Struct('<III')
+
+
+def _layout():
+    # layout of the bits of masks in memory
+    word_size = memoryview(pygame.mask.Mask((1, 1))).itemsize
+    return word_size, sys.byteorder[0].encode()
+
+
+def from_surface(surface, threshold=127, frame_size=None):
+    """Compute the masks of a surface.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+    threshold : int, optional
+        Alpha value above which pixels are set. Default is 127.
+    frame_size : (int, int), optional
+        If given, the surface is a spritesheet and one mask is computed per
+        frame of this size, row by row.
+
+    Returns
+    -------
+    masks : list of pygame.mask.Mask
+    """
+    if frame_size is None:
+        return [pygame.mask.from_surface(surface, threshold)]
+    frame_width, frame_height = frame_size
+    width, height = surface.get_size()
+    return [
+        pygame.mask.from_surface(
+            surface.subsurface((x, y, frame_width, frame_height)), threshold)
+        for y in range(0, height - frame_height + 1, frame_height)
+        for x in range(0, width - frame_width + 1, frame_width)
+    ]
+
+
+def write(filepath, masks):
+    """Write masks to a file.
+
+    Parameters
+    ----------
+    filepath : str
+    masks : list of pygame.mask.Mask
+    """
+    chunks = [_HEADER.pack(_MAGIC, len(masks), *_layout())]
+    for mask in masks:
+        width, height = mask.get_size()
+        data = zlib.compress(memoryview(mask).tobytes())
+        chunks.append(_MASK_HEADER.pack(width, height, len(data)))
+        chunks.append(data)
+    with atomic_write(filepath) as mask_file:
+        mask_file.write(b''.join(chunks))
+
+
+def read(filepath):
+    """Read masks written by write().
+
+    Raises a ValueError if the file is not a masks file, or was written
+    on a machine with another memory layout.
+
+    Parameters
+    ----------
+    filepath : str
+
+    Returns
+    -------
+    masks : list of pygame.mask.Mask
+    """
+    with open(filepath, 'rb') as mask_file:
+        data = mask_file.read()
+    magic, count, *layout = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError('Not a masks file: {}'.format(filepath))
+    if tuple(layout) != _layout():
+        raise ValueError('Masks file of another machine: {}'.format(filepath))
+    offset = _HEADER.size
+    masks = []
+    for _ in range(count):
+        width, height, size = _MASK_HEADER.unpack_from(data, offset)
+        offset += _MASK_HEADER.size
+        bits = zlib.decompress(data[offset:offset + size])
+        offset += size
+        mask = pygame.mask.Mask((width, height))
+        buffer = memoryview(mask).cast('B')
+        if len(bits) != len(buffer):
+            raise ValueError('Corrupted masks file: {}'.format(filepath))
+        buffer[:] = bits
+        buffer.release()
+        masks.append(mask)
+    return masks
+
+
+def load(digest, get_surface, cache_dir=None, threshold=127,
+         frame_size=None):
+    """Return the masks of an image, computing them only if needed.
+
+    Parameters
+    ----------
+    digest : str
+        The content hash of the image.
+    get_surface : function
+        Called without arguments to load the image if masks need to be
+        computed.
+    cache_dir : str, optional
+        The on-disk cache directory, if any.
+    threshold : int, optional
+    frame_size : (int, int), optional
+        See from_surface().
+
+    Returns
+    -------
+    masks : list of pygame.mask.Mask
+    """
+    frame_size = None if frame_size is None else tuple(frame_size)
+    key = (digest, threshold, frame_size)
+
+    def compute():
+        filepath = None
+        if cache_dir is not None:
+            name = hashlib.sha1(repr(key).encode()).hexdigest() + '.mask'
+            filepath = os.path.join(cache_dir, 'masks', name)
+            try:
+                return read(filepath)
+            except (OSError, ValueError, struct.error, zlib.error):
+                pass
+        masks = from_surface(get_surface(), threshold, frame_size)
+        if filepath is not None:
+            write(filepath, masks)
+        return masks
+
+    masks, _ = cache.get_or_load(key, compute)
+    return masks
@@ -0,0 +1,160 @@
+"""Loader pipelines made of memoized stages.
+
+A pipeline decodes a file, then runs the result through named stages,
+e.g. decode -> convert -> rect. The output of the last stage run is
+cached, keyed by the content hash of the file and the arguments of the
+stages up to it. Intermediate outputs, such as decoded images which are
+then converted, are not kept. Pipelines sharing their first stages, such
+as a loader derived from another one with an extra stage, resume from
+the cached output of the furthest shared stage: once an image is loaded,
+a loader adding a stage to it does not decode it again.
+
+Cached outputs are shared by all the loads they serve: stages and
+callers must not modify them in place. The cache is bounded: the least
+recently used outputs are evicted once it exceeds cache.max_size bytes.
+
+Stages are functions taking the output of the previous stage as their
+first argument. They receive the loader's keyword arguments they accept.
+Since stages are part of cache keys, they must be defined once, e.g. at
+module level, rather than created on each load.
+
+Usage
+-----
+@loader(stages=[('convert', convert), ('rect', with_rect)])
+def sprite(filepath):
+    return pygame.image.load(filepath)
+"""
+
+import inspect
+
+from . import content, tracing
+from .cache import AssetCache, make_key
+
+
+# outputs of pipeline stages, 256 MiB at most by default
+cache = AssetCache(max_size=256 * 1024 * 1024)
+
+
+def _accepted_kwargs(function):
+    """Return the names of the keyword arguments a stage accepts.
+
+    Returns None if the stage accepts any keyword argument.
+    """
+    parameters = list(inspect.signature(function).parameters.values())
+    if any(parameter.kind == parameter.VAR_KEYWORD
+           for parameter in parameters):
+        return None
+    return {parameter.name for parameter in parameters[1:]
+            if parameter.kind in (parameter.POSITIONAL_OR_KEYWORD,
+                                  parameter.KEYWORD_ONLY)}
+
+
+class Pipeline:
+    """A decoding function followed by named, memoized stages.
+
+    Parameters
+    ----------
+    decode : function
+        Takes what backends serve (a path or a binary file object) as its
+        first argument, and returns the decoded asset.
+    stages : list of (str, function), optional
+        The name and function of each stage following the decoding.
+    """
+
+    def __init__(self, decode, stages=()):
+        self.stages = [('decode', decode)] + list(stages)
+        self._accepted = [_accepted_kwargs(function)
+                          for _, function in self.stages]
+
+    @property
+    def names(self):
+        """The names of the stages, in order."""
+        return [name for name, _ in self.stages]
+
+    def extend(self, name, function):
+        """Return a new pipeline with an extra last stage.
+
+        The new pipeline shares cached outputs with this one.
+
+        Parameters
+        ----------
+        name : str
+        function : function
+        """
+        return Pipeline(self.stages[0][1],
+                        self.stages[1:] + [(name, function)])
+
+    def _stage_kwargs(self, index, kwargs):
+        accepted = self._accepted[index]
+        return {key: value for key, value in kwargs.items()
+                if accepted is None or key in accepted}
+
+    def run(self, backend, path, *args, until=None, memoize=True,
+            **kwargs):
+        """Run the pipeline on a file, reusing cached stage outputs.
+
+        Raises a TypeError if a keyword argument is accepted by no stage.
+
+        Parameters
+        ----------
+        backend : pygame_assets.backends.Backend
+        path : str
+        *args : any
+            Passed to the decoding function.
+        until : str, optional
+            The name of the last stage to run. Default is to run all of
+            them. The output of this stage is cached.
+        memoize : bool, optional
+            Whether to cache the output of the last stage run. Cached
+            outputs are reused either way. Default is True.
+        **kwargs : any
+            Passed to the stages which accept them.
+
+        Returns
+        -------
+        asset : object
+            The output of the last stage run.
+        """
+        stop = len(self.stages) if until is None \
+            else self.names.index(until) + 1
+        unknown = set(kwargs)
+        for accepted in self._accepted:
+            unknown = set() if accepted is None else unknown - accepted
+        if unknown:
+            raise TypeError('Unexpected keyword arguments: {}'.format(
+                ', '.join(sorted(unknown))))
+
+        key = (content.index.digest(backend, path),)
+        keys = []
+        for index, (_, function) in enumerate(self.stages[:stop]):
+            stage_args = args if index == 0 else ()
+            key += ((function,
+                     make_key(stage_args, self._stage_kwargs(index, kwargs))),)
+            keys.append(key)
+
+        # resume from the output of the furthest cached stage.
+        missing = object()
+        start, asset = 0, None
+        for index in reversed(range(stop)):
+            cached = cache.get(keys[index], missing)
+            if cached is not missing:
+                start, asset = index + 1, cached
+                break
+
+        for index in range(start, stop):
+            name, function = self.stages[index]
+            stage_kwargs = self._stage_kwargs(index, kwargs)
+            if index == 0:
+                with tracing.span('read'):
+                    source = backend.source(path)
+                with tracing.span('decode'):
+                    asset = function(source, *args, **stage_kwargs)
+            elif name == 'convert':
+                with tracing.span('convert'):
+                    asset = function(asset, **stage_kwargs)
+            else:
+                with tracing.span('post-process', stage=name):
+                    asset = function(asset, **stage_kwargs)
+        if memoize and start < stop:
+            cache.put(keys[stop - 1], asset)
+        return asset
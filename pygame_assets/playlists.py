@@ -0,0 +1,243 @@
+"""Music playlists with gapless transitions.
+
+pygame.mixer.music plays one track at a time, and loading the next track
+once the current one has ended stalls on I/O. A Playlist queues the next
+track with pygame.mixer.music.queue() while the current one plays, and
+prepares it ahead of time in a background thread: the track is fetched
+from its storage backend and the OS is asked to bring it into its page
+cache. The prepared track is queued from the main thread, by update()
+or when the current track ends: the mixer is only used from there.
+
+The end of each track is signaled by an event posted by the mixer, which
+requires the display module to be initialized.
+
+Usage
+-----
+playlist = load.playlist(['intro.ogg', 'battle.ogg'], loop=True,
+                         on_track_end=print)
+playlist.play()
+
+# each frame
+for event in pygame.event.get():
+    playlist.handle_event(event)
+playlist.update()
+"""
+
+import os
+import threading
+from concurrent.futures import Future
+
+import pygame
+
+from .backends import namehint
+
+
+_READ_BLOCK_SIZE = 1 << 20
+
+
+def read_ahead(filepath):
+    """Ask the OS to bring a file into its page cache.
+
+    Uses posix_fadvise() where available, and reads the file otherwise.
+
+    Parameters
+    ----------
+    filepath : str
+    """
+    with open(filepath, 'rb') as track_file:
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(track_file.fileno(), 0, 0,
+                                 os.POSIX_FADV_WILLNEED)
+                return
+            except OSError:
+                pass
+        while track_file.read(_READ_BLOCK_SIZE):
+            pass
+
+
+class Playlist:
+    """Play tracks one after the other with pygame.mixer.music.
+
+    As the mixer has a single music channel, only one playlist can play
+    at a time.
+
+    Parameters
+    ----------
+    tracks : list of (str, pygame_assets.backends.Backend, str)
+        The filename of each track, the backend it is stored in and its
+        path in the backend.
+    volume : float, optional
+        The volume of the music, between 0 and 1. Default is 1.
+    loop : bool, optional
+        Whether to start over after the last track. Default is False.
+    on_track_end : function, optional
+        Called with the filename of each track that ends.
+    end_event : int, optional
+        The type of the events posted by the mixer at the end of tracks.
+        Default is a new custom event type.
+    """
+
+    def __init__(self, tracks, *, volume=1, loop=False, on_track_end=None,
+                 end_event=None):
+        self.tracks = list(tracks)
+        self.volume = volume
+        self.loop = loop
+        self.on_track_end = on_track_end
+        if end_event is None:
+            end_event = pygame.event.custom_type()
+        self.end_event = end_event
+        self.index = 0
+        self.playing = False
+        # index -> future of the track's source, guarded by _lock
+        self._prepared = {}
+        # index of the track to queue once prepared, if any
+        self._pending = None
+        # index of the track queued after the current one, if any
+        self._queued = None
+        self._lock = threading.Lock()
+        # start fetching the first tracks before the playlist plays.
+        if self.tracks:
+            self.prepare(0)
+            following = self._next_index(0)
+            if following is not None:
+                self.prepare(following)
+
+    def _next_index(self, index):
+        if index + 1 < len(self.tracks):
+            return index + 1
+        if self.loop and self.tracks:
+            return 0
+        return None
+
+    def prepare(self, index):
+        """Fetch a track and warm the page cache in a background thread.
+
+        Parameters
+        ----------
+        index : int
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            Resolves to the path or file object to play the track from.
+        """
+        with self._lock:
+            future = self._prepared.get(index)
+            if future is not None:
+                return future
+            future = self._prepared[index] = Future()
+        _, backend, path = self.tracks[index]
+
+        def run():
+            try:
+                source = backend.source(path)
+                if isinstance(source, str):
+                    read_ahead(source)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(source)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def _take(self, index):
+        # file objects can only be played once: prepare them anew on the
+        # next pass.
+        source = self.prepare(index).result()
+        with self._lock:
+            self._prepared.pop(index, None)
+        return source
+
+    def _queue_next(self):
+        """Queue the next track once it is prepared, without waiting."""
+        self._pending = self._next_index(self.index)
+        if self._pending is not None:
+            self.prepare(self._pending)
+            self.update()
+
+    def update(self):
+        """Queue the next track if it is prepared.
+
+        Call it regularly from the main thread, e.g. once per frame, so
+        that the next track is queued before the current one ends.
+        """
+        next_index = self._pending
+        if next_index is None or not self.playing:
+            return
+        future = self.prepare(next_index)
+        if not future.done() or future.exception() is not None:
+            # on errors, the track is played (and its error raised) by
+            # handle_event().
+            return
+        source = self._take(next_index)
+        pygame.mixer.music.queue(source, namehint(source))
+        self._pending = None
+        self._queued = next_index
+        following = self._next_index(next_index)
+        if following is not None:
+            self.prepare(following)
+
+    def play(self, index=0):
+        """Start playing, from the given track.
+
+        Parameters
+        ----------
+        index : int, optional
+            Default is 0, the first track.
+        """
+        source = self._take(index)
+        self.index = index
+        self._queued = None
+        pygame.mixer.music.load(source, namehint(source))
+        pygame.mixer.music.set_volume(self.volume)
+        pygame.mixer.music.set_endevent(self.end_event)
+        pygame.mixer.music.play()
+        self.playing = True
+        self._queue_next()
+
+    def stop(self):
+        """Stop playing."""
+        self.playing = False
+        self._pending = None
+        self._queued = None
+        pygame.mixer.music.set_endevent()
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
+
+    def handle_event(self, event):
+        """Process an event, moving on to the next track on end events.
+
+        Parameters
+        ----------
+        event : pygame.event.Event
+
+        Returns
+        -------
+        handled : bool
+            Whether the event was an end event of this playlist.
+        """
+        if event.type != self.end_event or not self.playing:
+            return False
+        filename = self.current
+        next_index = self._next_index(self.index)
+        queued, self._queued = self._queued, None
+        if next_index is None:
+            self.playing = False
+            pygame.mixer.music.set_endevent()
+        elif queued == next_index:
+            # the mixer has started playing the queued track.
+            self.index = next_index
+            self._queue_next()
+        else:
+            # the next track was not prepared in time.
+            self.play(next_index)
+        if self.on_track_end is not None:
+            self.on_track_end(filename)
+        return True
+
+    @property
+    def current(self):
+        """The filename of the current track."""
+        return self.tracks[self.index][0]
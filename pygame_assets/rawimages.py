@@ -0,0 +1,249 @@
+"""Raw surface files, memory-mapped instead of decoded.
+
+A raw surface file ('.pgraw') holds a small header followed by pixel
+data in the byte layout of the display, as written by write() from build
+tooling. The image loader maps such files with mmap and wraps the
+mapping with pygame.image.frombuffer(): the surface needs no decoding
+and no copy, and its pages are read lazily by the OS. Processes mapping
+the same file share its pages through the page cache.
+
+Mappings are private (copy-on-write): drawing on the surface does not
+change the file. Opaque surfaces are written with padding bytes, e.g.
+in 'BGRX' layout, and loaded without per-pixel alpha, so that they are
+blitted without blending.
+
+Usage
+-----
+# build tooling, with the display mode of the game set:
+rawimages.write('assets/image/background.pgraw',
+                pygame.image.load('background.png').convert())
+
+# game:
+background = load.image('background.pgraw')
+"""
+
+import mmap
+import struct
+import sys
+
+import pygame
+
+from .files import atomic_write
+
+
+EXTENSION = '.pgraw'
+
+_MAGIC = b'PGAR'
+_VERSION = 2
+# magic, version, width, height, pitch, pixel format, flags
+_HEADER = struct.Struct('<4sHIII8sI')
+# the written surface had no per-pixel alpha
+_OPAQUE = 1
+# pixel data is aligned for SIMD-friendly blits.
+_DATA_OFFSET = 64
+
+# byte layouts of raw surface files
+FORMATS = ('RGB', 'RGBX', 'BGRX', 'RGBA', 'ARGB', 'BGRA')
+# layouts pygame.image.tobytes() and frombuffer() do not support, and
+# the layouts they are read and written as, padding being alpha.
+_BUFFER_FORMATS = {'BGRX': 'BGRA'}
+
+
+def is_raw(source):
+    """Return whether a source is a raw surface file, by its name.
+
+    Parameters
+    ----------
+    source : str or binary file object
+    """
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    return str(name).lower().endswith(EXTENSION)
+
+
+def native_format(surface=None):
+    """Return the raw surface file byte layout closest to a surface's.
+
+    Padding bytes are mapped to alpha if no layout has padding at the
+    same place, e.g. 'XRGB' becomes 'ARGB'.
+
+    Parameters
+    ----------
+    surface : pygame.Surface, optional
+        Default is the display surface. If there is none, 'BGRX' is
+        returned, the layout of 32-bit displays on little-endian
+        machines.
+    """
+    if surface is None:
+        surface = pygame.display.get_surface()
+        if surface is None:
+            return 'BGRX'
+    bytesize = surface.get_bytesize()
+    if bytesize not in (3, 4):
+        return 'RGBA'
+    channels = {}
+    for channel, shift, mask in zip('RGBA', surface.get_shifts(),
+                                    surface.get_masks()):
+        if mask:
+            channels[shift // 8] = channel
+    layout = ''.join(channels.get(i, 'X') for i in range(bytesize))
+    if sys.byteorder == 'big':
+        layout = layout[::-1]
+    if layout in FORMATS:
+        return layout
+    layout = layout.replace('X', 'A')
+    return layout if layout in FORMATS else 'RGBA'
+
+
+def storage_format(surface, native=None):
+    """Return the byte layout to store a surface's pixels in.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+    native : str, optional
+        The layout of the surface pixels are blitted onto. Default is
+        the native format of the display, see native_format().
+
+    Returns
+    -------
+    pixel_format : str
+        native, with alpha in place of padding if the surface has
+        per-pixel alpha, and padding in place of alpha otherwise.
+    """
+    if native is None:
+        native = native_format()
+    if surface.get_flags() & pygame.SRCALPHA:
+        return native.replace('X', 'A')
+    padded = native.replace('A', 'X')
+    return padded if padded in FORMATS else native
+
+
+def tobytes(surface, pixel_format):
+    """Return the pixels of a surface in a byte layout of FORMATS.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+    pixel_format : str
+    """
+    return pygame.image.tobytes(
+        surface, _BUFFER_FORMATS.get(pixel_format, pixel_format))
+
+
+def frombuffer(buffer, size, pixel_format, pitch, opaque=False):
+    """Return a surface sharing pixels in a byte layout of FORMATS.
+
+    Parameters
+    ----------
+    buffer : buffer object
+    size : (int, int)
+    pixel_format : str
+    pitch : int
+    opaque : bool, optional
+        Whether the pixels have no meaningful alpha. If True, the surface
+        is blitted without blending, as a surface in the display's
+        format. Default is False.
+    """
+    surface = pygame.image.frombuffer(
+        buffer, size, _BUFFER_FORMATS.get(pixel_format, pixel_format), pitch)
+    if opaque and surface.get_flags() & pygame.SRCALPHA:
+        surface.set_alpha(None)
+    return surface
+
+
+def write(filepath, surface, pixel_format=None):
+    """Write a surface to a raw surface file.
+
+    Parameters
+    ----------
+    filepath : str
+    surface : pygame.Surface
+    pixel_format : str, optional
+        One of FORMATS. Default is the native format of the display,
+        see storage_format().
+    """
+    if pixel_format is None:
+        pixel_format = storage_format(surface)
+    if pixel_format not in FORMATS:
+        raise ValueError('Unsupported pixel format: {}'.format(pixel_format))
+    opaque = not surface.get_flags() & pygame.SRCALPHA
+    width, height = surface.get_size()
+    pitch = width * len(pixel_format)
+    header = _HEADER.pack(_MAGIC, _VERSION, width, height, pitch,
+                          pixel_format.encode(), _OPAQUE if opaque else 0)
+    data = tobytes(surface, pixel_format)
+    with atomic_write(filepath) as raw_file:
+        raw_file.write(header.ljust(_DATA_OFFSET, b'\0'))
+        raw_file.write(data)
+
+
+def _parse_header(buffer, name):
+    try:
+        magic, version, width, height, pitch, pixel_format, flags = \
+            _HEADER.unpack_from(buffer)
+    except struct.error:
+        magic = None
+    if magic != _MAGIC:
+        raise ValueError('Not a raw surface file: {}'.format(name))
+    if version != _VERSION:
+        raise ValueError('Unsupported raw surface file version {}, write '
+                         'it again: {}'.format(version, name))
+    pixel_format = pixel_format.rstrip(b'\0').decode()
+    if len(buffer) < _DATA_OFFSET + pitch * height:
+        raise ValueError('Truncated raw surface file: {}'.format(name))
+    return (width, height), pitch, pixel_format, flags
+
+
+def load(source):
+    """Load a raw surface file.
+
+    Files of the local filesystem are memory-mapped. File objects, e.g.
+    served by archive backends, are read into memory but not decoded.
+
+    Raises a ValueError if the file is not a valid raw surface file.
+
+    Parameters
+    ----------
+    source : str or binary file object
+
+    Returns
+    -------
+    pygame.Surface
+        A surface sharing the file's pixel data.
+    """
+    if isinstance(source, str):
+        name = source
+        with open(source, 'rb') as raw_file:
+            buffer = mmap.mmap(raw_file.fileno(), 0, access=mmap.ACCESS_COPY)
+    else:
+        name = getattr(source, 'name', repr(source))
+        buffer = bytearray(source.read())
+    size, pitch, pixel_format, flags = _parse_header(buffer, name)
+    pixels = memoryview(buffer)[_DATA_OFFSET:_DATA_OFFSET + pitch * size[1]]
+    # the surface keeps a reference to the buffer, and thus the mapping.
+    return frombuffer(pixels, size, pixel_format, pitch,
+                      opaque=bool(flags & _OPAQUE))
+
+
+def matches_display(surface, convert_alpha=None):
+    """Return whether a surface can be blitted without conversion.
+
+    Raw surfaces of opaque images have no per-pixel alpha: surfaces with
+    per-pixel alpha only match displays if alpha is requested or
+    detected (convert_alpha True or None).
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+    convert_alpha : bool, optional
+        If given, whether the surface must have per-pixel alpha.
+    """
+    display = pygame.display.get_surface()
+    if display is None:
+        return False
+    has_alpha = bool(surface.get_flags() & pygame.SRCALPHA)
+    if convert_alpha is not None and bool(convert_alpha) != has_alpha:
+        return False
+    rgb_masks = surface.get_masks()[:3]
+    return (surface.get_bitsize() == display.get_bitsize()
+            and rgb_masks == display.get_masks()[:3])
@@ -0,0 +1,145 @@
+"""Vectorized recoloring of surfaces: palette swaps and tints.
+
+Recoloring requires numpy, which pygame.surfarray is built upon.
+Colors are processed for the whole surface at once, and alpha values
+are left untouched.
+
+Usage
+-----
+red_team, blue_team = recolor_many(unit, [
+    {'palette_map': {(128, 128, 128): (200, 30, 30)}},
+    {'palette_map': {(128, 128, 128): (30, 30, 200)}},
+])
+flash = recolor(unit, tint=(255, 120, 120))
+"""
+
+import pygame
+
+from .cache import AssetCache
+
+try:
+    import numpy
+    import pygame.surfarray
+except ImportError:
+    numpy = None
+
+
+# recolored images loaded by the image loaders
+cache = AssetCache(max_size=64 * 1024 * 1024)
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError('recoloring surfaces requires numpy')
+
+
+def spec_key(palette_map=None, tint=None):
+    """Return a hashable key identifying recoloring parameters.
+
+    Colors are compared by their RGB components only, as in recolor().
+
+    Parameters
+    ----------
+    palette_map : dict, optional
+    tint : color, optional
+    """
+    def rgb(color):
+        return tuple(color)[:3]
+
+    palette = tuple(sorted((rgb(source), rgb(target))
+                           for source, target in (palette_map or {}).items()))
+    return palette, None if tint is None else rgb(tint)
+
+
+def _pack(rgb):
+    """Pack an array of RGB triplets into an array of 24-bit integers."""
+    rgb = rgb.astype(numpy.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+class _Remapper:
+    """Apply a palette map to packed pixel colors."""
+
+    def __init__(self, palette_map):
+        sources = [tuple(color)[:3] for color in palette_map]
+        targets = [tuple(color)[:3] for color in palette_map.values()]
+        keys = _pack(numpy.array(sources, dtype=numpy.uint32).reshape(-1, 3))
+        order = numpy.argsort(keys)
+        self.keys = keys[order]
+        self.targets = numpy.array(targets, dtype=numpy.uint8) \
+            .reshape(-1, 3)[order]
+
+    def apply(self, rgb, packed):
+        if not len(self.keys):
+            return
+        indices = numpy.searchsorted(self.keys, packed)
+        indices[indices == len(self.keys)] = 0
+        matches = self.keys[indices] == packed
+        rgb[matches] = self.targets[indices[matches]]
+
+
+def _tint(rgb, color):
+    factors = numpy.array(tuple(color)[:3], dtype=numpy.uint16)
+    rgb[...] = rgb.astype(numpy.uint16) * factors // 255
+
+
+def recolor_many(surface, specs):
+    """Return recolored copies of a surface.
+
+    The surface's pixels are read and indexed once for all copies.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+        A 24 or 32-bit surface.
+    specs : list of dict
+        Recoloring parameters of each copy, as keyword arguments of
+        recolor(): palette_map and/or tint.
+
+    Returns
+    -------
+    surfaces : list of pygame.Surface
+    """
+    _require_numpy()
+    rgb = pygame.surfarray.array3d(surface)
+    packed = None
+    surfaces = []
+    for spec in specs:
+        palette_map = spec.get('palette_map')
+        tint = spec.get('tint')
+        result = rgb.copy()
+        if palette_map:
+            if packed is None:
+                packed = _pack(rgb)
+            _Remapper(palette_map).apply(result, packed)
+        if tint is not None:
+            _tint(result, tint)
+        recolored = surface.copy()
+        pixels = pygame.surfarray.pixels3d(recolored)
+        pixels[...] = result
+        # release the lock held on the surface by the pixels array.
+        del pixels
+        surfaces.append(recolored)
+    return surfaces
+
+
+def recolor(surface, *, palette_map=None, tint=None):
+    """Return a recolored copy of a surface.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+        A 24 or 32-bit surface.
+    palette_map : dict, optional
+        Mapping of colors to replace to their replacement colors.
+        Only RGB components are compared and replaced.
+    tint : color, optional
+        Color the pixels are multiplied with, as with BLEND_MULT
+        (applied after palette_map).
+
+    Returns
+    -------
+    pygame.Surface
+    """
+    return recolor_many(surface, [{'palette_map': palette_map,
+                                   'tint': tint}])[0]
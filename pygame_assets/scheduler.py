@@ -0,0 +1,204 @@
+"""Frame-budgeted incremental loading.
+
+Usage
+-----
+scheduler = LoadScheduler()
+for filename in level_images:
+    scheduler.submit('image', filename)
+
+while running:
+    # load as many assets as fit in 4 ms, then draw the frame.
+    scheduler.step(budget_ms=4)
+    draw_loading_bar(scheduler.progress)
+"""
+
+import time
+from collections import deque
+
+from .core import load
+
+
+class LoadRequest:
+    """A request to load an asset, as returned by LoadScheduler.submit().
+
+    Attributes
+    ----------
+    loader_name : str
+    filename : str
+    args : tuple
+    kwargs : dict
+    done : bool
+        Whether the load was run.
+    """
+
+    def __init__(self, loader_name, filename, args, kwargs):
+        self.loader_name = loader_name
+        self.filename = filename
+        self.args = args
+        self.kwargs = kwargs
+        self.done = False
+        self._asset = None
+        self._error = None
+
+    def run(self):
+        """Load the asset, storing the result or the raised exception."""
+        loader = getattr(load, self.loader_name)
+        try:
+            self._asset = loader(self.filename, *self.args, **self.kwargs)
+        except Exception as exc:
+            self._error = exc
+        self.done = True
+
+    def result(self):
+        """Return the loaded asset.
+
+        Raises the exception raised by the loader, if any, and a
+        RuntimeError if the asset was not loaded yet.
+        """
+        if not self.done:
+            raise RuntimeError('{} was not loaded yet'.format(self.filename))
+        if self._error is not None:
+            raise self._error
+        return self._asset
+
+    def __repr__(self):
+        return '<LoadRequest {}({!r}){}>'.format(
+            self.loader_name, self.filename, ' done' if self.done else '')
+
+
+class LoadScheduler:
+    """Run pending loads incrementally, within a time budget per frame.
+
+    The cost of each load is predicted from the past load times of its
+    loader. A load only starts if its predicted cost fits in what is left
+    of the budget, so that step() returns before the frame's deadline.
+    What is left of the budget accounts for both the time actually spent
+    and the predicted costs of the loads that ran, whichever is larger.
+
+    Loads cannot be interrupted, so a load predicted to take longer than
+    a whole budget runs alone, at the start of a step.
+
+    Parameters
+    ----------
+    default_cost_ms : float, optional
+        Predicted cost of loads for loaders which never ran.
+        Default is 2 ms.
+    smoothing : float, optional
+        Weight of the latest load time in the per-loader moving average,
+        between 0 and 1. Default is 0.3.
+    """
+
+    def __init__(self, default_cost_ms=2, smoothing=0.3):
+        self.default_cost_ms = default_cost_ms
+        self.smoothing = smoothing
+        # loader name -> moving average of load times, in ms
+        self.timings = {}
+        self._pending = deque()
+        self.total = 0
+        self.completed = 0
+
+    def submit(self, loader_name, filename, *args, **kwargs):
+        """Add a load request.
+
+        Parameters
+        ----------
+        loader_name : str
+            The name of a registered loader.
+        filename : str
+        *args, **kwargs :
+            Passed to the loader.
+
+        Returns
+        -------
+        request : LoadRequest
+        """
+        request = LoadRequest(loader_name, filename, args, kwargs)
+        self._pending.append(request)
+        self.total += 1
+        return request
+
+    def predict(self, request):
+        """Return the predicted cost of a load request, in ms.
+
+        Parameters
+        ----------
+        request : LoadRequest
+        """
+        return self.timings.get(request.loader_name, self.default_cost_ms)
+
+    def _record(self, loader_name, elapsed_ms):
+        previous = self.timings.get(loader_name)
+        if previous is None:
+            self.timings[loader_name] = elapsed_ms
+        else:
+            self.timings[loader_name] = (
+                self.smoothing * elapsed_ms
+                + (1 - self.smoothing) * previous)
+
+    def step(self, budget_ms=4):
+        """Run pending loads that fit in a time budget.
+
+        Pending loads run in submission order, skipping those whose
+        predicted cost exceeds what is left of the budget.
+
+        Parameters
+        ----------
+        budget_ms : float, optional
+            Default is 4 ms.
+
+        Returns
+        -------
+        completed : list of LoadRequest
+            The requests completed during this step.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        predicted_ms = 0
+        completed = []
+        skipped = deque()
+
+        while self._pending:
+            # until a load ran, the whole budget is available: the time
+            # spent picking loads must not make them not fit.
+            remaining_ms = budget_ms if not completed else min(
+                (deadline - time.perf_counter()) * 1000,
+                budget_ms - predicted_ms)
+            if remaining_ms <= 0:
+                break
+            request = self._pending.popleft()
+            cost = self.predict(request)
+            fits = cost <= remaining_ms
+            # loads which can never fit a budget only run at the start.
+            oversized = cost > budget_ms and not completed
+            if not (fits or oversized):
+                skipped.append(request)
+                continue
+            predicted_ms += cost
+            started = time.perf_counter()
+            request.run()
+            self._record(request.loader_name,
+                         (time.perf_counter() - started) * 1000)
+            completed.append(request)
+            if oversized:
+                break
+
+        skipped.extend(self._pending)
+        self._pending = skipped
+        self.completed += len(completed)
+        return completed
+
+    @property
+    def pending(self):
+        """Number of loads not run yet."""
+        return len(self._pending)
+
+    @property
+    def progress(self):
+        """Fraction of submitted loads which completed, between 0 and 1."""
+        if not self.total:
+            return 1.0
+        return self.completed / self.total
+
+    @property
+    def done(self):
+        """Whether all submitted loads completed."""
+        return not self._pending
@@ -0,0 +1,208 @@
+"""Streaming of long image sequences through a ring buffer.
+
+Sequences of thousands of frames, e.g. cutscenes, cannot be preloaded.
+A SequenceStream decodes frames ahead of time on a worker thread into a
+fixed number of surfaces allocated once, and hands them out one by one.
+Memory use depends on the size of the buffer, not on the length of the
+sequence.
+
+All frames of a sequence are expected to have the same size.
+
+Usage
+-----
+cutscene = load.sequence('intro', buffer_size=8)
+for frame in cutscene:
+    screen.blit(frame, (0, 0))
+    pygame.display.flip()
+    clock.tick(24)
+cutscene.close()
+"""
+
+import threading
+from collections import deque
+
+import pygame
+
+from .backends import namehint
+
+
+class SequenceStream:
+    """Decode the frames of a sequence ahead into a ring buffer.
+
+    A frame returned by next_frame() stays valid until the next call,
+    after which its surface is reused for an upcoming frame. Copy it to
+    keep it longer.
+
+    Parameters
+    ----------
+    files : list of (pygame_assets.backends.Backend, str)
+        The backend and path of each frame, in order.
+    buffer_size : int, optional
+        The number of frame surfaces, including the one being shown.
+        Default is 8.
+    loop : bool, optional
+        Whether to start over after the last frame. Default is False.
+    """
+
+    def __init__(self, files, *, buffer_size=8, loop=False):
+        if buffer_size < 2:
+            raise ValueError('buffer_size must be at least 2')
+        self.files = list(files)
+        self.buffer_size = buffer_size
+        self.loop = loop
+        self.position = None
+        self._slots = None
+        self._free = deque(range(buffer_size))
+        self._ready = deque()
+        self._current = None
+        self._next_index = 0
+        self._decoding = False
+        self._generation = 0
+        self._error = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _has_work(self):
+        if not self._free or not self.files:
+            return False
+        return self.loop or self._next_index < len(self)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._has_work():
+                    self._condition.wait()
+                if self._closed:
+                    return
+                slot = self._free.popleft()
+                index = self._next_index % len(self)
+                self._next_index = index + 1
+                generation = self._generation
+                self._decoding = True
+            try:
+                backend, path = self.files[index]
+                source = backend.source(path)
+                image = pygame.image.load(source, namehint(source))
+                self._copy_to_slot(image, slot)
+            except Exception as exc:
+                with self._condition:
+                    self._error = exc
+                    self._decoding = False
+                    self._closed = True
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._decoding = False
+                if generation == self._generation:
+                    self._ready.append((index, slot))
+                else:
+                    # a seek happened while decoding.
+                    self._free.append(slot)
+                self._condition.notify_all()
+
+    def _copy_to_slot(self, image, slot):
+        if self._slots is None:
+            self._slots = [_slot_surface(image)
+                           for _ in range(self.buffer_size)]
+        surface = self._slots[slot]
+        if surface.get_flags() & pygame.SRCALPHA:
+            # copy pixels and alpha values without blending.
+            surface.fill((0, 0, 0, 0))
+            surface.blit(image, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        else:
+            # keyed pixels are copied too, and keyed on the slot.
+            colorkey = image.get_colorkey()
+            image.set_colorkey(None)
+            surface.blit(image, (0, 0))
+            surface.set_colorkey(colorkey)
+
+    def _release_current(self):
+        if self._current is not None:
+            self._free.append(self._current)
+            self._current = None
+            self._condition.notify_all()
+
+    @property
+    def finished(self):
+        """Whether all frames were handed out."""
+        with self._condition:
+            return self._finished()
+
+    def _finished(self):
+        return (not self.loop and self._next_index >= len(self)
+                and not self._decoding and not self._ready)
+
+    def next_frame(self):
+        """Return the next frame, waiting for it to be decoded if needed.
+
+        Re-raises errors raised while decoding frames.
+
+        Returns
+        -------
+        frame : pygame.Surface or None
+            None once the end of the sequence is reached.
+        """
+        with self._condition:
+            self._release_current()
+            while not self._ready:
+                if self._error is not None:
+                    raise self._error
+                if self._finished() or self._closed:
+                    return None
+                self._condition.wait()
+            self.position, self._current = self._ready.popleft()
+            self._condition.notify_all()
+            return self._slots[self._current]
+
+    def seek(self, index):
+        """Continue the sequence from a given frame.
+
+        Frames decoded ahead are dropped.
+
+        Parameters
+        ----------
+        index : int
+        """
+        with self._condition:
+            self._generation += 1
+            self._release_current()
+            while self._ready:
+                self._free.append(self._ready.popleft()[1])
+            self._next_index = index
+            self._condition.notify_all()
+
+    @property
+    def buffered(self):
+        """Number of decoded frames waiting to be handed out."""
+        with self._condition:
+            return len(self._ready)
+
+    def close(self):
+        """Stop decoding frames."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._worker.join()
+
+    def __len__(self):
+        return len(self.files)
+
+    def __iter__(self):
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return
+            yield frame
+
+
+def _slot_surface(image):
+    # a surface frames like image are copied to, in the display's format
+    # if there is a display.
+    alpha = bool(image.get_flags() & pygame.SRCALPHA)
+    surface = pygame.Surface(image.get_size(),
+                             pygame.SRCALPHA if alpha else 0, 32)
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
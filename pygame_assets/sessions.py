@@ -0,0 +1,293 @@
+"""Recording of asset loads, and warm-start preloading of recordings.
+
+A Recorder logs the loads made through pygame_assets.load during a
+session: which loader, filename and arguments, in which order and under
+which scene marker. The recording is saved to a JSON profile.
+
+On the next launch, preload() replays the profile in background threads,
+in recorded order, before the game asks for the assets. Loaders which
+cache their assets (images, sounds...) find them in their caches; other
+loads are handed over to the game when it asks for them. Shipping builds
+can carry a recorded profile so that first loads are warm.
+
+Usage
+-----
+# development session
+with sessions.Recorder() as recorder:
+    recorder.mark('menu')
+    ...
+    recorder.mark('level-1')
+    ...
+recorder.save('assets/profile.json')
+
+# game startup
+preloader = sessions.preload('assets/profile.json', scenes=['menu'])
+...
+preloader.close()
+"""
+
+import json
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+
+from . import core
+from .cache import make_key
+
+
+_VERSION = 1
+
+Load = namedtuple('Load', ['scene', 'loader', 'filename', 'args', 'kwargs'])
+Load.__doc__ = """A recorded load.
+
+scene : str or None
+    The scene marker the load was made under.
+loader : str
+    The name of the loader.
+filename : str
+args : list
+kwargs : dict
+"""
+
+
+def _load_key(load):
+    return make_key(load.loader, load.filename, load.args, load.kwargs)
+
+
+class Recorder:
+    """Record the loads made through pygame_assets.load.
+
+    Each distinct load is recorded once per scene, in the order it was
+    first requested. Loads whose arguments cannot be serialized to JSON
+    are not recorded, and counted in the skipped attribute.
+
+    Recorders are also context managers, recording within the with
+    block.
+
+    Attributes
+    ----------
+    loads : list of Load
+    skipped : int
+    """
+
+    def __init__(self):
+        self.loads = []
+        self.skipped = 0
+        self._scene = None
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._recording = False
+
+    @property
+    def scene(self):
+        """The current scene marker."""
+        return self._scene
+
+    def mark(self, scene):
+        """Record the following loads under a scene marker.
+
+        Parameters
+        ----------
+        scene : str
+        """
+        with self._lock:
+            self._scene = scene
+
+    def _hook(self, loader_name, filename, args, kwargs):
+        try:
+            # round-trip through JSON, so that recorded loads are the
+            # same as the ones read from a profile.
+            args, kwargs = json.loads(json.dumps([args, kwargs]))
+        except (TypeError, ValueError):
+            with self._lock:
+                self.skipped += 1
+            return None
+        with self._lock:
+            load = Load(self._scene, loader_name, filename, args, kwargs)
+            key = (self._scene, _load_key(load))
+            if key not in self._seen:
+                self._seen.add(key)
+                self.loads.append(load)
+        return None
+
+    def start(self):
+        """Start recording loads."""
+        if not self._recording:
+            core.add_hook(self._hook)
+            self._recording = True
+
+    def stop(self):
+        """Stop recording loads."""
+        if self._recording:
+            core.remove_hook(self._hook)
+            self._recording = False
+
+    def save(self, filepath):
+        """Save the recorded loads to a JSON profile.
+
+        Parameters
+        ----------
+        filepath : str
+        """
+        with self._lock:
+            loads = [load._asdict() for load in self.loads]
+        with open(filepath, 'w') as profile_file:
+            json.dump({'version': _VERSION, 'loads': loads}, profile_file,
+                      indent=1)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def read_profile(profile):
+    """Read the loads of a profile saved by Recorder.save().
+
+    Raises a ValueError if the profile has an unsupported version.
+
+    Parameters
+    ----------
+    profile : str or text file object
+        The profile's path, or the opened profile.
+
+    Returns
+    -------
+    loads : list of Load
+    """
+    if isinstance(profile, str):
+        with open(profile) as profile_file:
+            data = json.load(profile_file)
+    else:
+        data = json.load(profile)
+    if data.get('version') != _VERSION:
+        raise ValueError('Unsupported profile version: {}'.format(
+            data.get('version')))
+    return [Load(**load) for load in data['loads']]
+
+
+class Preloader:
+    """Load assets in background threads, in order, for later use.
+
+    While the preloader is open, loads made through pygame_assets.load
+    which were preloaded are served with the preloaded asset, waiting for
+    it if it is being loaded. Each preloaded asset is handed over once:
+    loaders which cache their assets serve the next loads from their
+    caches. Loads which were not preloaded yet are made as usual and
+    dropped from the preloads, as are preloads which failed.
+
+    Parameters
+    ----------
+    loads : list of Load
+    workers : int, optional
+        Number of loading threads. Default is 1, which loads assets in
+        strictly the given order.
+    """
+
+    def __init__(self, loads, workers=1):
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        # load key -> future, in order
+        self._futures = OrderedDict()
+        with self._lock:
+            for load in loads:
+                key = _load_key(load)
+                if key not in self._futures:
+                    self._futures[key] = self._executor.submit(
+                        self._preload, load)
+        core.add_hook(self._hook)
+        self._open = True
+
+    @staticmethod
+    def _preload(load):
+        # bypass hooks: preloads are neither recorded nor served.
+        asset_loader = core.loaders[load.loader]
+        return asset_loader(load.filename, *load.args, **load.kwargs)
+
+    def _hook(self, loader_name, filename, args, kwargs):
+        try:
+            key = make_key(loader_name, filename, args, kwargs)
+        except TypeError:
+            return None
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is None or future.cancel():
+            # not preloaded yet: load it right away instead.
+            return None
+        return future
+
+    @property
+    def pending(self):
+        """Number of preloads not done yet."""
+        with self._lock:
+            return sum(not future.done() for future in self._futures.values())
+
+    def wait(self, timeout=None):
+        """Wait for all preloads to be done.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            In seconds. Default is to wait indefinitely.
+
+        Returns
+        -------
+        done : bool
+            False if the timeout expired.
+        """
+        with self._lock:
+            futures = list(self._futures.values())
+        _, not_done = wait_futures(futures, timeout)
+        return not not_done
+
+    def close(self, wait=True):
+        """Stop serving loads, cancel pending preloads, and drop assets
+        which were not handed over.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Whether to wait for running preloads. Default is True.
+        """
+        if not self._open:
+            return
+        self._open = False
+        core.remove_hook(self._hook)
+        with self._lock:
+            futures, self._futures = self._futures, OrderedDict()
+        for future in futures.values():
+            future.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def preload(profile, scenes=None, workers=1):
+    """Preload the assets of a profile saved by Recorder.save().
+
+    Parameters
+    ----------
+    profile : str, text file object or list of Load
+        The profile's path, the opened profile, or recorded loads.
+    scenes : list of str, optional
+        Only preload the loads recorded under these scene markers.
+        Default is to preload all loads.
+    workers : int, optional
+        Number of loading threads. Default is 1.
+
+    Returns
+    -------
+    preloader : Preloader
+        To be closed once the preloaded scenes are loaded.
+    """
+    loads = profile if isinstance(profile, list) else read_profile(profile)
+    if scenes is not None:
+        loads = [load for load in loads if load.scene in scenes]
+    return Preloader(loads, workers=workers)
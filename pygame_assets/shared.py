@@ -0,0 +1,362 @@
+"""Decoded assets shared between processes through shared memory.
+
+Processes running many instances of a game, e.g. headless bots on a
+server, would each decode the same assets into private memory. A
+SharedAssetHost decodes assets once, copies their pixels and samples
+into multiprocessing.shared_memory segments, and publishes them in an
+index segment named after a prefix. Other processes attach to the
+prefix with SharedAssets, and wrap the segments of images without
+copying them: memory stays flat as the number of processes grows.
+
+Shared images are shared: drawing on them changes them for all the
+processes. pygame copies the buffers sounds are created from, so
+sounds are copied, but not decoded, in attached processes.
+
+Usage
+-----
+# host process
+host = shared.SharedAssetHost('game')
+host.load('image', 'player.png')
+host.load('sound', 'jump.wav')
+...
+host.close()
+
+# game instance processes
+assets = shared.SharedAssets('game')
+assets.install()  # serve load.image('player.png') from shared memory
+player = load.image('player.png')
+"""
+
+import inspect
+import json
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
+
+import pygame
+
+from . import core, rawimages
+from .cache import make_key
+
+
+# generation, length of the JSON index
+_INDEX_HEADER = struct.Struct('<II')
+
+
+# whether segments can be attached to without the resource tracker
+# (Python 3.13+)
+_CAN_UNTRACK = 'track' in inspect.signature(
+    shared_memory.SharedMemory).parameters
+
+# names of the segments created by hosts of this process
+_hosted = set()
+
+
+def _create(name, size):
+    segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _hosted.add(segment.name)
+    return segment
+
+
+def _attach(name):
+    """Attach to an existing segment, without taking its ownership."""
+    if _CAN_UNTRACK:
+        return shared_memory.SharedMemory(name=name, track=False)
+    segment = shared_memory.SharedMemory(name=name)
+    # the resource tracker would unlink segments attached to when this
+    # process exits: only the host must unlink them. Segments created in
+    # this process are registered once, and must stay registered.
+    if segment.name not in _hosted:
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def _frozen(args, kwargs):
+    # arguments as stored in the index.
+    return make_key(*json.loads(json.dumps([args, kwargs])))
+
+
+class SharedAssetHost:
+    """Decode assets once into shared memory segments.
+
+    Parameters
+    ----------
+    prefix : str
+        Name of the index segment, and prefix of the asset segments.
+        Must be unique to the host on the machine.
+    index_size : int, optional
+        Size of the index segment in bytes. Default is 1 MiB.
+    """
+
+    def __init__(self, prefix, index_size=1 << 20):
+        self.prefix = prefix
+        self._index = _create(prefix, index_size)
+        self._segments = []
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self):
+        data = json.dumps(self._entries).encode()
+        buffer = self._index.buf
+        if _INDEX_HEADER.size + len(data) > len(buffer):
+            raise ValueError('The index of shared assets is full')
+        # seqlock: readers retry while the generation is odd or changed.
+        self._generation += 1
+        _INDEX_HEADER.pack_into(buffer, 0, self._generation, len(data))
+        buffer[_INDEX_HEADER.size:_INDEX_HEADER.size + len(data)] = data
+        self._generation += 1
+        _INDEX_HEADER.pack_into(buffer, 0, self._generation, len(data))
+
+    def _share(self, name, data, entry):
+        segment = _create('{}-{}'.format(self.prefix, len(self._segments)),
+                          max(len(data), 1))
+        segment.buf[:len(data)] = data
+        self._segments.append(segment)
+        entry.update(segment=segment.name, length=len(data))
+        self._entries[name] = entry
+        self._publish()
+
+    def add(self, name, asset, loader=None, args=(), kwargs=None):
+        """Share a surface or a sound.
+
+        Raises a TypeError for other assets.
+
+        Parameters
+        ----------
+        name : str
+            The asset's name in the index, e.g. its filename.
+        asset : pygame.Surface or pygame.mixer.Sound
+        loader : str, optional
+            The name of the loader which loaded the asset. If given,
+            SharedAssets.install() serves loads of name by this loader,
+            with the same arguments, from shared memory.
+        args : tuple, optional
+        kwargs : dict, optional
+            JSON-serializable arguments of the loader.
+        """
+        entry = {'loader': loader,
+                 'arguments': json.loads(json.dumps([args, kwargs or {}]))}
+        if isinstance(asset, pygame.Surface):
+            pixel_format = rawimages.storage_format(
+                asset, rawimages.native_format(asset))
+            opaque = not asset.get_flags() & pygame.SRCALPHA
+            entry.update(kind='image', size=asset.get_size(),
+                         format=pixel_format, opaque=opaque)
+            data = rawimages.tobytes(asset, pixel_format)
+        elif isinstance(asset, pygame.mixer.Sound):
+            entry.update(kind='sound', mixer=pygame.mixer.get_init())
+            data = asset.get_raw()
+        else:
+            raise TypeError('Cannot share {!r}: only surfaces and sounds '
+                            'can be shared'.format(asset))
+        with self._lock:
+            self._share(name, data, entry)
+
+    def load(self, loader_name, filename, *args, **kwargs):
+        """Load an asset with a registered loader, and share it.
+
+        The asset is shared under its filename.
+
+        Parameters
+        ----------
+        loader_name : str
+        filename : str
+        *args, **kwargs :
+            Passed to the loader.
+
+        Returns
+        -------
+        asset : pygame.Surface or pygame.mixer.Sound
+        """
+        asset = core.get_loader(loader_name)(filename, *args, **kwargs)
+        self.add(filename, asset, loader_name, args, kwargs)
+        return asset
+
+    @property
+    def names(self):
+        """The names of the shared assets."""
+        with self._lock:
+            return list(self._entries)
+
+    def close(self):
+        """Remove the shared segments.
+
+        Processes attached to the segments keep their mapping until they
+        close them.
+        """
+        with self._lock:
+            if self._index is None:
+                return
+            segments = self._segments + [self._index]
+            self._segments = []
+            self._entries = {}
+            self._index = None
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+            _hosted.discard(segment.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SharedAssets:
+    """Attach to the assets shared by a SharedAssetHost.
+
+    Raises a FileNotFoundError if no host uses the prefix.
+
+    Parameters
+    ----------
+    prefix : str
+        The prefix of the host.
+    timeout : float, optional
+        How long to wait for the host to finish publishing its index, in
+        seconds, before raising a TimeoutError. Default is 1.
+    """
+
+    def __init__(self, prefix, timeout=1.0):
+        self.prefix = prefix
+        self.timeout = timeout
+        self._index = _attach(prefix)
+        # the index, as of a generation of the host's
+        self._generation = None
+        self._entries = {}
+        self._segments = {}
+        self._assets = {}
+        self._lock = threading.Lock()
+        self._installed = False
+
+    def _read_index(self):
+        buffer = self._index.buf
+        deadline = time.monotonic() + self.timeout
+        delay = 1e-4
+        while True:
+            generation, length = _INDEX_HEADER.unpack_from(buffer)
+            if generation == self._generation:
+                return self._entries
+            if not generation % 2:
+                data = bytes(buffer[_INDEX_HEADER.size:
+                                    _INDEX_HEADER.size + length])
+                if _INDEX_HEADER.unpack_from(buffer)[0] == generation:
+                    entries = json.loads(data.decode())
+                    self._entries, self._generation = entries, generation
+                    return entries
+            # the host is publishing, or died while publishing.
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    'The index of shared assets {} is being written for '
+                    'too long'.format(self.prefix))
+            time.sleep(delay)
+            delay = min(delay * 2, 0.01)
+
+    @property
+    def names(self):
+        """The names of the shared assets."""
+        return list(self._read_index())
+
+    def get(self, name):
+        """Return a shared asset.
+
+        Images wrap the shared segment, sounds are copied from it.
+        Raises a KeyError if no asset is shared under name, and a
+        ValueError if a sound was shared with another mixer format than
+        the one of this process.
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        asset : pygame.Surface or pygame.mixer.Sound
+        """
+        with self._lock:
+            if name in self._assets:
+                return self._assets[name]
+            entry = self._read_index()[name]
+            segment = self._segments.get(entry['segment'])
+            if segment is None:
+                segment = _attach(entry['segment'])
+                self._segments[entry['segment']] = segment
+            data = segment.buf[:entry['length']]
+            if entry['kind'] == 'image':
+                size = tuple(entry['size'])
+                asset = rawimages.frombuffer(
+                    data, size, entry['format'],
+                    size[0] * len(entry['format']), entry['opaque'])
+            else:
+                mixer = pygame.mixer.get_init()
+                if list(mixer or ()) != entry['mixer']:
+                    raise ValueError(
+                        'Sound {} was shared with mixer format {}, not {}'
+                        .format(name, entry['mixer'], mixer))
+                asset = pygame.mixer.Sound(buffer=data)
+                data.release()
+            self._assets[name] = asset
+            return asset
+
+    def __contains__(self, name):
+        return name in self._read_index()
+
+    def _hook(self, loader_name, filename, args, kwargs):
+        entry = self._read_index().get(filename)
+        if entry is None or entry['loader'] != loader_name:
+            return None
+        try:
+            if _frozen(args, kwargs) != make_key(*entry['arguments']):
+                return None
+        except (TypeError, ValueError):
+            return None
+        future = Future()
+        try:
+            future.set_result(self.get(filename))
+        except ValueError as exc:
+            future.set_exception(exc)
+        return future
+
+    def install(self):
+        """Serve loads through pygame_assets.load from shared memory.
+
+        Loads of a shared asset by the loader and with the arguments it
+        was loaded with by the host return the shared asset.
+        """
+        if not self._installed:
+            core.add_hook(self._hook)
+            self._installed = True
+
+    def uninstall(self):
+        """Stop serving loads from shared memory."""
+        if self._installed:
+            core.remove_hook(self._hook)
+            self._installed = False
+
+    def close(self):
+        """Detach from the shared segments.
+
+        Shared images must not be used anymore.
+        """
+        self.uninstall()
+        with self._lock:
+            self._assets.clear()
+            segments = list(self._segments.values()) + [self._index]
+            self._segments.clear()
+        for segment in segments:
+            try:
+                segment.close()
+            except BufferError:
+                # surfaces still use the segment: it is unmapped when
+                # they are garbage collected.
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,71 @@
+"""Decoded sound data cached in the mixer's format.
+
+pygame.mixer.Sound decodes sound files and converts them to the mixer's
+frequency and sample format on every load. The PCM data resulting from
+this conversion is cached here, in memory and on disk if the config's
+cache_dir is set, keyed by the content hash of the file and the mixer
+format. Sounds are then built straight from the cached data.
+"""
+
+import hashlib
+import os
+
+import pygame
+
+from .cache import AssetCache
+from .files import atomic_write
+
+
+# (content hash, mixer format) -> PCM data. Sounds hold a copy of their
+# data: the cache is bounded so as not to double the memory of sounds.
+cache = AssetCache(max_size=64 * 1024 * 1024)
+
+
+def mixer_format():
+    """Return the mixer's (frequency, size, channels) format.
+
+    Raises a pygame.error if the mixer is not initialized.
+    """
+    mixer_init = pygame.mixer.get_init()
+    if mixer_init is None:
+        raise pygame.error('mixer not initialized')
+    return mixer_init
+
+
+def load_pcm(digest, get_source, cache_dir=None):
+    """Return the PCM data of a sound, in the mixer's format.
+
+    Parameters
+    ----------
+    digest : str
+        The content hash of the sound file.
+    get_source : function
+        Called without arguments to get a path or a file object to decode
+        the sound from, if the PCM data is not cached.
+    cache_dir : str, optional
+        The on-disk cache directory, if any.
+
+    Returns
+    -------
+    pcm : bytes
+    """
+    key = (digest, mixer_format())
+
+    def decode():
+        filepath = None
+        if cache_dir is not None:
+            name = hashlib.sha1(repr(key).encode()).hexdigest() + '.pcm'
+            filepath = os.path.join(cache_dir, 'sounds', name)
+            try:
+                with open(filepath, 'rb') as pcm_file:
+                    return pcm_file.read()
+            except OSError:
+                pass
+        pcm = pygame.mixer.Sound(get_source()).get_raw()
+        if filepath is not None:
+            with atomic_write(filepath) as pcm_file:
+                pcm_file.write(pcm)
+        return pcm
+
+    pcm, _ = cache.get_or_load(key, decode)
+    return pcm
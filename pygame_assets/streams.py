@@ -0,0 +1,197 @@
+"""Streaming playback of long sounds on mixer channels.
+
+pygame.mixer.music can only stream one track at a time, and loading a
+long track as a Sound decodes all of it into memory. A SoundStream
+decodes a sound file in chunks, keeps a bounded buffer of decoded chunks
+and feeds them to a mixer channel with Channel.queue(), so that memory
+use does not depend on the track's length. Many streams can play at once,
+each on a channel of its own. Channels are reserved for streams with
+pygame.mixer.set_reserved(), so that Sound.play() does not take them
+either; Channel objects found with pygame.mixer.find_channel() may still
+be reserved channels.
+
+Only uncompressed WAV files can be decoded in chunks.
+
+Usage
+-----
+rain = load.stream('rain.wav', loop=True, volume=0.5)
+wind = load.stream('wind.wav', loop=True)
+rain.play()
+wind.play()
+
+while running:
+    # feed the mixer channels of all playing streams.
+    streams.update_all()
+"""
+
+import io
+import wave
+from collections import deque
+
+import pygame
+
+
+# streams currently playing, updated by update_all(). Streams are kept
+# alive while they play, e.g. load.stream('rain.wav', loop=True).play().
+playing = set()
+
+# whether each channel reserved for streams, by id, is taken by a stream
+_reserved = []
+
+
+def _reserve_channel():
+    """Return the id of a reserved channel no stream plays on."""
+    for channel_id, taken in enumerate(_reserved):
+        if not taken:
+            break
+    else:
+        channel_id = len(_reserved)
+        _reserved.append(False)
+    count = len(_reserved)
+    if pygame.mixer.get_num_channels() < count:
+        pygame.mixer.set_num_channels(count)
+    # reserved again in case the mixer was initialized anew.
+    pygame.mixer.set_reserved(count)
+    _reserved[channel_id] = True
+    return channel_id
+
+
+def _release_channel(channel_id):
+    _reserved[channel_id] = False
+
+
+def update_all():
+    """Update all playing streams. Call it once per frame."""
+    for stream in list(playing):
+        stream.update()
+
+
+class SoundStream:
+    """Play a sound file in chunks on a mixer channel.
+
+    Call .update() regularly (e.g. once per frame, or use update_all())
+    so that decoded chunks are queued on the channel in time. The time
+    covered by the buffer must exceed the time between updates.
+
+    Parameters
+    ----------
+    source : str or binary file object
+        A WAV file.
+    loop : bool, optional
+        Whether to loop the sound forever. Default is False.
+    volume : float, optional
+        The volume of the stream, between 0 and 1. Default is 1.
+    chunk_duration : float, optional
+        Duration of decoded chunks, in seconds. Default is 0.5.
+    buffer_chunks : int, optional
+        Maximum number of decoded chunks waiting to be played.
+        Default is 3.
+    channel : pygame.mixer.Channel, optional
+        The channel to play on. Default is a channel reserved for the
+        stream while it plays.
+    """
+
+    def __init__(self, source, *, loop=False, volume=1, chunk_duration=0.5,
+                 buffer_chunks=3, channel=None):
+        self._wave = wave.open(source, 'rb')
+        self._params = self._wave.getparams()
+        framerate = self._params.framerate
+        self.chunk_frames = max(1, int(chunk_duration * framerate))
+        self.buffer_chunks = buffer_chunks
+        self.loop = loop
+        self.volume = volume
+        self.channel = channel
+        # id of the reserved channel the stream plays on, if any
+        self._channel_id = None
+        self._buffer = deque()
+        self._exhausted = False
+        self.playing = False
+
+    def _decode_chunk(self):
+        frames = self._wave.readframes(self.chunk_frames)
+        if not frames and self.loop:
+            self._wave.rewind()
+            frames = self._wave.readframes(self.chunk_frames)
+        if not frames:
+            self._exhausted = True
+            return None
+        # let SDL convert the chunk to the mixer's format.
+        chunk = io.BytesIO()
+        with wave.open(chunk, 'wb') as chunk_wave:
+            chunk_wave.setparams(self._params)
+            chunk_wave.writeframes(frames)
+        chunk.seek(0)
+        return pygame.mixer.Sound(file=chunk)
+
+    def _fill(self):
+        while len(self._buffer) < self.buffer_chunks and not self._exhausted:
+            chunk = self._decode_chunk()
+            if chunk is not None:
+                self._buffer.append(chunk)
+
+    def play(self):
+        """Start playback, over from the beginning if it finished."""
+        if self.finished:
+            self.rewind()
+        if self.channel is None:
+            self._channel_id = _reserve_channel()
+            self.channel = pygame.mixer.Channel(self._channel_id)
+        self.channel.set_volume(self.volume)
+        self.playing = True
+        playing.add(self)
+        self.update()
+
+    def update(self):
+        """Decode chunks and queue them on the channel as needed."""
+        if not self.playing:
+            return
+        self._fill()
+        if not self.channel.get_busy():
+            if not self._buffer:
+                # the whole sound was played.
+                self._halt()
+                return
+            self.channel.play(self._buffer.popleft())
+        if self.channel.get_queue() is None and self._buffer:
+            self.channel.queue(self._buffer.popleft())
+        self._fill()
+
+    def _halt(self):
+        self.playing = False
+        playing.discard(self)
+        if self.channel is not None:
+            self.channel.stop()
+        if self._channel_id is not None:
+            _release_channel(self._channel_id)
+            self._channel_id = None
+            self.channel = None
+
+    def stop(self):
+        """Stop playback. The next .play() starts from the beginning.
+
+        Chunks queued on the channel are dropped: decoding is rewound so
+        that they are not skipped.
+        """
+        self._halt()
+        self.rewind()
+
+    def rewind(self):
+        """Restart decoding from the beginning of the sound."""
+        self._wave.rewind()
+        self._buffer.clear()
+        self._exhausted = False
+
+    def close(self):
+        """Stop playback and close the sound file."""
+        self.stop()
+        self._wave.close()
+
+    @property
+    def buffered(self):
+        """Number of decoded chunks waiting to be played."""
+        return len(self._buffer)
+
+    @property
+    def finished(self):
+        """Whether the whole sound was decoded and played."""
+        return self._exhausted and not self._buffer and not self.playing
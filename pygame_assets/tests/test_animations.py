@@ -0,0 +1,128 @@
+"""Tests for the animation loader."""
+
+import io
+import unittest
+
+import pygame
+
+from pygame_assets import animations, load
+from pygame_assets.cache import asset_size
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+from pygame_assets.exceptions import AssetNotFoundError
+
+from .utils import TestCase
+
+
+def png(color, size=(8, 6)):
+    surface = pygame.Surface(size)
+    surface.fill(color)
+    image_file = io.BytesIO()
+    pygame.image.save(surface, image_file, 'frame.png')
+    return image_file.getvalue()
+
+
+class TestPacking(unittest.TestCase):
+    """Unit tests for atlas packing."""
+
+    def test_rects_do_not_overlap(self):
+        sizes = [(10, 5), (4, 8), (10, 5), (6, 6), (3, 3)]
+        rects, (width, height) = animations.pack(sizes)
+        atlas = pygame.Rect(0, 0, width, height)
+        for i, rect in enumerate(rects):
+            self.assertEqual(rect.size, sizes[i])
+            self.assertTrue(atlas.contains(rect))
+            self.assertEqual(rect.collidelistall(rects), [i])
+
+    def test_frame_order(self):
+        names = ['10.png', '2.png', '1.png', 'walk_3.png']
+        self.assertEqual(sorted(names, key=animations.frame_order),
+                         ['1.png', '2.png', '10.png', 'walk_3.png'])
+
+    def test_frame_at_time(self):
+        atlas = pygame.Surface((30, 10))
+        rects = [pygame.Rect(x, 0, 10, 10) for x in (0, 10, 20)]
+        animation = animations.Animation(atlas, rects, [100, 50, 100])
+        self.assertEqual(animation.duration, 250)
+        self.assertEqual(animation.frame_index(0), 0)
+        self.assertEqual(animation.frame_index(120), 1)
+        self.assertEqual(animation.frame_index(150), 2)
+        self.assertEqual(animation.frame_index(260), 0)
+        self.assertEqual(animation.frame_index(260, loop=False), 2)
+
+    def test_size(self):
+        atlas = pygame.Surface((30, 10), 0, 32)
+        animation = animations.Animation(atlas, [atlas.get_rect()], [100])
+        self.assertEqual(asset_size(animation), 1200)
+
+    def test_colorkeyed_frames_stay_transparent(self):
+        frame = pygame.Surface((4, 4))
+        frame.fill((255, 0, 255))
+        frame.fill((10, 20, 30), (2, 0, 2, 4))
+        frame.set_colorkey((255, 0, 255))
+        animation = animations.Animation.from_frames([frame], [100])
+        target = pygame.Surface((4, 4))
+        target.fill((1, 1, 1))
+        target.blit(animation[0], (0, 0))
+        self.assertEqual(tuple(target.get_at((0, 0)))[:3], (1, 1, 1))
+        self.assertEqual(tuple(target.get_at((3, 3)))[:3], (10, 20, 30))
+
+
+class TestAnimationLoader(TestCase):
+    """Unit tests for the animation loader."""
+
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        animations.cache.clear()
+        files = {'image/walk/walk_{}.png'.format(number): png(color)
+                 for number, color in zip((1, 2, 10), self.colors)}
+        files['image/walk/notes.txt'] = b'not a frame'
+        self.backend = MemoryBackend(files)
+        get_config().mount(self.backend)
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def test_dir_is_image(self):
+        self.assertListEqual(get_config().dirs['animation'], ['image'])
+
+    def test_load_frame_directory(self):
+        animation = load.animation('walk', duration=80)
+        self.assertEqual(len(animation), 3)
+        self.assertEqual(animation.durations, [80, 80, 80])
+        for frame, color in zip(animation, self.colors):
+            self.assertEqual(frame.get_size(), (8, 6))
+            self.assertEqual(frame.get_at((4, 3))[:3], color)
+
+    def test_frames_share_atlas(self):
+        animation = load.animation('walk')
+        for frame in animation:
+            self.assertIs(frame.get_parent(), animation.atlas)
+
+    def test_animation_is_cached_as_unit(self):
+        first = load.animation('walk')
+        second = load.animation('walk')
+        self.assertIs(first, second)
+        self.assertEqual(len(animations.cache), 1)
+        self.assertIsNot(load.animation('walk', duration=50), first)
+
+    def test_load_single_image(self):
+        animation = load.animation('test-image.png')
+        self.assertEqual(len(animation), 1)
+        self.assertEqual(animation.durations, [100])
+
+    def test_animation_not_found(self):
+        with self.assertRaises(AssetNotFoundError):
+            load.animation('run')
+
+
+if __name__ == '__main__':
+    unittest.main()
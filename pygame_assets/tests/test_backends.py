@@ -0,0 +1,297 @@
+"""Tests for the storage backends."""
+
+import functools
+import http.server
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import zipfile
+from contextlib import contextmanager
+
+import pygame
+
+from pygame_assets import core, load
+from pygame_assets.backends import LocalBackend, ZipBackend, MemoryBackend, \
+    HTTPBackend
+from pygame_assets.configure import get_config
+from pygame_assets.core import list_assets
+from pygame_assets.exceptions import AssetNotFoundError
+
+from .utils import TestCase
+
+
+def make_zip(files):
+    """Return an in-memory zip archive containing the given files."""
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    archive.seek(0)
+    return archive
+
+
+@contextmanager
+def text_loader():
+    """Define a text loader accepting both paths and streams."""
+    @core.loader(name='text')
+    def load_text(source):
+        if isinstance(source, str):
+            with open(source, 'rb') as textfile:
+                return textfile.read().decode()
+        return source.read().decode()
+    yield load_text
+    core.unregister('text')
+
+
+class TestLocalBackend(unittest.TestCase):
+    """Unit tests for the local filesystem backend."""
+
+    def test_serves_file_paths(self):
+        backend = LocalBackend('tests/assets')
+        self.assertTrue(backend.exists('text/version_control.txt'))
+        self.assertFalse(backend.exists('text/does_not_exist.txt'))
+        self.assertEqual(backend.source('text/version_control.txt'),
+                         os.path.join('tests/assets',
+                                      'text/version_control.txt'))
+
+    def test_directories_do_not_exist(self):
+        self.assertFalse(LocalBackend('tests/assets').exists('text'))
+
+    def test_listdir(self):
+        backend = LocalBackend('tests/assets')
+        self.assertIn('version_control.txt', backend.listdir('text'))
+        self.assertNotIn('text', backend.listdir(''))
+        self.assertEqual(backend.listdir('missing'), [])
+
+
+class TestZipBackend(unittest.TestCase):
+    """Unit tests for the zip archive backend."""
+
+    def setUp(self):
+        self.backend = ZipBackend(make_zip({'text/hello.txt': b'Hello!'}))
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_exists(self):
+        self.assertTrue(self.backend.exists('text/hello.txt'))
+        self.assertTrue(self.backend.exists('./text/hello.txt'))
+        self.assertFalse(self.backend.exists('text'))
+        self.assertFalse(self.backend.exists('text/other.txt'))
+
+    def test_serves_named_streams(self):
+        stream = self.backend.source('text/hello.txt')
+        self.assertEqual(stream.read(), b'Hello!')
+        self.assertEqual(stream.name, 'text/hello.txt')
+
+    def test_open_missing_file_raises_file_not_found(self):
+        with self.assertRaises(FileNotFoundError):
+            self.backend.open('text/other.txt')
+
+    def test_listdir(self):
+        self.assertEqual(self.backend.listdir('text'), ['hello.txt'])
+        self.assertEqual(self.backend.listdir(''), [])
+
+
+class TestMemoryBackend(unittest.TestCase):
+    """Unit tests for the in-memory backend."""
+
+    def test_add_and_open(self):
+        backend = MemoryBackend({'text/a.txt': b'A'})
+        backend.add('text/b.txt', b'B')
+        self.assertTrue(backend.exists('text/b.txt'))
+        self.assertEqual(backend.open('text/a.txt').read(), b'A')
+        with self.assertRaises(FileNotFoundError):
+            backend.open('text/c.txt')
+
+    def test_listdir(self):
+        backend = MemoryBackend({'text/a.txt': b'A', 'text/sub/b.txt': b'B',
+                                 'c.txt': b'C'})
+        self.assertEqual(backend.listdir('text'), ['a.txt'])
+        self.assertEqual(backend.listdir('./text/sub/'), ['b.txt'])
+        self.assertEqual(backend.listdir(''), ['c.txt'])
+
+
+class RecordingHandler(http.server.SimpleHTTPRequestHandler):
+    """Request handler recording requests and answering with keep-alive."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(
+            (self.client_address, self.path,
+             'If-Modified-Since' in self.headers))
+        super().do_GET()
+
+
+class TestHTTPBackend(unittest.TestCase):
+    """Unit tests for the HTTP backend, against a local server."""
+
+    def setUp(self):
+        self.served_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.served_dir, 'text'))
+        for name in ('a.txt', 'b.txt'):
+            with open(os.path.join(self.served_dir, 'text', name), 'w') as f:
+                f.write(name)
+        handler = functools.partial(RecordingHandler,
+                                    directory=self.served_dir)
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0),
+                                                      handler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, args=(0.01,),
+                         daemon=True).start()
+        self.cache_dir = tempfile.mkdtemp()
+        self.backend = self.make_backend()
+
+    def make_backend(self, **kwargs):
+        url = 'http://127.0.0.1:{}/'.format(self.server.server_address[1])
+        return HTTPBackend(url, self.cache_dir, pool_size=1, **kwargs)
+
+    def tearDown(self):
+        self.backend.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.served_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def test_download_into_cache(self):
+        self.assertTrue(self.backend.exists('text/a.txt'))
+        with open(self.backend.source('text/a.txt')) as cached:
+            self.assertEqual(cached.read(), 'a.txt')
+        with self.backend.open('text/a.txt') as cached:
+            self.assertEqual(cached.read(), b'a.txt')
+        # fresh files are not requested again.
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_missing_file(self):
+        self.assertFalse(self.backend.exists('text/missing.txt'))
+        with self.assertRaises(FileNotFoundError):
+            self.backend.source('text/missing.txt')
+
+    def test_connections_are_kept_alive(self):
+        self.backend.prefetch('text/a.txt', 'text/b.txt')
+        self.backend.exists('text/a.txt')
+        self.backend.exists('text/b.txt')
+        clients = {client for client, *_ in self.server.requests}
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(len(clients), 1)
+
+    def test_revalidate_cached_files(self):
+        self.backend.exists('text/a.txt')
+        self.backend.close()
+        # a new session revalidates the cached file instead of downloading.
+        self.backend = self.make_backend(revalidate_after=0)
+        self.assertTrue(self.backend.exists('text/a.txt'))
+        *_, revalidated = self.server.requests[-1]
+        self.assertTrue(revalidated)
+
+    def test_cache_size_is_bounded(self):
+        self.backend.close()
+        self.backend = self.make_backend(max_cache_size=6)
+        self.backend.exists('text/a.txt')
+        self.backend.exists('text/b.txt')
+        cached = [name for name in os.listdir(self.cache_dir)
+                  if not name.endswith('.meta')]
+        self.assertEqual(len(cached), 1)
+
+    def test_file_larger_than_cache_is_kept(self):
+        self.backend.close()
+        self.backend = self.make_backend(max_cache_size=2)
+        with open(self.backend.source('text/a.txt')) as cached:
+            self.assertEqual(cached.read(), 'a.txt')
+
+    def test_cached_files_keep_their_extension(self):
+        self.assertTrue(self.backend.source('text/a.txt').endswith('.txt'))
+
+    def test_unreachable_server(self):
+        self.backend.exists('text/a.txt')
+        self.backend.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.backend = self.make_backend(revalidate_after=0)
+        self.assertFalse(self.backend.exists('text/b.txt'))
+        # files cached by previous sessions are still served.
+        self.assertTrue(self.backend.exists('text/a.txt'))
+
+    def test_load_from_http_backend(self):
+        with text_loader():
+            get_config().mount(self.backend)
+            try:
+                self.assertEqual(load.text('a.txt'), 'a.txt')
+            finally:
+                get_config().unmount(self.backend)
+
+
+class TestMounts(TestCase):
+    """Test loading assets through mounted backends."""
+
+    def setUp(self):
+        super().setUp()
+        self.text_loader = text_loader()
+        self.text_loader.__enter__()
+        self.backend = MemoryBackend({'text/memory.txt': b'from memory'})
+        get_config().mount(self.backend)
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        self.text_loader.__exit__(None, None, None)
+        super().tearDown()
+
+    def test_local_filesystem_is_mounted_by_default(self):
+        backend, path = get_config().resolve('some/file.txt')[0]
+        self.assertIsInstance(backend, LocalBackend)
+        self.assertEqual(path, 'some/file.txt')
+
+    def test_resolve_relative_to_mount_point(self):
+        resolved = get_config().resolve('tests/assets/text/memory.txt')
+        self.assertIn((self.backend, 'text/memory.txt'), resolved)
+        resolved = get_config().resolve('elsewhere/text/memory.txt')
+        self.assertNotIn(self.backend, [backend for backend, _ in resolved])
+
+    def test_load_from_mounted_backend(self):
+        self.assertEqual(load.text('memory.txt'), 'from memory')
+
+    def test_local_files_are_still_found(self):
+        self.assertTrue(load.text('version_control.txt').startswith('Ensures'))
+
+    def test_list_assets_across_backends(self):
+        self.backend.add('text/version_control.txt', b'shadowed')
+        assets = list_assets(get_config().search_paths('text', ''))
+        self.assertEqual(assets['memory.txt'],
+                         (self.backend, 'text/memory.txt'))
+        self.assertIsInstance(assets['version_control.txt'][0], LocalBackend)
+        self.assertEqual(list(assets), sorted(assets))
+
+    def test_unmount(self):
+        get_config().unmount(self.backend)
+        with self.assertRaises(AssetNotFoundError):
+            load.text('memory.txt')
+
+
+class TestLoadImageFromZip(TestCase):
+    """Test that built-in loaders accept streams served by backends."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def test_load_image_from_zip(self):
+        with open('tests/assets/image/test-image.png', 'rb') as image_file:
+            archive = make_zip({'image/zipped.png': image_file.read()})
+        backend = ZipBackend(archive)
+        get_config().mount(backend)
+        try:
+            self.assertIsInstance(load.image('zipped.png'), pygame.Surface)
+        finally:
+            get_config().unmount(backend)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""Tests for batched drawing."""
+
+import unittest
+from unittest import mock
+
+import pygame
+
+from pygame_assets import batches, load, pipelines
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+
+from .test_colorkeys import png_bytes
+from .utils import TestCase
+
+
+def make_square(color):
+    square = pygame.Surface((4, 4))
+    square.fill(color)
+    return square
+
+
+class RecordingSurface(pygame.Surface):
+    """Surface remembering the blits of its last blits() call."""
+
+    def blits(self, blit_sequence, doreturn=True):
+        self.drawn = list(blit_sequence)
+        return super().blits(self.drawn, doreturn)
+
+
+class TestBatch(TestCase):
+    """Unit tests for the Batch."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        pipelines.cache.clear()
+        self.backend = MemoryBackend({
+            'image/batch-red.png': png_bytes(make_square((255, 0, 0))),
+        })
+        get_config().mount(self.backend)
+        self.target = pygame.Surface((16, 16))
+        self.target.fill((0, 0, 0))
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def color(self, position):
+        return tuple(self.target.get_at(position))[:3]
+
+    def test_draw(self):
+        batch = batches.Batch()
+        batch.add('batch-red.png', (2, 2))
+        batch.add(make_square((0, 0, 255)), (4, 4))
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.draw(self.target), 2)
+        self.assertEqual(self.color((2, 2)), (255, 0, 0))
+        # commands are drawn in order.
+        self.assertEqual(self.color((5, 5)), (0, 0, 255))
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(batch.draw(self.target), 0)
+
+    def test_filenames_resolved_once(self):
+        batch = batches.Batch(convert_alpha=False)
+        loader = mock.Mock(wraps=load.image)
+        with mock.patch.object(batches, 'get_loader', return_value=loader):
+            for frame in range(3):
+                batch.extend([('batch-red.png', (0, 0)),
+                              ('batch-red.png', (8, 8))])
+                batch.draw(self.target)
+        self.assertEqual(loader.call_count, 1)
+        batch.forget()
+        self.assertEqual(batch._resolved, {})
+
+    def test_cull(self):
+        batch = batches.Batch()
+        square = make_square((0, 255, 0))
+        batch.extend([(square, (-4, 0)), (square, (16, 0)),
+                      (square, (0, 16)), (square, (-3, -3)),
+                      (square, (15, 15))])
+        self.assertEqual(batch.draw(self.target), 2)
+        self.assertEqual(self.color((0, 0)), (0, 255, 0))
+        self.assertEqual(self.color((15, 15)), (0, 255, 0))
+
+    def test_cull_to_clip(self):
+        self.target.set_clip((8, 8, 8, 8))
+        batch = batches.Batch()
+        batch.extend([(make_square((0, 255, 0)), (0, 0)),
+                      (make_square((0, 255, 0)), (6, 6))])
+        self.assertEqual(batch.draw(self.target), 1)
+
+    def test_offset(self):
+        batch = batches.Batch()
+        batch.add(make_square((0, 255, 0)), (100, 50))
+        batch.add(make_square((0, 255, 0)), (0, 0))
+        self.assertEqual(batch.draw(self.target, offset=(98, 48)), 1)
+        self.assertEqual(self.color((2, 2)), (0, 255, 0))
+        self.assertEqual(self.color((1, 1)), (0, 0, 0))
+
+    def test_area(self):
+        atlas = pygame.Surface((8, 4))
+        atlas.fill((255, 0, 0), (0, 0, 4, 4))
+        atlas.fill((0, 0, 255), (4, 0, 4, 4))
+        batch = batches.Batch()
+        batch.add(atlas, (0, 0), area=pygame.Rect(4, 0, 4, 4))
+        # culled with the size of the area, not of the atlas.
+        batch.add(atlas, (-6, 0), area=pygame.Rect(0, 0, 4, 4))
+        self.assertEqual(batch.draw(self.target), 1)
+        self.assertEqual(self.color((0, 0)), (0, 0, 255))
+        self.assertEqual(self.color((4, 0)), (0, 0, 0))
+
+    def test_group_by_atlas(self):
+        atlas = pygame.Surface((8, 4))
+        atlas.fill((255, 0, 0))
+        frames = [atlas.subsurface((0, 0, 4, 4)),
+                  atlas.subsurface((4, 0, 4, 4))]
+        other = make_square((0, 0, 255))
+        batch = batches.Batch(group=True)
+        batch.extend([(frames[0], (0, 0)), (other, (0, 0)),
+                      (frames[1], (0, 0))])
+        target = RecordingSurface((16, 16))
+        batch.draw(target)
+        self.assertEqual([blit[0] for blit in target.drawn],
+                         [frames[0], frames[1], other])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Tests for bitmap fonts."""
+
+import io
+import unittest
+
+import pygame
+
+from pygame_assets import bitmapfonts, load
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.cache import asset_size
+from pygame_assets.configure import get_config
+from pygame_assets.core import find_asset
+
+from .utils import TestCase
+
+
+FNT = """info face="Test" size=8 bold=0 italic=0 padding=0,0,0,0
+common lineHeight=10 base=8 scaleW=16 scaleH=8 pages=1 packed=0
+page id=0 file="test_0.png"
+chars count=3
+char id=65 x=0 y=0 width=8 height=8 xoffset=0 yoffset=1 xadvance=9 page=0
+char id=66 x=8 y=0 width=8 height=8 xoffset=1 yoffset=1 xadvance=9 page=0
+char id=32 x=0 y=0 width=0 height=0 xoffset=0 yoffset=0 xadvance=4 page=0
+kernings count=1
+kerning first=65 second=66 amount=-2
+"""
+
+
+def page_bytes():
+    page = pygame.Surface((16, 8), pygame.SRCALPHA)
+    page.fill((255, 0, 0), (0, 0, 8, 8))
+    page.fill((0, 255, 0), (8, 0, 8, 8))
+    image_file = io.BytesIO()
+    pygame.image.save(page, image_file, 'test_0.png')
+    return image_file.getvalue()
+
+
+class TestParseFnt(unittest.TestCase):
+    """Unit tests for parsing BMFont descriptors."""
+
+    def test_parse(self):
+        tags = bitmapfonts.parse_fnt(FNT)
+        self.assertEqual(tags[0], ('info', {
+            'face': 'Test', 'size': 8, 'bold': 0, 'italic': 0,
+            'padding': '0,0,0,0'}))
+        self.assertEqual(tags[2], ('page', {'id': 0, 'file': 'test_0.png'}))
+
+    def test_binary_format(self):
+        with self.assertRaises(ValueError):
+            bitmapfonts.parse_fnt('BMF\x03')
+
+
+class TestBitmapFont(TestCase):
+    """Unit tests for the bitmap_font loader."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        bitmapfonts.cache.clear()
+        self.backend = MemoryBackend({'font/test.fnt': FNT.encode(),
+                                      'font/test_0.png': page_bytes()})
+        get_config().mount(self.backend)
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        bitmapfonts.cache.clear()
+        super().tearDown()
+
+    def test_load_fnt(self):
+        font = load.bitmap_font('test.fnt')
+        self.assertEqual((font.line_height, font.base), (10, 8))
+        self.assertIsNone(font.glyphs[' '].surface)
+        self.assertIs(font.glyphs['A'].surface.get_parent(),
+                      font.glyphs['B'].surface.get_parent())
+        self.assertIs(load.bitmap_font('test.fnt'), font)
+
+    def test_size(self):
+        font = load.bitmap_font('test.fnt')
+        page = font.glyphs['A'].surface.get_parent()
+        self.assertEqual(asset_size(font), page.get_pitch() * 8)
+
+    def test_layout(self):
+        font = load.bitmap_font('test.fnt')
+        blits = font.blits('AB A\nB', (10, 20))
+        self.assertEqual([position for _, position in blits],
+                         [(10, 21), (18, 21), (30, 21), (11, 31)])
+        self.assertEqual(font.size('AB A\nB'), (29, 20))
+
+    def test_unknown_characters_are_skipped(self):
+        font = load.bitmap_font('test.fnt')
+        self.assertEqual(len(font.blits('AzB')), 2)
+
+    def test_render_to(self):
+        font = load.bitmap_font('test.fnt')
+        surface = pygame.Surface((40, 20))
+        rect = font.render_to(surface, (2, 2), 'AB')
+        self.assertEqual(rect, pygame.Rect(2, 2, 16, 10))
+        self.assertEqual(tuple(surface.get_at((3, 4)))[:3], (255, 0, 0))
+        self.assertEqual(tuple(surface.get_at((11, 4)))[:3], (0, 255, 0))
+
+    def test_bake_font(self):
+        font = load.bitmap_font('bebas-neue.otf', size=20,
+                                color=(255, 255, 0))
+        backend, path = find_asset(
+            'bebas-neue.otf', get_config().search_paths('font',
+                                                        'bebas-neue.otf'))
+        reference = pygame.font.Font(backend.source(path), 20)
+        self.assertEqual(font.size('A'), reference.size('A'))
+        atlases = {glyph.surface.get_parent()
+                   for glyph in font.glyphs.values()
+                   if glyph.surface is not None}
+        self.assertEqual(len(atlases), 1)
+        surface = pygame.Surface(font.size('A'))
+        font.render_to(surface, (0, 0), 'A')
+        self.assertIn((255, 255, 0, 255),
+                      [tuple(surface.get_at((x, y)))
+                       for x in range(surface.get_width())
+                       for y in range(surface.get_height())])
+
+    def test_baked_fonts_are_cached(self):
+        font = load.bitmap_font('bebas-neue.otf', size=20)
+        self.assertIs(load.bitmap_font('bebas-neue.otf', size=20), font)
+        self.assertIsNot(load.bitmap_font('bebas-neue.otf', size=21), font)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Tests for the asset cache."""
+
+import unittest
+
+import pygame
+
+from pygame_assets.cache import AssetCache, asset_size, make_key
+
+
+class TestMakeKey(unittest.TestCase):
+    """Unit tests for cache keys."""
+
+    def test_dicts_and_lists_are_frozen(self):
+        key = make_key({'b': [1, 2], 'a': 0})
+        self.assertEqual(key, make_key({'a': 0, 'b': [1, 2]}))
+        hash(key)
+
+    def test_unhashable_parts_raise_type_error(self):
+        with self.assertRaises(TypeError):
+            make_key(bytearray(b'unhashable'))
+
+
+class TestAssetCache(unittest.TestCase):
+    """Unit tests for the asset cache."""
+
+    def test_get_or_load(self):
+        cache = AssetCache()
+        self.assertEqual(cache.get_or_load('a', lambda: 1), (1, False))
+        self.assertEqual(cache.get_or_load('a', lambda: 2), (1, True))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_assets_are_evicted(self):
+        cache = AssetCache(max_size=1000)
+        cache.put('a', pygame.Surface((10, 10), pygame.SRCALPHA))
+        cache.put('b', pygame.Surface((10, 10), pygame.SRCALPHA))
+        cache.get('a')
+        cache.put('c', pygame.Surface((10, 10), pygame.SRCALPHA))
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(cache.size, 800)
+
+    def test_reducing_max_size_evicts(self):
+        cache = AssetCache()
+        cache.put('a', pygame.Surface((10, 10), pygame.SRCALPHA))
+        cache.put('b', pygame.Surface((10, 10), pygame.SRCALPHA))
+        cache.max_size = 400
+        self.assertEqual(list(cache._assets), ['b'])
+        cache.evict()
+        self.assertEqual((len(cache), cache.size), (0, 0))
+
+    def test_clear(self):
+        cache = AssetCache()
+        cache.put('a', 1)
+        self.assertIn('a', cache)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class TestAssetSize(unittest.TestCase):
+    """Unit tests for asset size estimates."""
+
+    def test_surface_size(self):
+        surface = pygame.Surface((10, 10), pygame.SRCALPHA)
+        self.assertEqual(asset_size(surface), 400)
+        self.assertEqual(asset_size((surface, surface)), 800)
+
+    def test_mask_size(self):
+        self.assertEqual(asset_size([pygame.mask.Mask((10, 8))]), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Tests for RLE colorkey surfaces."""
+
+import io
+import unittest
+from unittest import mock
+
+import pygame
+
+from pygame_assets import colorkeys, load, pipelines
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+
+from .utils import TestCase
+
+
+def make_sprite(soft=False, color=(10, 20, 30)):
+    """Return a sprite whose left half is transparent."""
+    sprite = pygame.Surface((8, 4), pygame.SRCALPHA)
+    sprite.fill(color + (255,), (4, 0, 4, 4))
+    if soft:
+        sprite.set_at((3, 0), color + (128,))
+    return sprite
+
+
+def png_bytes(surface):
+    image_file = io.BytesIO()
+    pygame.image.save(surface, image_file, 'sprite.png')
+    return image_file.getvalue()
+
+
+class TestColorkeys(TestCase):
+    """Unit tests for converting surfaces to RLE colorkey surfaces."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def test_binary_alpha(self):
+        self.assertTrue(colorkeys.has_binary_alpha(make_sprite()))
+        self.assertFalse(colorkeys.has_binary_alpha(make_sprite(soft=True)))
+
+    def test_binary_alpha_without_numpy(self):
+        with mock.patch.object(colorkeys, 'numpy', None):
+            self.assertTrue(colorkeys.has_binary_alpha(make_sprite()))
+            self.assertFalse(
+                colorkeys.has_binary_alpha(make_sprite(soft=True)))
+
+    def test_to_colorkey(self):
+        keyed = colorkeys.to_colorkey(make_sprite())
+        self.assertFalse(keyed.get_flags() & pygame.SRCALPHA)
+        self.assertTrue(keyed.get_flags() & pygame.RLEACCELOK)
+        self.assertEqual(tuple(keyed.get_colorkey())[:3], (255, 0, 255))
+        target = pygame.Surface((8, 4))
+        target.fill((1, 1, 1))
+        target.blit(keyed, (0, 0))
+        self.assertEqual(tuple(target.get_at((0, 0)))[:3], (1, 1, 1))
+        self.assertEqual(tuple(target.get_at((7, 3)))[:3], (10, 20, 30))
+
+    def test_colorkey_is_not_an_opaque_color(self):
+        keyed = colorkeys.to_colorkey(make_sprite(color=(255, 0, 255)))
+        self.assertEqual(tuple(keyed.get_colorkey())[:3], (0, 255, 255))
+
+    def test_surfaces_left_with_alpha(self):
+        self.assertIsNone(colorkeys.to_colorkey(make_sprite(soft=True)))
+        self.assertIsNone(colorkeys.to_colorkey(pygame.Surface((4, 4))))
+
+
+class TestImageRle(TestCase):
+    """Test loading images with rle=True."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        pipelines.cache.clear()
+        self.backend = MemoryBackend({
+            'image/hard.png': png_bytes(make_sprite()),
+            'image/soft.png': png_bytes(make_sprite(soft=True)),
+        })
+        get_config().mount(self.backend)
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def test_load_rle(self):
+        keyed = load.image('hard.png', rle=True)
+        self.assertIsNotNone(keyed.get_colorkey())
+        self.assertIs(load.image('hard.png', rle=True), keyed)
+        self.assertTrue(load.image('hard.png').get_flags() & pygame.SRCALPHA)
+        self.assertTrue(
+            load.image('soft.png', rle=True).get_flags() & pygame.SRCALPHA)
+
+    def test_report(self):
+        rows = colorkeys.report(['hard.png', 'soft.png'], number=2)
+        self.assertEqual([(row.filename, row.changed) for row in rows],
+                         [('hard.png', True), ('soft.png', False)])
+        self.assertGreater(rows[0].speedup, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
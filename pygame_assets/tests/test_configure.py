@@ -1,7 +1,9 @@
 """Tests for the config API."""
 
+import threading
 import unittest
 
+from pygame_assets import configure
 from pygame_assets.exceptions import NoSuchConfigurationParameterError
 from pygame_assets.configure import Config, ConfigMeta
 from pygame_assets.configure import get_config, config_exists, remove_config
@@ -176,6 +178,18 @@ class TestConfigDirs(unittest.TestCase):
             actual = config.search_dirs('spritesheet')
             self.assertListEqual(expected, actual)
 
+    def test_remove_search_dirs_takes_the_lock(self):
+        with change_config('dirs') as config:
+            config.add_search_dirs('spritesheet', 'sheets')
+            with configure._lock:
+                remover = threading.Thread(
+                    target=config.remove_search_dirs, args=('spritesheet',))
+                remover.start()
+                remover.join(0.05)
+                self.assertIn('spritesheet', config.dirs)
+            remover.join()
+            self.assertNotIn('spritesheet', config.dirs)
+
 
 class TestConfigure(unittest.TestCase):
     """Unit tests for the Config API."""
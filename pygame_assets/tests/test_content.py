@@ -0,0 +1,214 @@
+"""Tests for content-addressed deduplication."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pygame
+
+from pygame_assets import core, load, content
+from pygame_assets.backends import LocalBackend, MemoryBackend
+from pygame_assets.configure import get_config
+from pygame_assets.content import ContentIndex, Deduplicator
+
+from .utils import TestCase, change_config
+
+
+class TestContentIndex(unittest.TestCase):
+    """Unit tests for the content index."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ('a.txt', 'b.txt'):
+            with open(os.path.join(self.directory, name), 'w') as f:
+                f.write('same content')
+        with open(os.path.join(self.directory, 'c.txt'), 'w') as f:
+            f.write('other content')
+        self.backend = LocalBackend(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_identical_files_have_same_digest(self):
+        index = ContentIndex()
+        self.assertEqual(index.digest(self.backend, 'a.txt'),
+                         index.digest(self.backend, 'b.txt'))
+        self.assertNotEqual(index.digest(self.backend, 'a.txt'),
+                            index.digest(self.backend, 'c.txt'))
+
+    def test_save_and_load(self):
+        index = ContentIndex()
+        digest = index.digest(self.backend, 'a.txt')
+        index_path = os.path.join(self.directory, 'index.json')
+        index.save(index_path)
+
+        loaded = ContentIndex()
+        loaded.load(index_path)
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(loaded.digest(self.backend, 'a.txt'), digest)
+
+    def test_changed_file_is_hashed_again(self):
+        index = ContentIndex()
+        digest = index.digest(self.backend, 'a.txt')
+        with open(os.path.join(self.directory, 'a.txt'), 'w') as f:
+            f.write('changed content')
+        self.assertNotEqual(index.digest(self.backend, 'a.txt'), digest)
+
+
+class TestDeduplicator(unittest.TestCase):
+    """Unit tests for the deduplicator."""
+
+    def setUp(self):
+        self.backend = MemoryBackend({
+            'a.txt': b'same', 'b.txt': b'same', 'c.txt': b'other',
+        })
+        self.deduplicator = Deduplicator(ContentIndex())
+        self.loaded = []
+
+    def get_text(self, source):
+        self.loaded.append(source.name)
+        return source.read().decode()
+
+    def test_identical_files_share_asset(self):
+        asset = self.deduplicator.load(self.get_text, self.backend, 'a.txt')
+        shared = self.deduplicator.load(self.get_text, self.backend, 'b.txt')
+        self.assertIs(asset, shared)
+        self.assertEqual(self.loaded, ['a.txt'])
+
+    def test_different_arguments_are_not_shared(self):
+        def get_text(source, upper=False):
+            text = source.read().decode()
+            return text.upper() if upper else text
+
+        self.deduplicator.load(get_text, self.backend, 'a.txt')
+        asset = self.deduplicator.load(get_text, self.backend, 'b.txt',
+                                       upper=True)
+        self.assertEqual(asset, 'SAME')
+
+    def test_stats(self):
+        for path in ('a.txt', 'b.txt', 'b.txt', 'c.txt'):
+            self.deduplicator.load(self.get_text, self.backend, path)
+        stats = self.deduplicator.stats()
+        self.assertEqual(stats['unique'], 2)
+        self.assertEqual(stats['files'], 3)
+        # loading b.txt again is not deduplication.
+        self.assertEqual(stats['shared'], 1)
+        self.assertGreater(stats['saved_bytes'], 0)
+
+    def test_cache_is_bounded(self):
+        self.assertIsNotNone(content.deduplicator.cache.max_size)
+        deduplicator = Deduplicator(ContentIndex(), max_size=0)
+        for path in ('a.txt', 'b.txt'):
+            deduplicator.load(self.get_text, self.backend, path)
+        # the asset loaded for a.txt was evicted.
+        self.assertEqual(self.loaded, ['a.txt', 'b.txt'])
+        self.assertEqual(len(deduplicator.cache), 0)
+
+
+class TestLoadDeduplicated(TestCase):
+    """Test deduplication through the load API."""
+
+    def setUp(self):
+        super().setUp()
+        self.backend = MemoryBackend({
+            'text/a.txt': b'same', 'text/b.txt': b'same',
+        })
+        get_config().mount(self.backend)
+
+        @core.loader(name='text', deduplicate=True)
+        def load_text(source):
+            return [source.read().decode()]
+
+        @core.loader(name='text_list', dirs=['text'])
+        def load_text_list(source):
+            return [source.read().decode()]
+
+    def tearDown(self):
+        core.unregister('text')
+        core.unregister('text_list')
+        get_config().unmount(self.backend)
+        content.deduplicator.clear()
+        super().tearDown()
+
+    def test_not_deduplicated_by_default(self):
+        self.assertIsNot(load.text('a.txt'), load.text('b.txt'))
+
+    def test_deduplicate(self):
+        with change_config('deduplicate') as config:
+            config.deduplicate = True
+            self.assertIs(load.text('a.txt'), load.text('b.txt'))
+        self.assertEqual(content.deduplicator.stats()['shared'], 1)
+
+    def test_loaders_opt_in(self):
+        with change_config('deduplicate') as config:
+            config.deduplicate = True
+            self.assertIsNot(load.text_list('a.txt'), load.text_list('b.txt'))
+        self.assertEqual(content.deduplicator.stats()['files'], 0)
+
+
+class TestBuiltinLoadersDeduplicated(TestCase):
+    """Test deduplication of images and sounds."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.mixer.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        assets_dir = os.path.join(os.path.dirname(__file__), 'assets')
+        files = {}
+        for directory, name in (('image', 'test-image.png'),
+                                ('sound', 'test-sound.wav')):
+            with open(os.path.join(assets_dir, directory, name), 'rb') as f:
+                data = f.read()
+            root, ext = os.path.splitext(name)
+            for copy in ('a', 'b'):
+                files['{}/{}-{}{}'.format(directory, root, copy, ext)] = data
+        self.backend = MemoryBackend(files)
+        get_config().mount(self.backend)
+        content.deduplicator.clear()
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        content.deduplicator.clear()
+        super().tearDown()
+
+    def test_images(self):
+        with change_config('deduplicate') as config:
+            config.deduplicate = True
+            self.assertIs(load.image('test-image-a.png'),
+                          load.image('test-image-b.png'))
+        self.assertEqual(content.deduplicator.stats()['shared'], 1)
+
+    def test_sounds(self):
+        with change_config('deduplicate') as config:
+            config.deduplicate = True
+            sound = load.sound('test-sound-a.wav')
+            self.assertIs(load.sound('test-sound-b.wav'), sound)
+            self.assertIsNot(load.sound('test-sound-b.wav', volume=0.5),
+                             sound)
+        stats = content.deduplicator.stats()
+        self.assertEqual(stats['shared'], 1)
+        self.assertGreater(stats['saved_bytes'], 0)
+
+    def test_music_is_not_deduplicated(self):
+        with change_config('deduplicate') as config:
+            config.deduplicate = True
+            with mock.patch('pygame.mixer.music.load') as music_load:
+                for copy in ('a', 'b', 'a'):
+                    load.music('test-sound-{}.wav'.format(copy))
+        self.assertEqual(music_load.call_count, 3)
+
+    def test_streams_are_not_deduplicated(self):
+        with change_config('deduplicate') as config:
+            config.deduplicate = True
+            self.assertIsNot(load.stream('test-sound-a.wav'),
+                             load.stream('test-sound-a.wav'))
+
+
+if __name__ == '__main__':
+    unittest.main()
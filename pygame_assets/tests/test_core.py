@@ -1,13 +1,16 @@
 """Tests for the core module."""
 
 import os
+import shutil
+import tempfile
 import unittest
 
 from pygame_assets import core, load
+from pygame_assets.backends import LocalBackend
 from pygame_assets.exceptions import AssetNotFoundError
 from pygame_assets.configure import get_config
 
-from .utils import TestCase, define_test_text_loader
+from .utils import TestCase, change_config, define_test_text_loader
 
 
 class TestImports(unittest.TestCase):
@@ -179,5 +182,60 @@ class TestRegisterApi(unittest.TestCase):
         self.assertEqual(text, 'LOADING FOO.TXT...')
 
 
+class TestBulkLoading(TestCase):
+    """Unit tests for the glob and all loader methods."""
+
+    def setUp(self):
+        super().setUp()
+        self.text_loader = define_test_text_loader()
+        self.text_loader.__enter__()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        os.makedirs(os.path.join(directory, 'text', 'levels'))
+        for path, text in [('version_control.txt', 'shadowed'),
+                           ('memory.txt', 'from memory'),
+                           ('other.dat', 'not text'),
+                           ('levels/2.txt', 'level 2'),
+                           ('levels/1.txt', 'level 1')]:
+            with open(os.path.join(directory, 'text', path), 'w') as file:
+                file.write(text)
+        self.backend = LocalBackend(directory)
+        get_config().mount(self.backend)
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        self.text_loader.__exit__(None, None, None)
+        super().tearDown()
+
+    def test_glob(self):
+        texts = load.text.glob('*.txt')
+        self.assertEqual(list(texts), sorted(texts))
+        self.assertNotIn('other.dat', texts)
+        self.assertEqual(texts['memory.txt'], 'from memory')
+        # files of the first mounted backend shadow the others.
+        self.assertTrue(texts['version_control.txt'].startswith('Ensures'))
+
+    def test_glob_in_subdirectory(self):
+        texts = load.text.glob('levels/*.txt', max_workers=1)
+        self.assertEqual(texts, {'levels/1.txt': 'level 1',
+                                 'levels/2.txt': 'level 2'})
+
+    def test_all(self):
+        self.assertEqual(list(load.text.all('levels')),
+                         ['levels/1.txt', 'levels/2.txt'])
+        self.assertIn('other.dat', load.text.all())
+
+    def test_no_match(self):
+        self.assertEqual(load.text.glob('*.png'), {})
+
+    def test_loader_arguments_are_passed(self):
+        with change_config('dirs'):
+            core.register('upper', lambda filename, suffix: filename + suffix)
+            get_config().add_search_dirs('upper', 'text')
+            self.assertEqual(load.upper.glob('levels/1*', '!'),
+                             {'levels/1.txt': 'levels/1.txt!'})
+            core.unregister('upper')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,41 @@
+"""Tests for file writing helpers."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pygame_assets.files import atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+    """Unit tests for atomic_write()."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.filepath = os.path.join(self.directory, 'cache', 'data.bin')
+
+    def test_write(self):
+        with atomic_write(self.filepath) as data_file:
+            data_file.write(b'first')
+        with atomic_write(self.filepath, 'w') as data_file:
+            data_file.write('second')
+            # the file is only replaced once written.
+            with open(self.filepath) as old_file:
+                self.assertEqual(old_file.read(), 'first')
+        with open(self.filepath) as data_file:
+            self.assertEqual(data_file.read(), 'second')
+        self.assertEqual(os.listdir(os.path.dirname(self.filepath)),
+                         ['data.bin'])
+
+    def test_failed_write_is_removed(self):
+        with self.assertRaises(ValueError):
+            with atomic_write(self.filepath) as data_file:
+                data_file.write(b'partial')
+                raise ValueError('failed')
+        self.assertEqual(os.listdir(os.path.dirname(self.filepath)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
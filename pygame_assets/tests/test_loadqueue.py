@@ -0,0 +1,111 @@
+"""Tests for the priority load queue."""
+
+import threading
+import unittest
+
+from pygame_assets import core
+from pygame_assets.loadqueue import LoadQueue
+
+
+class TestLoadQueue(unittest.TestCase):
+    """Unit tests for the priority load queue."""
+
+    def setUp(self):
+        self.loaded = []
+        self.started = threading.Event()
+        self.unblock = threading.Event()
+
+        def load_text(filename):
+            if filename == 'block':
+                self.started.set()
+                self.unblock.wait()
+            self.loaded.append(filename)
+            return filename.upper()
+
+        core.register('text', load_text)
+        self.queue = LoadQueue(workers=1)
+        # keep the single worker busy while requests are queued.
+        self.blocker = self.queue.request('text', 'block', priority=100)
+        self.started.wait(timeout=5)
+
+    def tearDown(self):
+        self.unblock.set()
+        self.queue.close()
+        core.unregister('text', in_config=False)
+
+    def wait(self, *tickets):
+        self.unblock.set()
+        for ticket in tickets:
+            ticket.exception(timeout=5)
+
+    def test_load_result(self):
+        ticket = self.queue.request('text', 'a')
+        self.wait(ticket)
+        self.assertEqual(ticket.result(), 'A')
+
+    def test_highest_priority_first(self):
+        low = self.queue.request('text', 'low', priority=1)
+        high = self.queue.request('text', 'high', priority=5)
+        middle = self.queue.request('text', 'middle', priority=3)
+        self.wait(low, high, middle)
+        self.assertEqual(self.loaded, ['block', 'high', 'middle', 'low'])
+
+    def test_update_priority(self):
+        first = self.queue.request('text', 'first', priority=2)
+        second = self.queue.request('text', 'second', priority=1)
+        self.queue.update_priority(second, 3)
+        self.wait(first, second)
+        self.assertEqual(self.loaded, ['block', 'second', 'first'])
+
+    def test_reprioritize(self):
+        tickets = [self.queue.request('text', name)
+                   for name in ('far', 'near')]
+        distances = {'far': 100, 'near': 1}
+        self.queue.reprioritize(lambda ticket: -distances[ticket.filename])
+        self.wait(*tickets)
+        self.assertEqual(self.loaded, ['block', 'near', 'far'])
+
+    def test_duplicate_requests_are_merged(self):
+        ticket = self.queue.request('text', 'a', priority=1)
+        duplicate = self.queue.request('text', 'a', priority=2)
+        self.assertIs(ticket, duplicate)
+        self.assertEqual(ticket.priority, 2)
+        self.assertEqual(self.queue.pending, 1)
+        self.wait(ticket)
+        self.assertEqual(self.loaded, ['block', 'a'])
+
+    def test_cancel(self):
+        cancelled = self.queue.request('text', 'cancelled')
+        kept = self.queue.request('text', 'kept')
+        self.assertTrue(self.queue.cancel(cancelled))
+        self.assertTrue(cancelled.cancelled())
+        self.wait(kept)
+        self.assertEqual(self.loaded, ['block', 'kept'])
+        # done requests cannot be cancelled.
+        self.assertFalse(self.queue.cancel(kept))
+
+    def test_merged_requests_are_cancelled_by_all_requesters(self):
+        ticket = self.queue.request('text', 'a')
+        self.queue.request('text', 'a')
+        self.assertFalse(self.queue.cancel(ticket))
+        self.assertFalse(ticket.cancelled())
+        self.assertTrue(self.queue.cancel(ticket))
+        self.assertTrue(ticket.cancelled())
+
+    def test_loader_errors_are_set_on_ticket(self):
+        ticket = self.queue.request('text', 42)
+        self.wait(ticket)
+        with self.assertRaises(AttributeError):
+            ticket.result()
+
+    def test_close_cancel_pending(self):
+        ticket = self.queue.request('text', 'a')
+        self.unblock.set()
+        self.queue.close(cancel_pending=True)
+        self.assertTrue(ticket.cancelled() or ticket.done())
+        with self.assertRaises(RuntimeError):
+            self.queue.request('text', 'b')
+
+
+if __name__ == '__main__':
+    unittest.main()
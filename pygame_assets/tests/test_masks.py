@@ -0,0 +1,123 @@
+"""Tests for collision masks."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pygame
+
+from pygame_assets import load, masks
+from pygame_assets.configure import get_config
+
+from .utils import TestCase, change_config
+
+
+class TestMasksFile(unittest.TestCase):
+    """Unit tests for mask persistence."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_and_read(self):
+        mask = pygame.mask.Mask((5, 3))
+        mask.set_at((1, 2))
+        mask.set_at((4, 0))
+        filepath = os.path.join(self.directory, 'test.mask')
+        masks.write(filepath, [mask, pygame.mask.Mask((2, 2), fill=True)])
+        first, second = masks.read(filepath)
+        self.assertEqual(first.get_size(), (5, 3))
+        self.assertEqual(first.count(), 2)
+        self.assertEqual(first.get_at((1, 2)), 1)
+        self.assertEqual(first.overlap_area(mask, (0, 0)), 2)
+        self.assertEqual(second.count(), 4)
+
+    def test_wide_masks(self):
+        mask = pygame.mask.Mask((150, 4))
+        for position in ((0, 0), (63, 1), (64, 1), (149, 3)):
+            mask.set_at(position)
+        filepath = os.path.join(self.directory, 'test.mask')
+        masks.write(filepath, [mask])
+        read, = masks.read(filepath)
+        self.assertEqual(read.overlap_area(mask, (0, 0)), 4)
+        self.assertEqual(read.count(), 4)
+
+    def test_masks_are_stored_as_bits(self):
+        filepath = os.path.join(self.directory, 'test.mask')
+        mask = pygame.mask.Mask((256, 256), fill=True)
+        mask.set_at((3, 5), 0)
+        masks.write(filepath, [mask])
+        self.assertLess(os.path.getsize(filepath), 256 * 256 // 8)
+
+    def test_read_file_of_other_machine(self):
+        filepath = os.path.join(self.directory, 'test.mask')
+        masks.write(filepath, [pygame.mask.Mask((5, 3))])
+        with open(filepath, 'r+b') as mask_file:
+            mask_file.seek(8)
+            mask_file.write(bytes([3]))
+        with self.assertRaises(ValueError):
+            masks.read(filepath)
+
+    def test_read_invalid_file(self):
+        filepath = os.path.join(self.directory, 'test.mask')
+        with open(filepath, 'wb') as mask_file:
+            mask_file.write(b'not a mask file')
+        with self.assertRaises(ValueError):
+            masks.read(filepath)
+
+    def test_from_surface_frames(self):
+        surface = pygame.Surface((30, 20), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 255), (10, 0, 10, 10))
+        frames = masks.from_surface(surface, frame_size=(10, 10))
+        self.assertEqual(len(frames), 6)
+        self.assertEqual([frame.count() for frame in frames],
+                         [0, 100, 0, 0, 0, 0])
+
+
+class TestMaskLoader(TestCase):
+    """Unit tests for the mask loader."""
+
+    filename = 'test-image-with-alpha.png'
+
+    def tearDown(self):
+        masks.cache.clear()
+        super().tearDown()
+
+    def test_dir_is_image(self):
+        self.assertListEqual(get_config().dirs['mask'], ['image'])
+
+    def test_load_mask(self):
+        mask = load.mask(self.filename)
+        self.assertIsInstance(mask, pygame.mask.Mask)
+        self.assertEqual(mask.get_size(), (300, 300))
+        self.assertIs(load.mask(self.filename), mask)
+
+    def test_threshold(self):
+        self.assertGreaterEqual(load.mask(self.filename, threshold=0).count(),
+                                load.mask(self.filename).count())
+
+    def test_load_frame_masks(self):
+        frames = load.mask(self.filename, frame_size=(100, 150))
+        self.assertEqual(len(frames), 6)
+        self.assertEqual(sum(frame.count() for frame in frames),
+                         load.mask(self.filename).count())
+
+    def test_masks_are_persisted(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with change_config('cache_dir') as config:
+                config.cache_dir = directory
+                count = load.mask(self.filename).count()
+                self.assertEqual(
+                    len(os.listdir(os.path.join(directory, 'masks'))), 1)
+                masks.cache.clear()
+                self.assertEqual(load.mask(self.filename).count(), count)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""Tests for loader pipelines."""
+
+import unittest
+from unittest import mock
+
+import pygame
+
+from pygame_assets import core, load, pipelines
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+
+from .utils import TestCase
+
+
+calls = []
+
+
+def decode(source):
+    calls.append('decode')
+    return source.read().decode()
+
+
+def upper(text):
+    calls.append('upper')
+    return text.upper()
+
+
+def repeat(text, *, times=2):
+    calls.append('repeat')
+    return text * times
+
+
+def exclaim(text):
+    calls.append('exclaim')
+    return text + '!'
+
+
+class TestPipelineLoader(TestCase):
+    """Unit tests for loaders declared with stages."""
+
+    def setUp(self):
+        super().setUp()
+        pipelines.cache.clear()
+        del calls[:]
+        self.backend = MemoryBackend({'text/a.txt': b'a', 'text/b.txt': b'b',
+                                      'text/c.txt': b'a'})
+        get_config().mount(self.backend)
+        core.loader(name='text', stages=[('upper', upper),
+                                         ('repeat', repeat)])(decode)
+
+    def tearDown(self):
+        core.unregister('text')
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def test_stages_run_in_order(self):
+        self.assertEqual(load.text('a.txt'), 'AA')
+        self.assertEqual(load.text('a.txt', times=3), 'AAA')
+        self.assertEqual(load.text.pipeline.names,
+                         ['decode', 'upper', 'repeat'])
+
+    def test_last_stage_output_is_cached(self):
+        load.text('a.txt')
+        load.text('a.txt')
+        self.assertEqual(calls, ['decode', 'upper', 'repeat'])
+        # intermediate outputs are not kept.
+        self.assertEqual(len(pipelines.cache), 1)
+        load.text('a.txt', times=3)
+        self.assertEqual(calls.count('decode'), 2)
+
+    def test_run_without_memoizing(self):
+        backend, path = core.find_asset(
+            'a.txt', get_config().search_paths('text', 'a.txt'))
+        load.text.pipeline.run(backend, path, memoize=False)
+        self.assertEqual(len(pipelines.cache), 0)
+        # cached outputs are still reused.
+        load.text('a.txt')
+        load.text.pipeline.run(backend, path, memoize=False)
+        self.assertEqual(calls.count('decode'), 2)
+
+    def test_cache_is_bounded(self):
+        self.addCleanup(setattr, pipelines.cache, 'max_size',
+                        pipelines.cache.max_size)
+        load.text('a.txt')
+        pipelines.cache.max_size = pipelines.cache.size
+        load.text('b.txt')
+        self.assertEqual(len(pipelines.cache), 1)
+        load.text('b.txt')
+        load.text('a.txt')
+        self.assertEqual(calls.count('decode'), 3)
+
+    def test_files_with_same_content_share_outputs(self):
+        load.text('a.txt')
+        load.text('c.txt')
+        self.assertEqual(calls.count('decode'), 1)
+        load.text('b.txt')
+        self.assertEqual(calls.count('decode'), 2)
+
+    def test_derived_loader_reuses_cached_stages(self):
+        core.register('loud_text', load.text, returned=exclaim)
+        try:
+            load.text('a.txt')
+            self.assertEqual(load.loud_text('a.txt'), 'AA!')
+            self.assertEqual(load.loud_text('a.txt'), 'AA!')
+        finally:
+            core.unregister('loud_text', in_config=False)
+        self.assertEqual(calls, ['decode', 'upper', 'repeat', 'exclaim'])
+
+    def test_run_until_stage(self):
+        backend, path = core.find_asset(
+            'a.txt', get_config().search_paths('text', 'a.txt'))
+        self.assertEqual(
+            load.text.pipeline.run(backend, path, until='upper'), 'A')
+
+    def test_unexpected_keyword_argument(self):
+        with self.assertRaises(TypeError):
+            load.text('a.txt', volume=1)
+
+
+class TestImagePipeline(TestCase):
+    """Test that image loaders share decoded images."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        pipelines.cache.clear()
+
+    def test_image_with_rect_reuses_decoded_image(self):
+        with mock.patch('pygame.image.load', wraps=pygame.image.load) \
+                as image_load:
+            image = load.image('test-image.png')
+            same_image, rect = load.image_with_rect('test-image.png')
+        self.assertEqual(image_load.call_count, 1)
+        self.assertIs(same_image, image)
+        self.assertEqual(rect, image.get_rect())
+
+    def test_decoded_images_are_not_kept(self):
+        with_alpha = load.image('test-image.png', convert_alpha=True)
+        without_alpha = load.image('test-image.png', convert_alpha=False)
+        self.assertTrue(with_alpha.get_flags() & pygame.SRCALPHA)
+        self.assertFalse(without_alpha.get_flags() & pygame.SRCALPHA)
+        self.assertEqual(len(pipelines.cache), 2)
+
+    def test_scaled_images_do_not_keep_their_variant(self):
+        image = load.image('test-image.png', scale=0.5)
+        self.assertEqual(len(pipelines.cache), 0)
+        self.assertIs(load.image('test-image.png', scale=0.5), image)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+"""Tests for music playlists."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pygame
+
+from pygame_assets import load, playlists
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+from pygame_assets.exceptions import AssetNotFoundError
+
+from .utils import TestCase
+
+
+class TestPlaylist(TestCase):
+    """Unit tests for the playlist loader."""
+
+    filename = 'test-sound.wav'
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.mixer.init()
+
+    def setUp(self):
+        super().setUp()
+        with open('tests/assets/sound/' + self.filename, 'rb') as wav:
+            self.backend = MemoryBackend({'sound/memory.wav': wav.read()})
+        get_config().mount(self.backend)
+        self.ended = []
+
+    def tearDown(self):
+        pygame.mixer.music.stop()
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def open(self, filenames=None, **kwargs):
+        if filenames is None:
+            filenames = [self.filename, 'memory.wav']
+        return load.playlist(filenames, on_track_end=self.ended.append,
+                             **kwargs)
+
+    def end_track(self, playlist):
+        return playlist.handle_event(pygame.event.Event(playlist.end_event))
+
+    def wait_queued(self, playlist):
+        # the next track is queued by update() once prepared.
+        deadline = time.monotonic() + 5
+        while playlist._queued is None and time.monotonic() < deadline:
+            time.sleep(0.001)
+            playlist.update()
+        self.assertIsNotNone(playlist._queued)
+
+    def test_dir_is_sound(self):
+        self.assertListEqual(get_config().dirs['playlist'], ['sound'])
+
+    def test_tracks_are_found_before_playing(self):
+        with self.assertRaises(AssetNotFoundError):
+            self.open([self.filename, 'does-not-exist.wav'])
+
+    def test_play_queues_next_track(self):
+        playlist = self.open(volume=0.5)
+        with mock.patch('pygame.mixer.music.queue') as queue:
+            playlist.play()
+            self.wait_queued(playlist)
+        self.assertTrue(pygame.mixer.music.get_busy())
+        self.assertEqual(pygame.mixer.music.get_endevent(),
+                         playlist.end_event)
+        self.assertAlmostEqual(pygame.mixer.music.get_volume(), 0.5,
+                               places=1)
+        source, namehint = queue.call_args[0]
+        self.assertEqual(source.read(), self.backend.files['sound/memory.wav'])
+        self.assertEqual(namehint, 'sound/memory.wav')
+
+    def test_next_track_is_queued_from_main_thread(self):
+        fetched = threading.Event()
+        source = self.backend.source
+
+        def slow_source(path):
+            fetched.wait(5)
+            return source(path)
+
+        self.backend.source = slow_source
+        playlist = self.open()
+        threads = []
+        with mock.patch('pygame.mixer.music.queue') as queue:
+            queue.side_effect = lambda *args: threads.append(
+                threading.current_thread())
+            playlist.play()
+            fetched.set()
+            playlist.prepare(1).result()
+            # prepared, but only queued by update().
+            self.assertFalse(queue.called)
+            playlist.update()
+        self.assertEqual(threads, [threading.main_thread()])
+        self.assertEqual(playlist._queued, 1)
+
+    def test_end_events_move_to_next_track(self):
+        playlist = self.open()
+        playlist.play()
+        self.wait_queued(playlist)
+        self.assertEqual(playlist.current, self.filename)
+        self.assertTrue(self.end_track(playlist))
+        self.assertEqual(playlist.current, 'memory.wav')
+        self.assertTrue(self.end_track(playlist))
+        self.assertFalse(playlist.playing)
+        self.assertEqual(self.ended, [self.filename, 'memory.wav'])
+
+    def test_looping_playlist_starts_over(self):
+        playlist = self.open(loop=True)
+        playlist.play()
+        self.wait_queued(playlist)
+        with mock.patch('pygame.mixer.music.queue') as queue:
+            self.end_track(playlist)
+            self.wait_queued(playlist)
+            self.end_track(playlist)
+            self.wait_queued(playlist)
+        self.assertTrue(playlist.playing)
+        self.assertEqual(playlist.current, self.filename)
+        self.assertEqual(queue.call_count, 2)
+
+    def test_other_events_are_ignored(self):
+        playlist = self.open()
+        playlist.play()
+        self.assertFalse(playlist.handle_event(
+            pygame.event.Event(pygame.USEREVENT)))
+        self.assertEqual(playlist.current, self.filename)
+        self.assertEqual(self.ended, [])
+
+    def test_next_track_is_prepared_ahead(self):
+        playlist = self.open([self.filename] * 3)
+        playlist.play()
+        self.wait_queued(playlist)
+        # the second track is queued, the third one is being prepared.
+        self.assertEqual(list(playlist._prepared), [2])
+        self.assertTrue(os.path.isfile(playlist.prepare(2).result()))
+
+    def test_play_does_not_wait_for_next_track(self):
+        fetched = threading.Event()
+        source = self.backend.source
+
+        def slow_source(path):
+            fetched.wait(5)
+            return source(path)
+
+        self.backend.source = slow_source
+        playlist = self.open(['test-sound.wav', 'memory.wav'])
+        with mock.patch('pygame.mixer.music.queue') as queue:
+            playlist.play()
+            self.assertTrue(playlist.playing)
+            self.assertFalse(queue.called)
+            fetched.set()
+            self.wait_queued(playlist)
+        self.assertTrue(queue.called)
+
+    def test_track_not_prepared_in_time_is_played(self):
+        playlist = self.open()
+        with mock.patch('pygame.mixer.music.queue'):
+            playlist.play()
+            self.wait_queued(playlist)
+        playlist._queued = None
+        self.end_track(playlist)
+        self.assertEqual(playlist.current, 'memory.wav')
+        self.assertTrue(pygame.mixer.music.get_busy())
+
+
+class TestReadAhead(unittest.TestCase):
+    """Unit tests for warming the page cache."""
+
+    def setUp(self):
+        fd, self.filepath = tempfile.mkstemp()
+        os.write(fd, b'track')
+        os.close(fd)
+        self.addCleanup(os.remove, self.filepath)
+
+    @unittest.skipUnless(hasattr(os, 'posix_fadvise'), 'no posix_fadvise')
+    def test_uses_posix_fadvise(self):
+        with mock.patch('os.posix_fadvise') as fadvise:
+            playlists.read_ahead(self.filepath)
+        self.assertEqual(fadvise.call_args[0][1:],
+                         (0, 0, os.POSIX_FADV_WILLNEED))
+
+    def test_falls_back_to_reading(self):
+        with mock.patch('builtins.open', mock.mock_open(read_data=b'track')) \
+                as mock_file, \
+                mock.patch.object(playlists.os, 'posix_fadvise',
+                                  side_effect=OSError, create=True):
+            playlists.read_ahead(self.filepath)
+        self.assertTrue(mock_file().read.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
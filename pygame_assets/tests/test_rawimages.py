@@ -0,0 +1,170 @@
+"""Tests for memory-mapped raw surface files."""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pygame
+
+from pygame_assets import load, rawimages
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+
+from .utils import TestCase
+
+
+def make_surface():
+    surface = pygame.Surface((5, 3), pygame.SRCALPHA)
+    surface.fill((10, 20, 30, 40))
+    surface.set_at((4, 2), (200, 100, 50, 255))
+    return surface
+
+
+class TestRawSurfaceFile(unittest.TestCase):
+    """Unit tests for writing and mapping raw surface files."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.filepath = os.path.join(self.directory, 'test.pgraw')
+
+    def test_write_and_load(self):
+        for pixel_format in rawimages.FORMATS:
+            rawimages.write(self.filepath, make_surface(), pixel_format)
+            surface = rawimages.load(self.filepath)
+            self.assertEqual(surface.get_size(), (5, 3))
+            self.assertEqual(surface.get_at((4, 2))[:3], (200, 100, 50))
+
+    def test_alpha_is_kept(self):
+        rawimages.write(self.filepath, make_surface(), 'RGBA')
+        surface = rawimages.load(self.filepath)
+        self.assertEqual(tuple(surface.get_at((0, 0))), (10, 20, 30, 40))
+
+    def test_surface_shares_mapped_pages(self):
+        rawimages.write(self.filepath, make_surface(), 'RGBA')
+        surface = rawimages.load(self.filepath)
+        buffer = surface.get_buffer().raw
+        self.assertEqual(buffer[:4], bytes((10, 20, 30, 40)))
+        with open(self.filepath, 'rb') as raw_file:
+            data = raw_file.read()
+        # drawing on the surface does not write to the file.
+        surface.fill((0, 0, 0, 0))
+        with open(self.filepath, 'rb') as raw_file:
+            self.assertEqual(raw_file.read(), data)
+
+    def test_load_from_stream(self):
+        rawimages.write(self.filepath, make_surface(), 'BGRA')
+        with open(self.filepath, 'rb') as raw_file:
+            stream = io.BytesIO(raw_file.read())
+        surface = rawimages.load(stream)
+        self.assertEqual(surface.get_at((4, 2))[:3], (200, 100, 50))
+
+    def test_invalid_file(self):
+        with open(self.filepath, 'wb') as raw_file:
+            raw_file.write(b'not a raw surface file' * 4)
+        with self.assertRaises(ValueError):
+            rawimages.load(self.filepath)
+
+    def test_truncated_file(self):
+        rawimages.write(self.filepath, make_surface(), 'RGBA')
+        with open(self.filepath, 'r+b') as raw_file:
+            raw_file.truncate(80)
+        with self.assertRaises(ValueError):
+            rawimages.load(self.filepath)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            rawimages.write(self.filepath, make_surface(), 'XRGB')
+
+    def test_opaque_surfaces_have_no_alpha(self):
+        opaque = pygame.Surface((5, 3))
+        opaque.fill((200, 100, 50))
+        for pixel_format in ('BGRX', 'BGRA', 'ARGB', 'RGB'):
+            rawimages.write(self.filepath, opaque, pixel_format)
+            surface = rawimages.load(self.filepath)
+            self.assertFalse(surface.get_flags() & pygame.SRCALPHA)
+            self.assertEqual(surface.get_at((0, 0))[:3], (200, 100, 50))
+
+    def test_old_version(self):
+        rawimages.write(self.filepath, make_surface(), 'RGBA')
+        with open(self.filepath, 'r+b') as raw_file:
+            raw_file.seek(4)
+            raw_file.write(b'\1\0')
+        with self.assertRaises(ValueError):
+            rawimages.load(self.filepath)
+
+    def test_is_raw(self):
+        self.assertTrue(rawimages.is_raw('image/background.PGRAW'))
+        self.assertFalse(rawimages.is_raw('image/background.png'))
+        stream = io.BytesIO()
+        stream.name = 'image/background.pgraw'
+        self.assertTrue(rawimages.is_raw(stream))
+
+    def test_native_format_of_surfaces(self):
+        surface = pygame.Surface((1, 1), pygame.SRCALPHA, 32,
+                                 (0xff0000, 0xff00, 0xff, 0xff000000))
+        expected = 'BGRA' if sys.byteorder == 'little' else 'ARGB'
+        self.assertEqual(rawimages.native_format(surface), expected)
+        surface = pygame.Surface((1, 1), 0, 32, (0xff0000, 0xff00, 0xff, 0))
+        expected = 'BGRX' if sys.byteorder == 'little' else 'ARGB'
+        self.assertEqual(rawimages.native_format(surface), expected)
+
+
+class TestLoadRawImage(TestCase):
+    """Unit tests for loading raw surface files with the image loader."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        rawimages.write(os.path.join(self.directory, 'image', 'bg.pgraw'),
+                        make_surface().convert_alpha())
+        opaque = pygame.Surface((5, 3))
+        opaque.fill((10, 20, 30))
+        rawimages.write(
+            os.path.join(self.directory, 'image', 'opaque.pgraw'),
+            opaque.convert())
+        self.backend = MemoryBackend()
+        with open(os.path.join(self.directory, 'image', 'bg.pgraw'),
+                  'rb') as raw_file:
+            self.backend.add('image/packed.pgraw', raw_file.read())
+        get_config().mount(self.backend)
+        self.base = get_config().base
+        get_config().base = self.directory
+
+    def tearDown(self):
+        get_config().base = self.base
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def test_native_raw_image_is_not_converted(self):
+        surface = load.image('bg.pgraw')
+        self.assertTrue(rawimages.matches_display(surface))
+        self.assertEqual(tuple(surface.get_at((0, 0))), (10, 20, 30, 40))
+
+    def test_opaque_raw_image_is_blitted_without_alpha(self):
+        surface = load.image('opaque.pgraw')
+        self.assertFalse(surface.get_flags() & pygame.SRCALPHA)
+        self.assertTrue(rawimages.matches_display(surface))
+        self.assertFalse(rawimages.matches_display(surface, True))
+
+    def test_convert_alpha_is_honoured(self):
+        surface = load.image('bg.pgraw', convert_alpha=False)
+        self.assertFalse(surface.get_flags() & pygame.SRCALPHA)
+
+    def test_load_raw_image_from_backend(self):
+        get_config().base = self.base
+        surface = load.image('packed.pgraw')
+        self.assertEqual(surface.get_at((4, 2))[:3], (200, 100, 50))
+
+
+if __name__ == '__main__':
+    unittest.main()
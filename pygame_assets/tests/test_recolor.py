@@ -0,0 +1,82 @@
+"""Tests for vectorized recoloring."""
+
+import unittest
+
+import pygame
+
+from pygame_assets import load, recolor
+from pygame_assets.recolor import recolor as recolor_surface, recolor_many
+
+from .utils import TestCase
+
+
+GREY = (128, 128, 128)
+RED = (200, 30, 30)
+BLUE = (30, 30, 200)
+
+
+class TestRecolor(unittest.TestCase):
+    """Unit tests for surface recoloring."""
+
+    def setUp(self):
+        self.surface = pygame.Surface((4, 2), pygame.SRCALPHA)
+        self.surface.fill(GREY + (100,))
+        self.surface.set_at((0, 0), (10, 20, 30, 255))
+
+    def test_palette_map(self):
+        result = recolor_surface(self.surface, palette_map={GREY: RED})
+        self.assertEqual(tuple(result.get_at((1, 1))), RED + (100,))
+        self.assertEqual(tuple(result.get_at((0, 0))), (10, 20, 30, 255))
+        # the original surface is left untouched.
+        self.assertEqual(tuple(self.surface.get_at((1, 1))), GREY + (100,))
+
+    def test_palette_map_accepts_colors(self):
+        palette_map = {GREY: pygame.Color(*RED)}
+        result = recolor_surface(self.surface, palette_map=palette_map)
+        self.assertEqual(tuple(result.get_at((1, 1)))[:3], RED)
+
+    def test_tint(self):
+        result = recolor_surface(self.surface, tint=(255, 0, 127))
+        self.assertEqual(tuple(result.get_at((0, 0))), (10, 0, 14, 255))
+
+    def test_recolor_many(self):
+        red, blue = recolor_many(self.surface, [
+            {'palette_map': {GREY: RED}},
+            {'palette_map': {GREY: BLUE}, 'tint': (255, 255, 255)},
+        ])
+        self.assertEqual(tuple(red.get_at((3, 1)))[:3], RED)
+        self.assertEqual(tuple(blue.get_at((3, 1)))[:3], BLUE)
+
+
+class TestRecolorLoaders(TestCase):
+    """Test recoloring through the image loaders."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def tearDown(self):
+        recolor.cache.clear()
+        super().tearDown()
+
+    def test_load_tinted_image(self):
+        image = load.image('test-image.png', tint=(0, 0, 0))
+        self.assertEqual(tuple(image.get_at((0, 0)))[:3], (0, 0, 0))
+        black = pygame.Color(0, 0, 0)
+        self.assertIs(load.image('test-image.png', tint=black), image)
+
+    def test_load_image_variants(self):
+        original = load.image('test-image.png')
+        color = tuple(original.get_at((0, 0)))[:3]
+        black, same = load.image_variants('test-image.png', [
+            {'palette_map': {color: (0, 0, 0)}},
+            {'tint': (255, 255, 255)},
+        ])
+        self.assertEqual(tuple(black.get_at((0, 0)))[:3], (0, 0, 0))
+        self.assertEqual(tuple(same.get_at((0, 0)))[:3], color)
+        self.assertEqual(len(recolor.cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
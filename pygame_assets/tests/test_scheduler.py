@@ -0,0 +1,82 @@
+"""Tests for the frame-budgeted load scheduler."""
+
+import time
+import unittest
+
+from pygame_assets import core
+from pygame_assets.scheduler import LoadScheduler
+
+
+class TestLoadScheduler(unittest.TestCase):
+    """Unit tests for the load scheduler."""
+
+    def setUp(self):
+        self.loaded = []
+
+        def load_text(filename, delay=0):
+            time.sleep(delay)
+            self.loaded.append(filename)
+            return filename.upper()
+
+        core.register('text', load_text)
+        # fixed predictions make steps deterministic.
+        self.scheduler = LoadScheduler(smoothing=0)
+
+    def tearDown(self):
+        core.unregister('text', in_config=False)
+
+    def test_step_runs_loads_fitting_budget(self):
+        self.scheduler.timings['text'] = 3
+        for filename in ('a', 'b', 'c'):
+            self.scheduler.submit('text', filename)
+        self.assertEqual(len(self.scheduler.step(budget_ms=4)), 1)
+        self.assertEqual(len(self.scheduler.step(budget_ms=7)), 2)
+        self.assertEqual(self.loaded, ['a', 'b', 'c'])
+        self.assertTrue(self.scheduler.done)
+
+    def test_request_result(self):
+        request = self.scheduler.submit('text', 'a')
+        with self.assertRaises(RuntimeError):
+            request.result()
+        self.scheduler.step()
+        self.assertEqual(request.result(), 'A')
+
+    def test_loader_errors_are_raised_by_result(self):
+        request = self.scheduler.submit('text', 'a', 'not a delay')
+        self.scheduler.step()
+        with self.assertRaises(TypeError):
+            request.result()
+
+    def test_oversized_load_runs_alone(self):
+        self.scheduler.timings['text'] = 10
+        self.scheduler.submit('text', 'a')
+        self.scheduler.submit('text', 'b')
+        self.assertEqual(len(self.scheduler.step(budget_ms=4)), 1)
+        self.assertEqual(len(self.scheduler.step(budget_ms=4)), 1)
+
+    def test_load_costing_the_whole_budget_runs(self):
+        scheduler = LoadScheduler(default_cost_ms=2, smoothing=0)
+        request = scheduler.submit('text', 'a')
+        scheduler.step(budget_ms=2)
+        self.assertEqual(request.result(), 'A')
+        self.assertEqual(scheduler.progress, 1)
+
+    def test_timings_are_learned(self):
+        scheduler = LoadScheduler(default_cost_ms=0)
+        scheduler.submit('text', 'a', delay=0.01)
+        scheduler.step(budget_ms=1)
+        self.assertGreaterEqual(scheduler.timings['text'], 10)
+
+    def test_progress(self):
+        self.assertEqual(self.scheduler.progress, 1)
+        self.scheduler.timings['text'] = 3
+        for filename in ('a', 'b'):
+            self.scheduler.submit('text', filename)
+        self.assertEqual(self.scheduler.progress, 0)
+        self.scheduler.step(budget_ms=4)
+        self.assertEqual(self.scheduler.progress, 0.5)
+        self.assertEqual(self.scheduler.pending, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""Tests for the streaming of image sequences."""
+
+import io
+import struct
+import time
+import unittest
+import zlib
+
+import pygame
+
+from pygame_assets import load, sequences
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+from pygame_assets.exceptions import AssetNotFoundError
+
+from .utils import TestCase
+
+
+def png(value, size=(4, 4), flags=0):
+    surface = pygame.Surface(size, flags, 32)
+    surface.fill((value, 255 - value, 0, 128 if flags else 255))
+    image_file = io.BytesIO()
+    pygame.image.save(surface, image_file, 'frame.png')
+    return image_file.getvalue()
+
+
+def _png_chunk(kind, data):
+    return (struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data)))
+
+
+def keyed_png():
+    """Return an 8-bit PNG whose left half is keyed by its tRNS chunk."""
+    rows = b''.join(b'\0' + bytes([0, 0, 1, 1]) for _ in range(4))
+    return (b'\x89PNG\r\n\x1a\n'
+            + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', 4, 4, 8, 3, 0, 0, 0))
+            + _png_chunk(b'PLTE', bytes([255, 0, 255, 10, 20, 30]))
+            + _png_chunk(b'tRNS', b'\0')
+            + _png_chunk(b'IDAT', zlib.compress(rows))
+            + _png_chunk(b'IEND', b''))
+
+
+class TestSequenceStream(TestCase):
+    """Unit tests for the sequence loader."""
+
+    length = 20
+
+    def setUp(self):
+        super().setUp()
+        files = {'image/intro/{}.png'.format(number): png(number * 10)
+                 for number in range(self.length)}
+        files['image/fade/0.png'] = png(200, flags=pygame.SRCALPHA)
+        self.backend = MemoryBackend(files)
+        get_config().mount(self.backend)
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def open(self, name='intro', **kwargs):
+        stream = load.sequence(name, **kwargs)
+        self.addCleanup(stream.close)
+        return stream
+
+    def test_dir_is_image(self):
+        self.assertListEqual(get_config().dirs['sequence'], ['image'])
+
+    def test_frames_are_streamed_in_order(self):
+        stream = self.open(buffer_size=4)
+        values = [frame.get_at((0, 0)).r for frame in stream]
+        self.assertEqual(values, [number * 10 for number in range(20)])
+        self.assertTrue(stream.finished)
+        self.assertIsNone(stream.next_frame())
+
+    def test_surfaces_are_reused(self):
+        stream = self.open(buffer_size=3)
+        surfaces = {id(frame) for frame in stream}
+        self.assertEqual(len(surfaces), 3)
+        self.assertEqual(len(stream._slots), 3)
+
+    def test_decodes_ahead_up_to_buffer_size(self):
+        stream = self.open(buffer_size=4)
+        stream.next_frame()
+        deadline = time.monotonic() + 5
+        while stream.buffered < 3 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        time.sleep(0.01)
+        # one surface is held by the frame being shown.
+        self.assertEqual(stream.buffered, 3)
+
+    def test_loop(self):
+        stream = self.open(buffer_size=4, loop=True)
+        for _ in range(self.length + 2):
+            frame = stream.next_frame()
+        self.assertEqual(stream.position, 1)
+        self.assertEqual(frame.get_at((0, 0)).r, 10)
+        self.assertFalse(stream.finished)
+
+    def test_seek(self):
+        stream = self.open(buffer_size=4)
+        stream.next_frame()
+        stream.seek(15)
+        self.assertEqual(stream.next_frame().get_at((0, 0)).r, 150)
+        self.assertEqual(stream.position, 15)
+        self.assertEqual(len(list(stream)), 4)
+
+    def test_alpha_is_copied(self):
+        frame = self.open('fade').next_frame()
+        self.assertEqual(tuple(frame.get_at((0, 0))), (200, 55, 0, 128))
+
+    def test_colorkey_is_kept(self):
+        self.backend.add('image/keyed/0.png', keyed_png())
+        self.backend.add('image/keyed/1.png', png(0))
+        self.backend.add('image/keyed/2.png', keyed_png())
+        stream = self.open('keyed', buffer_size=2)
+        target = pygame.Surface((4, 4))
+        for frame in stream:
+            target.fill((1, 1, 1))
+            target.blit(frame, (0, 0))
+        # keyed pixels are transparent, others overwrite the reused slot.
+        self.assertEqual(tuple(target.get_at((0, 0)))[:3], (1, 1, 1))
+        self.assertEqual(tuple(target.get_at((3, 3)))[:3], (10, 20, 30))
+
+    def test_decoding_errors_are_raised(self):
+        self.backend.add('image/broken/0.png', b'not an image')
+        with self.assertRaises(pygame.error):
+            self.open('broken').next_frame()
+
+    def test_sequence_not_found(self):
+        with self.assertRaises(AssetNotFoundError):
+            load.sequence('outro')
+
+    def test_buffer_size_is_at_least_two(self):
+        with self.assertRaises(ValueError):
+            sequences.SequenceStream([], buffer_size=1)
+
+
+class TestSequenceDisplayFormat(TestCase):
+    """Test that frames are copied to surfaces in the display's format."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        self.backend = MemoryBackend({'image/intro/0.png': png(10)})
+        get_config().mount(self.backend)
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def test_slots_are_converted(self):
+        stream = load.sequence('intro')
+        self.addCleanup(stream.close)
+        frame = stream.next_frame()
+        self.assertEqual(frame.get_bitsize(), self.screen.get_bitsize())
+        self.assertEqual(frame.get_masks(), self.screen.get_masks())
+
+
+if __name__ == '__main__':
+    unittest.main()
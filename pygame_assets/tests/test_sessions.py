@@ -0,0 +1,143 @@
+"""Tests for recording loads and preloading recorded profiles."""
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from pygame_assets import core, load, sessions
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+
+from .utils import TestCase
+
+
+class TestSessions(TestCase):
+    """Unit tests for the Recorder and Preloader."""
+
+    def setUp(self):
+        super().setUp()
+        self.backend = MemoryBackend({
+            'text/{}.txt'.format(name): name.encode()
+            for name in ('menu', 'button', 'level', 'boss')})
+        get_config().mount(self.backend)
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+        def counted(source, suffix=''):
+            self.release.wait()
+            self.calls.append(threading.current_thread())
+            return source.read().decode() + str(suffix)
+
+        core.loader(name='counted', dirs=['text'])(counted)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.profile_path = os.path.join(directory, 'profile.json')
+
+    def tearDown(self):
+        core.unregister('counted')
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def record(self):
+        with sessions.Recorder() as recorder:
+            recorder.mark('menu')
+            load.counted('menu.txt')
+            load.counted('button.txt', suffix='!')
+            load.counted('menu.txt')
+            recorder.mark('level-1')
+            load.counted('level.txt')
+            load.counted('menu.txt')
+        return recorder
+
+    def test_record_loads_in_order(self):
+        recorder = self.record()
+        self.assertEqual(
+            [(load.scene, load.filename) for load in recorder.loads],
+            [('menu', 'menu.txt'), ('menu', 'button.txt'),
+             ('level-1', 'level.txt'), ('level-1', 'menu.txt')])
+        self.assertEqual(recorder.loads[1].loader, 'counted')
+        self.assertEqual(recorder.loads[1].kwargs, {'suffix': '!'})
+
+    def test_recording_stops(self):
+        recorder = self.record()
+        load.counted('boss.txt')
+        self.assertEqual(len(recorder.loads), 4)
+        self.assertEqual(core._hooks, ())
+
+    def test_unserializable_arguments_are_skipped(self):
+        with sessions.Recorder() as recorder:
+            load.counted('menu.txt', suffix=object)
+        self.assertEqual(recorder.loads, [])
+        self.assertEqual(recorder.skipped, 1)
+
+    def test_bulk_loads_are_recorded(self):
+        with sessions.Recorder() as recorder:
+            load.counted.glob('b*.txt')
+        self.assertEqual([load.filename for load in recorder.loads],
+                         ['boss.txt', 'button.txt'])
+
+    def test_save_and_read_profile(self):
+        recorder = self.record()
+        recorder.save(self.profile_path)
+        self.assertEqual(sessions.read_profile(self.profile_path),
+                         recorder.loads)
+
+    def test_unsupported_profile_version(self):
+        with self.assertRaises(ValueError):
+            sessions.read_profile(io.StringIO('{"version": 0, "loads": []}'))
+
+    def test_preloaded_assets_are_handed_over(self):
+        loads = self.record().loads
+        del self.calls[:]
+        with sessions.preload(loads) as preloader:
+            self.assertTrue(preloader.wait(timeout=5))
+            self.assertEqual(len(self.calls), 3)
+            self.assertNotIn(threading.current_thread(), self.calls)
+            self.assertEqual(load.counted('button.txt', suffix='!'),
+                             'button!')
+            self.assertEqual(len(self.calls), 3)
+            # assets are handed over once.
+            load.counted('button.txt', suffix='!')
+            self.assertEqual(len(self.calls), 4)
+
+    def test_preload_scenes(self):
+        self.record().save(self.profile_path)
+        del self.calls[:]
+        with sessions.preload(self.profile_path,
+                              scenes=['level-1']) as preloader:
+            preloader.wait(timeout=5)
+            self.assertEqual(len(self.calls), 2)
+            load.counted('button.txt', suffix='!')
+            self.assertEqual(len(self.calls), 3)
+
+    def test_pending_preloads_are_loaded_right_away(self):
+        loads = self.record().loads
+        del self.calls[:]
+        self.release.clear()
+        preloader = sessions.preload(loads)
+        # menu.txt is being preloaded: level.txt is still pending.
+        self.assertEqual(preloader.pending, 3)
+        timer = threading.Timer(0.1, self.release.set)
+        timer.start()
+        self.assertEqual(load.counted('level.txt'), 'level')
+        self.assertIn(threading.current_thread(), self.calls)
+        preloader.close()
+        timer.join()
+        self.assertEqual(core._hooks, ())
+
+    def test_failed_preloads_are_loaded_again(self):
+        loads = [sessions.Load(None, 'missing', 'menu.txt', [], {})]
+        with sessions.preload(loads) as preloader:
+            preloader.wait(timeout=5)
+            core.loader(name='missing', dirs=['text'])(
+                lambda source: source.read())
+            self.addCleanup(core.unregister, 'missing')
+            self.assertEqual(load.missing('menu.txt'), b'menu')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Tests for assets shared between processes."""
+
+import os
+import struct
+import subprocess
+import sys
+import unittest
+
+import pygame
+
+from pygame_assets import core, load, shared
+
+from .utils import TestCase
+
+
+ATTACH_SCRIPT = """
+import sys
+from pygame_assets import shared
+with shared.SharedAssets(sys.argv[1]) as assets:
+    print(tuple(assets.get(sys.argv[2]).get_at((3, 3)))[:3])
+"""
+
+
+class TestSharedAssets(TestCase):
+    """Unit tests for the shared asset host and its clients."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.mixer.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        self.prefix = 'pygame_assets_test_{}'.format(os.getpid())
+        self.host = shared.SharedAssetHost(self.prefix)
+        self.addCleanup(self.host.close)
+        self.assets = shared.SharedAssets(self.prefix)
+        self.addCleanup(self.assets.close)
+
+    def test_share_image(self):
+        surface = pygame.Surface((3, 2), pygame.SRCALPHA)
+        surface.fill((10, 20, 30, 40))
+        self.host.add('square', surface)
+        self.assertEqual(self.assets.names, ['square'])
+        image = self.assets.get('square')
+        self.assertEqual(image.get_size(), (3, 2))
+        self.assertEqual(tuple(image.get_at((2, 1))), (10, 20, 30, 40))
+        self.assertIs(self.assets.get('square'), image)
+
+    def test_share_opaque_image(self):
+        self.host.add('square', pygame.Surface((3, 2)).convert())
+        image = self.assets.get('square')
+        self.assertFalse(image.get_flags() & pygame.SRCALPHA)
+
+    def test_images_are_not_copied(self):
+        self.host.add('square', pygame.Surface((3, 2)))
+        image = self.assets.get('square')
+        other = shared.SharedAssets(self.prefix)
+        self.addCleanup(other.close)
+        image.fill((1, 2, 3))
+        self.assertEqual(tuple(other.get('square').get_at((0, 0)))[:3],
+                         (1, 2, 3))
+
+    def test_share_sound(self):
+        sound = load.sound('test-sound.wav')
+        self.host.load('sound', 'test-sound.wav')
+        self.assertEqual(self.assets.get('test-sound.wav').get_raw(),
+                         sound.get_raw())
+
+    def test_only_surfaces_and_sounds_are_shared(self):
+        with self.assertRaises(TypeError):
+            self.host.add('text', 'not an asset')
+
+    def test_unknown_asset(self):
+        with self.assertRaises(KeyError):
+            self.assets.get('missing.png')
+        self.assertNotIn('missing.png', self.assets)
+
+    def test_installed_assets_serve_loads(self):
+        image = self.host.load('image', 'test-image.png', convert_alpha=False)
+        self.assets.install()
+        served = load.image('test-image.png', convert_alpha=False)
+        self.assertIs(served, self.assets.get('test-image.png'))
+        self.assertEqual(served.get_at((0, 0)), image.get_at((0, 0)))
+        # other arguments are loaded as usual.
+        self.assertIsNot(load.image('test-image.png'), served)
+        self.assets.uninstall()
+        self.assertEqual(core._hooks, ())
+
+    def test_attach_from_other_process(self):
+        surface = pygame.Surface((4, 4))
+        surface.fill((0, 128, 255))
+        self.host.add('blue', surface)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        # the test config is not declared in the other process.
+        env.pop('PYGAME_ASSETS_CONFIG', None)
+        output = subprocess.check_output(
+            [sys.executable, '-c', ATTACH_SCRIPT, self.prefix, 'blue'],
+            env=env, timeout=60)
+        self.assertEqual(output.splitlines()[-1], b'(0, 128, 255)')
+        # the other process did not unlink the segments when exiting.
+        self.assertEqual(tuple(self.assets.get('blue').get_at((0, 0)))[:3],
+                         (0, 128, 255))
+
+    def test_segments_are_removed(self):
+        self.host.add('square', pygame.Surface((3, 2)))
+        self.assets.close()
+        self.host.close()
+        self.assertFalse(os.path.exists('/dev/shm/' + self.prefix + '-0'))
+        with self.assertRaises(FileNotFoundError):
+            shared.SharedAssets(self.prefix)
+
+    def test_interrupted_publication_times_out(self):
+        # the host died while writing its index.
+        struct.pack_into('<I', self.host._index.buf, 0, 41)
+        assets = shared.SharedAssets(self.prefix, timeout=0.05)
+        self.addCleanup(assets.close)
+        with self.assertRaises(TimeoutError):
+            assets.names
+
+    def test_missing_host(self):
+        with self.assertRaises(FileNotFoundError):
+            shared.SharedAssets('pygame_assets_test_no_host')
+
+
+if __name__ == '__main__':
+    unittest.main()
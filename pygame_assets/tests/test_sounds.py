@@ -0,0 +1,71 @@
+"""Tests for the cached sound data."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pygame
+
+from pygame_assets import load, sounds
+
+from .utils import TestCase, change_config
+
+
+class TestSoundCache(TestCase):
+    """Unit tests for sound data caching."""
+
+    filename = 'test-sound.wav'
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.mixer.init()
+
+    def setUp(self):
+        super().setUp()
+        sounds.cache.clear()
+
+    def test_pcm_is_decoded_once(self):
+        first = load.sound(self.filename)
+        second = load.sound(self.filename, volume=0.5)
+        self.assertEqual(len(sounds.cache), 1)
+        self.assertEqual(sounds.cache.hits, 1)
+        self.assertEqual(first.get_length(), second.get_length())
+        self.assertEqual(second.get_volume(), 0.5)
+
+    def test_pcm_cache_is_bounded(self):
+        self.assertIsNotNone(sounds.cache.max_size)
+        max_size = sounds.cache.max_size
+        self.addCleanup(setattr, sounds.cache, 'max_size', max_size)
+        sounds.cache.max_size = 0
+        load.sound(self.filename)
+        self.assertEqual(len(sounds.cache), 0)
+
+    def test_pcm_matches_decoded_sound(self):
+        decoded = pygame.mixer.Sound('tests/assets/sound/' + self.filename)
+        self.assertEqual(load.sound(self.filename).get_raw(),
+                         decoded.get_raw())
+
+    def test_pcm_is_cached_on_disk(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with change_config('cache_dir') as config:
+                config.cache_dir = directory
+                length = load.sound(self.filename).get_length()
+                self.assertEqual(
+                    len(os.listdir(os.path.join(directory, 'sounds'))), 1)
+                sounds.cache.clear()
+                self.assertEqual(load.sound(self.filename).get_length(),
+                                 length)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_sound_bank(self):
+        bank = load.sound_bank([self.filename, self.filename], volume=0.5)
+        self.assertEqual(list(bank), [self.filename])
+        self.assertIsInstance(bank[self.filename], pygame.mixer.Sound)
+        self.assertEqual(bank[self.filename].get_volume(), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""Tests for the streaming of sounds."""
+
+import gc
+import unittest
+
+import pygame
+
+from pygame_assets import load, streams
+from pygame_assets.configure import get_config
+
+from .utils import TestCase
+
+
+class FakeChannel:
+    """Mixer channel which plays a sound each time it is polled."""
+
+    def __init__(self):
+        self.sound = None
+        self.queued = None
+        self.played = []
+        self.volume = None
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def play(self, sound):
+        self.sound = sound
+        self.played.append(sound)
+
+    def queue(self, sound):
+        self.queued = sound
+
+    def get_queue(self):
+        return self.queued
+
+    def get_busy(self):
+        # the current sound ends, the queued one starts.
+        busy = self.sound is not None
+        self.sound = self.queued
+        if self.queued is not None:
+            self.played.append(self.queued)
+        self.queued = None
+        return busy
+
+    def stop(self):
+        self.sound = self.queued = None
+
+
+class TestSoundStream(TestCase):
+    """Unit tests for the stream loader."""
+
+    filename = 'test-sound.wav'
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.mixer.init()
+
+    def open(self, **kwargs):
+        stream = load.stream(self.filename, chunk_duration=0.1, **kwargs)
+        self.addCleanup(stream.close)
+        return stream
+
+    def test_load_stream_from_string(self):
+        self.assertIsInstance(load.stream(self.filename), streams.SoundStream)
+
+    def test_dir_is_sound(self):
+        self.assertListEqual(get_config().dirs['stream'], ['sound'])
+
+    def test_buffer_is_bounded(self):
+        channel = FakeChannel()
+        stream = self.open(buffer_chunks=2, channel=channel)
+        stream.play()
+        for _ in range(5):
+            stream.update()
+            self.assertLessEqual(stream.buffered, 2)
+
+    def test_chunks_are_converted_to_mixer_format(self):
+        stream = self.open(channel=FakeChannel())
+        stream.play()
+        chunk = stream.channel.played[0]
+        self.assertIsInstance(chunk, pygame.mixer.Sound)
+        self.assertAlmostEqual(chunk.get_length(), 0.1, places=2)
+
+    def test_playback_finishes(self):
+        channel = FakeChannel()
+        stream = self.open(channel=channel, volume=0.5)
+        stream.play()
+        self.assertEqual(channel.volume, 0.5)
+        self.assertIn(stream, streams.playing)
+        for _ in range(100):
+            streams.update_all()
+        self.assertTrue(stream.finished)
+        self.assertNotIn(stream, streams.playing)
+        # the test sound lasts about 1.3 seconds.
+        self.assertEqual(len(channel.played), 14)
+
+    def test_looping_playback_does_not_finish(self):
+        channel = FakeChannel()
+        stream = self.open(channel=channel, loop=True)
+        stream.play()
+        for _ in range(100):
+            stream.update()
+        self.assertFalse(stream.finished)
+        self.assertGreater(len(channel.played), 14)
+
+    def test_unreferenced_streams_keep_playing(self):
+        channel = FakeChannel()
+        load.stream(self.filename, chunk_duration=0.1, loop=True,
+                    channel=channel).play()
+        gc.collect()
+        for _ in range(20):
+            streams.update_all()
+        self.assertGreater(len(channel.played), 20)
+        stream, = streams.playing
+        stream.close()
+        self.assertEqual(streams.playing, set())
+
+    def test_rewind(self):
+        channel = FakeChannel()
+        stream = self.open(channel=channel)
+        stream.play()
+        for _ in range(100):
+            stream.update()
+        stream.rewind()
+        stream.play()
+        self.assertFalse(stream.finished)
+
+    def test_streams_play_on_separate_channels(self):
+        first = self.open()
+        second = self.open()
+        first.play()
+        second.play()
+        # each channel plays the first chunk of its own stream.
+        self.assertIsNotNone(first.channel.get_sound())
+        self.assertIsNot(first.channel.get_sound(),
+                         second.channel.get_sound())
+
+    def test_stop_starts_over(self):
+        channel = FakeChannel()
+        stream = self.open(channel=channel)
+        stream.play()
+        for _ in range(3):
+            stream.update()
+        first = channel.played[0].get_raw()
+        stream.stop()
+        self.assertIsNone(channel.get_queue())
+        channel.played.clear()
+        stream.play()
+        self.assertEqual(channel.played[0].get_raw(), first)
+
+    def test_channels_are_reserved(self):
+        stream = self.open()
+        stream.play()
+        chunk = stream.channel.get_sound().get_raw()
+        effect = pygame.mixer.Sound(buffer=bytes(4096))
+        self.addCleanup(pygame.mixer.stop)
+        for _ in range(pygame.mixer.get_num_channels()):
+            effect.play()
+        self.assertEqual(stream.channel.get_sound().get_raw(), chunk)
+
+    def test_each_stream_has_its_channel(self):
+        count = pygame.mixer.get_num_channels() + 1
+        opened = [self.open() for _ in range(count)]
+        for stream in opened:
+            stream.play()
+        self.assertEqual(len({stream._channel_id for stream in opened}),
+                         count)
+
+    def test_reserved_channels_are_released(self):
+        first = self.open()
+        first.play()
+        channel_id = first._channel_id
+        first.stop()
+        self.assertIsNone(first.channel)
+        second = self.open()
+        second.play()
+        self.assertEqual(second._channel_id, channel_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Stress tests of loading from many threads."""
+
+import sys
+import threading
+import time
+import unittest
+
+from pygame_assets import core, load
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+from pygame_assets.exceptions import AssetNotFoundError
+
+from .utils import TestCase
+
+
+def read_text(source):
+    if isinstance(source, str):
+        with open(source, 'rb') as textfile:
+            return textfile.read().decode()
+    return source.read().decode()
+
+
+class TestConcurrentLoading(TestCase):
+    """Load assets while loaders, search dirs and mounts change."""
+
+    duration = 0.5
+    loading_threads = 8
+
+    def setUp(self):
+        super().setUp()
+        core.loader(name='text')(read_text)
+        self.backend = MemoryBackend({'text/memory.txt': b'from memory'})
+
+    def tearDown(self):
+        core.unregister('text')
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def run_threads(self, targets):
+        errors = []
+        stop = threading.Event()
+        # switch threads very often to expose races.
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+
+        def run(target):
+            try:
+                while not stop.is_set():
+                    target()
+            except Exception as exc:
+                errors.append(exc)
+                stop.set()
+
+        threads = [threading.Thread(target=run, args=(target,))
+                   for target in targets]
+        for thread in threads:
+            thread.start()
+        time.sleep(self.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_load_while_registry_changes(self):
+        config = get_config()
+        loads = [0]
+
+        def load_text():
+            self.assertEqual(load.text('version_control.txt')[:7], 'Ensures')
+            try:
+                self.assertEqual(load.text('memory.txt'), 'from memory')
+            except AssetNotFoundError:
+                pass
+            try:
+                load.churn('version_control.txt')
+            except (AttributeError, AssetNotFoundError, KeyError):
+                pass
+            try:
+                self.assertEqual(len(config.search_dirs('churn_dirs')), 2)
+            except KeyError:
+                pass
+            loads[0] += 1
+
+        def change_loaders():
+            core.loader(name='churn', dirs=['text'])(read_text)
+            list(core.loaders)
+            core.unregister('churn')
+
+        def change_dirs():
+            config.add_search_dirs('churn_dirs', 'text', 'extra')
+            config.search_paths('churn_dirs', 'memory.txt')
+            config.remove_search_dirs('churn_dirs')
+
+        def change_mounts():
+            config.mount(self.backend)
+            config.unmount(self.backend)
+
+        errors = self.run_threads(
+            [load_text] * self.loading_threads
+            + [change_loaders, change_dirs, change_mounts])
+        self.assertEqual(errors, [])
+        self.assertGreater(loads[0], 0)
+        self.assertEqual(config.dirs['text'], ['text'])
+
+
+if __name__ == '__main__':
+    unittest.main()
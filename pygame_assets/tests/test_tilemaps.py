@@ -0,0 +1,243 @@
+"""Tests for Tiled maps."""
+
+import base64
+import io
+import json
+import struct
+import unittest
+import zlib
+
+import pygame
+
+from pygame_assets import load, tilemaps
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+
+from .utils import TestCase
+
+
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+
+
+def make_tileset():
+    """Return a 2x2 tileset of 8x8 tiles, one color each."""
+    surface = pygame.Surface((16, 16))
+    for index, color in enumerate(COLORS):
+        row, col = divmod(index, 2)
+        surface.fill(color, (col * 8, row * 8, 8, 8))
+    # mark the top-left pixel of the first tile, to test flips.
+    surface.set_at((0, 0), (255, 255, 255))
+    return surface
+
+
+def png_bytes(surface):
+    image_file = io.BytesIO()
+    pygame.image.save(surface, image_file, 'tiles.png')
+    return image_file.getvalue()
+
+
+def make_gids(width=40, height=20):
+    """Return ground gids cycling through the 4 tiles."""
+    return [(x + y) % 4 + 1 for y in range(height) for x in range(width)]
+
+
+TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<map version="1.10" orientation="orthogonal" width="40" height="20"
+     tilewidth="8" tileheight="8" infinite="0">
+ <tileset firstgid="1" name="tiles" tilewidth="8" tileheight="8"
+          tilecount="4" columns="2">
+  <image source="../image/tiles.png" width="16" height="16"/>
+ </tileset>
+ <layer id="1" name="ground" width="40" height="20">
+  <data encoding="csv">{ground}</data>
+ </layer>
+ <layer id="2" name="decor" width="40" height="20" opacity="0.5">
+  <data encoding="base64" compression="zlib">{decor}</data>
+ </layer>
+</map>
+"""
+
+
+def make_tmx():
+    decor = [0] * 800
+    decor[0] = 2
+    raw = zlib.compress(struct.pack('<800I', *decor))
+    return TMX.format(ground=','.join(map(str, make_gids())),
+                      decor=base64.b64encode(raw).decode()).encode()
+
+
+def make_json():
+    return json.dumps({
+        'width': 40, 'height': 20, 'tilewidth': 8, 'tileheight': 8,
+        'orientation': 'orthogonal', 'infinite': False,
+        'tilesets': [{'firstgid': 1, 'source': 'tiles.tsx'}],
+        'layers': [{'type': 'group', 'layers': [
+            {'type': 'tilelayer', 'name': 'ground', 'width': 40,
+             'height': 20, 'data': make_gids()}]}],
+    }).encode()
+
+
+TSX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<tileset name="tiles" tilewidth="8" tileheight="8" tilecount="4" columns="2">
+ <image source="../image/tiles.png" width="16" height="16"/>
+</tileset>
+"""
+
+
+class TestDecodeGids(unittest.TestCase):
+    """Unit tests for decoding layer data."""
+
+    def test_csv(self):
+        self.assertEqual(tilemaps.decode_gids('1,2,\n3', 'csv'), [1, 2, 3])
+
+    def test_base64(self):
+        raw = struct.pack('<3I', 1, 0, tilemaps.FLIPPED_HORIZONTALLY | 2)
+        self.assertEqual(
+            tilemaps.decode_gids(base64.b64encode(raw).decode(), 'base64'),
+            [1, 0, tilemaps.FLIPPED_HORIZONTALLY | 2])
+
+    def test_unsupported_compression(self):
+        with self.assertRaises(ValueError):
+            tilemaps.decode_gids('', 'base64', 'zstd')
+
+
+class TestSliceTileset(unittest.TestCase):
+    """Unit tests for slicing tileset images."""
+
+    def test_tiles_are_subsurfaces(self):
+        tileset = make_tileset()
+        tiles = tilemaps.slice_tileset(tileset, 8, 8)
+        self.assertEqual(len(tiles), 4)
+        self.assertIs(tiles[3].get_parent(), tileset)
+        self.assertEqual(tuple(tiles[3].get_at((0, 0)))[:3], COLORS[3])
+
+    def test_margin_and_spacing(self):
+        tileset = pygame.Surface((21, 10))
+        tileset.fill(COLORS[1], (12, 1, 8, 8))
+        tiles = tilemaps.slice_tileset(tileset, 8, 8, margin=1, spacing=3)
+        self.assertEqual(len(tiles), 2)
+        self.assertEqual(tiles[1].get_offset(), (12, 1))
+
+
+class TestTileMap(TestCase):
+    """Unit tests for the tilemap loader and prerendered chunks."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        self.backend = MemoryBackend({
+            'tilemap/level.tmx': make_tmx(),
+            'tilemap/level.json': make_json(),
+            'tilemap/tiles.tsx': TSX,
+            'image/tiles.png': png_bytes(make_tileset()),
+        })
+        get_config().mount(self.backend)
+        self.map = load.tilemap('level.tmx')
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def test_load_tmx(self):
+        self.assertEqual(self.map.size, (320, 160))
+        self.assertEqual([layer.name for layer in self.map.layers],
+                         ['ground', 'decor'])
+        self.assertEqual(self.map.get_tile('ground', 1, 0), 2)
+        self.assertEqual(self.map.get_tile('decor', 0, 0), 2)
+        self.assertEqual(self.map.layers[1].opacity, 0.5)
+
+    def test_load_json_with_external_tileset(self):
+        level = load.tilemap('level.json')
+        self.assertEqual(level.get_tile('ground', 3, 1), 1)
+        self.assertEqual(len(level.tiles), 4)
+
+    def test_draw(self):
+        surface = pygame.Surface((64, 64))
+        self.map.draw(surface, pygame.Rect(8, 8, 64, 64), layers=['ground'])
+        # the tile at (1, 1) is drawn at the top-left.
+        self.assertEqual(tuple(surface.get_at((4, 4)))[:3], COLORS[2])
+        self.assertEqual(tuple(surface.get_at((12, 4)))[:3], COLORS[3])
+
+    def test_visible_chunks(self):
+        # chunks are 128x128 pixels: the viewport spans 2 columns.
+        blits = self.map.visible(pygame.Rect(100, 0, 100, 100),
+                                 layers=['ground'])
+        self.assertEqual([position for _, position in blits],
+                         [(-100, 0), (28, 0)])
+        # the last chunk column is clipped to the map.
+        self.assertEqual(self.map.chunk('ground', 2, 0).get_size(),
+                         (64, 128))
+        # empty chunks are not drawn.
+        self.assertEqual(len(self.map.visible(pygame.Rect(200, 0, 10, 10),
+                                              layers=['decor'])), 0)
+
+    def test_chunks_are_cached(self):
+        chunk = self.map.chunk('ground', 0, 0)
+        self.assertIs(self.map.chunk('ground', 0, 0), chunk)
+
+    def test_chunk_cache_is_bounded(self):
+        level = load.tilemap('level.tmx', chunk_size=2, cache_size=4)
+        level.visible(pygame.Rect(0, 0, 48, 32), layers=['ground'])
+        self.assertEqual(level.cached, 4)
+        # the chunks drawn last are kept.
+        self.assertIn((0, 2, 1), level._chunks)
+        self.assertNotIn((0, 0, 0), level._chunks)
+
+    def test_far_chunks_are_dropped(self):
+        level = load.tilemap('level.tmx', chunk_size=2)
+        level.visible(pygame.Rect(0, 0, 16, 16), layers=['ground'])
+        # 2 chunks away from the viewport: kept.
+        level.visible(pygame.Rect(32, 0, 16, 16), layers=['ground'])
+        self.assertIn((0, 0, 0), level._chunks)
+        level.visible(pygame.Rect(160, 0, 16, 16), layers=['ground'])
+        self.assertEqual(list(level._chunks), [(0, 10, 0)])
+
+    def test_edits_invalidate_their_chunk(self):
+        first = self.map.chunk('ground', 0, 0)
+        second = self.map.chunk('ground', 1, 0)
+        self.map.set_tile('ground', 0, 0, 4)
+        self.assertEqual(self.map.get_tile('ground', 0, 0), 4)
+        edited = self.map.chunk('ground', 0, 0)
+        self.assertIsNot(edited, first)
+        self.assertEqual(tuple(edited.get_at((4, 4)))[:3], COLORS[3])
+        self.assertIs(self.map.chunk('ground', 1, 0), second)
+
+    def test_flipped_tiles(self):
+        self.map.set_tile('ground', 0, 0,
+                          1 | tilemaps.FLIPPED_HORIZONTALLY)
+        self.map.set_tile('ground', 1, 0, 1 | tilemaps.FLIPPED_DIAGONALLY)
+        chunk = self.map.chunk('ground', 0, 0)
+        self.assertEqual(tuple(chunk.get_at((7, 0)))[:3], (255, 255, 255))
+        # transposed: the top-left pixel stays in place.
+        self.assertEqual(tuple(chunk.get_at((8, 0)))[:3], (255, 255, 255))
+        self.map.set_tile('ground', 1, 0,
+                          1 | tilemaps.FLIPPED_DIAGONALLY
+                          | tilemaps.FLIPPED_VERTICALLY)
+        self.assertEqual(
+            tuple(self.map.chunk('ground', 0, 0).get_at((8, 7)))[:3],
+            (255, 255, 255))
+
+    def test_out_of_map(self):
+        with self.assertRaises(IndexError):
+            self.map.set_tile('ground', 40, 0, 1)
+        with self.assertRaises(KeyError):
+            self.map.get_tile('sky', 0, 0)
+
+    def test_each_load_is_a_new_map(self):
+        self.map.set_tile('ground', 0, 0, 0)
+        self.assertEqual(load.tilemap('level.tmx').get_tile('ground', 0, 0),
+                         1)
+
+    def test_unsupported_orientation(self):
+        self.backend.add('tilemap/iso.tmx', make_tmx().replace(
+            b'orthogonal', b'isometric'))
+        with self.assertRaises(ValueError):
+            load.tilemap('iso.tmx')
+
+
+if __name__ == '__main__':
+    unittest.main()
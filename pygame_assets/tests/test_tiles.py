@@ -0,0 +1,219 @@
+"""Tests for tile pyramids of large images."""
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import pygame
+
+from pygame_assets import load, tiles
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+
+from .utils import TestCase, change_config
+
+
+def make_surface(size=(300, 200)):
+    """Return a surface whose pixels encode their coordinates."""
+    surface = pygame.Surface(size)
+    for x in range(0, size[0], 10):
+        for y in range(0, size[1], 10):
+            surface.fill((x % 256, y % 256, 0), (x, y, 10, 10))
+    return surface
+
+
+class TestPyramid(unittest.TestCase):
+    """Unit tests for building tile pyramids."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_build_pyramid(self):
+        manifest = tiles.build_pyramid(make_surface(), self.directory, 64)
+        self.assertEqual(manifest, {
+            'width': 300, 'height': 200, 'tile_size': 64, 'levels': 4,
+            'level_sizes': [[300, 200], [150, 100], [75, 50], [37, 25]]})
+        self.assertEqual(tiles.read_manifest(self.directory), manifest)
+        self.assertEqual(len(os.listdir(os.path.join(self.directory, '0'))),
+                         5 * 4)
+        self.assertEqual(os.listdir(os.path.join(self.directory, '3')),
+                         ['0_0.png'])
+        edge = pygame.image.load(tiles.tile_path(self.directory, 0, 4, 3))
+        self.assertEqual(edge.get_size(), (300 - 256, 200 - 192))
+
+    def test_coarse_levels_are_built_from_tiles(self):
+        surface = make_surface()
+        with mock.patch('pygame.transform.smoothscale',
+                        wraps=pygame.transform.smoothscale) as smoothscale:
+            tiles.build_pyramid(surface, self.directory, 64)
+        for call in smoothscale.call_args_list:
+            width, height = call[0][1]
+            self.assertLessEqual(max(width, height), 64)
+        # tiles of coarse levels are halved blocks of finer tiles.
+        scaled = pygame.transform.smoothscale(surface, (150, 100))
+        tile = pygame.image.load(tiles.tile_path(self.directory, 1, 1, 0))
+        for x, y in [(0, 0), (20, 30), (63, 63)]:
+            self.assertEqual(tile.get_at((x, y)),
+                             scaled.get_at((x + 64, y)))
+
+    def test_thin_levels(self):
+        manifest = tiles.build_pyramid(pygame.Surface((300, 1)),
+                                       self.directory, 64)
+        self.assertEqual(manifest['level_sizes'][-1], [37, 1])
+
+    def test_files_are_written_atomically(self):
+        with mock.patch('pygame_assets.tiles.atomic_write',
+                        wraps=tiles.atomic_write) as atomic_write:
+            tiles.build_pyramid(make_surface(), self.directory, 64)
+        written = {call[0][0] for call in atomic_write.call_args_list}
+        self.assertIn(os.path.join(self.directory, tiles.MANIFEST), written)
+        self.assertIn(tiles.tile_path(self.directory, 2, 1, 0), written)
+        for _, _, filenames in os.walk(self.directory):
+            self.assertFalse([name for name in filenames
+                              if name.endswith('.tmp')])
+
+    def test_unfinished_pyramid_has_no_manifest(self):
+        self.assertIsNone(tiles.read_manifest(self.directory))
+        with self.assertRaises(ValueError):
+            tiles.TiledImage(self.directory)
+
+
+class TestTiledImage(unittest.TestCase):
+    """Unit tests for on-demand tile decoding."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.surface = make_surface()
+        tiles.build_pyramid(self.surface, self.directory, 64)
+
+    def open(self, **kwargs):
+        image = tiles.TiledImage(self.directory, **kwargs)
+        self.addCleanup(image.close)
+        return image
+
+    def test_only_visible_tiles_are_decoded(self):
+        image = self.open(prefetch=False)
+        blits = image.visible(pygame.Rect(70, 10, 100, 50))
+        self.assertEqual(image.cached, 2)
+        self.assertEqual([position for _, position in blits],
+                         [(-6, -10), (58, -10)])
+
+    def test_visible_tiles_match_image(self):
+        image = self.open(prefetch=False)
+        viewport = pygame.Rect(70, 10, 100, 50)
+        target = pygame.Surface(viewport.size)
+        target.blits(image.visible(viewport))
+        for x, y in [(0, 0), (55, 20), (99, 49)]:
+            self.assertEqual(target.get_at((x, y)),
+                             self.surface.get_at((x + 70, y + 10)))
+
+    def test_tiles_of_coarse_levels(self):
+        image = self.open(prefetch=False)
+        self.assertEqual(image.level_for_scale(1), 0)
+        self.assertEqual(image.level_for_scale(0.25), 2)
+        self.assertEqual(image.level_for_scale(0.01), 3)
+        blits = image.visible(image.get_rect(), level=2)
+        self.assertEqual(len(blits), 2)
+        self.assertEqual(blits[1][1], (64, 0))
+
+    def test_levels_rounded_down(self):
+        tiles.build_pyramid(pygame.Surface((1025, 600)), self.directory, 512)
+        image = tiles.TiledImage(self.directory, prefetch=False)
+        self.addCleanup(image.close)
+        # level 1 is 512x300, not 513x300: a single tile.
+        self.assertEqual(image.tiles_in(image.get_rect(), level=1),
+                         [(0, 0)])
+        self.assertEqual(len(image.visible(image.get_rect(), level=1)), 1)
+        self.assertEqual(len(image.tiles_in(image.get_rect())), 6)
+
+    def test_lru_is_bounded(self):
+        image = self.open(cache_size=4, prefetch=False)
+        for x in range(0, 300, 64):
+            image.visible(pygame.Rect(x, 0, 64, 64))
+        self.assertEqual(image.cached, 4)
+        self.assertNotIn((0, 0, 0), image._tiles)
+
+    def test_prefetch_in_scroll_direction(self):
+        image = self.open()
+        image.visible(pygame.Rect(0, 0, 64, 64))
+        image.visible(pygame.Rect(10, 0, 64, 64))
+        image.wait()
+        # tiles (0, 0) and (1, 0) are visible, tile (2, 0) is ahead.
+        self.assertIn((0, 2, 0), image._tiles)
+        self.assertNotIn((0, 0, 1), image._tiles)
+
+    def test_images_share_the_prefetch_thread(self):
+        threads = threading.active_count()
+        images = [self.open() for _ in range(3)]
+        for image in images:
+            image.visible(pygame.Rect(0, 0, 64, 64))
+            image.visible(pygame.Rect(10, 0, 64, 64))
+            image.wait()
+        self.assertLessEqual(threading.active_count(), threads + 1)
+
+    def test_closed_image_is_not_prefetched(self):
+        image = self.open()
+        image.visible(pygame.Rect(0, 0, 64, 64))
+        image.close()
+        image.visible(pygame.Rect(10, 0, 64, 64))
+        image.wait()
+        self.assertEqual(image.cached, 0)
+
+
+class TestTiledImageLoader(TestCase):
+    """Unit tests for the tiled_image loader."""
+
+    def setUp(self):
+        super().setUp()
+        image_file = io.BytesIO()
+        pygame.image.save(make_surface(), image_file, 'world.png')
+        self.backend = MemoryBackend({'image/world.png':
+                                      image_file.getvalue()})
+        get_config().mount(self.backend)
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def test_dir_is_image(self):
+        self.assertListEqual(get_config().dirs['tiled_image'], ['image'])
+
+    def test_pyramid_is_built_once(self):
+        with change_config('cache_dir') as config:
+            config.cache_dir = self.cache_dir
+            with mock.patch('pygame_assets.tiles.build_pyramid',
+                            wraps=tiles.build_pyramid) as build:
+                for _ in range(2):
+                    image = load.tiled_image('world.png', tile_size=128)
+                    image.close()
+            self.assertEqual(build.call_count, 1)
+            self.assertEqual(image.size, (300, 200))
+            self.assertEqual(image.levels, 3)
+            self.assertEqual(
+                len(os.listdir(os.path.join(self.cache_dir, 'tiles'))), 1)
+
+    def test_prebuilt_pyramid(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        tiles.build_pyramid(make_surface(), os.path.join(
+            base, 'image', 'world.tiles'), 128)
+        with change_config('base') as config:
+            config.base = base
+            with mock.patch('pygame_assets.tiles.build_pyramid') as build:
+                image = load.tiled_image('world.tiles', prefetch=False)
+            build.assert_not_called()
+        self.assertEqual(image.directory,
+                         os.path.join(base, 'image', 'world.tiles'))
+        self.assertEqual(image.levels, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
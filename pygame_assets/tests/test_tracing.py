@@ -0,0 +1,106 @@
+"""Tests for tracing asset loads."""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import pygame
+
+from pygame_assets import content, core, load, pipelines, tracing
+from pygame_assets.backends import MemoryBackend
+from pygame_assets.configure import get_config
+
+from .utils import TestCase
+
+
+class TestTracer(TestCase):
+    """Unit tests for the Tracer."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+
+    def setUp(self):
+        super().setUp()
+        pipelines.cache.clear()
+        content.index.clear()
+        self.backend = MemoryBackend({
+            'text/trace-{}.txt'.format(name): name.encode()
+            for name in ('a', 'b', 'c')})
+        get_config().mount(self.backend)
+        core.loader(name='text')(lambda source: source.read().decode())
+
+    def tearDown(self):
+        core.unregister('text')
+        get_config().unmount(self.backend)
+        super().tearDown()
+
+    def spans(self, tracer):
+        return [event for event in tracer.events if event['ph'] == 'X']
+
+    def test_phases_of_a_pipeline_load(self):
+        with tracing.Tracer() as tracer:
+            load.image('test-image.png')
+        spans = self.spans(tracer)
+        names = [span['name'] for span in spans]
+        for phase in ('resolve', 'hash', 'read', 'decode', 'convert'):
+            self.assertIn(phase, names)
+        outer = spans[-1]
+        self.assertEqual(outer['name'], 'image test-image.png')
+        self.assertEqual(outer['cat'], 'load')
+        # phases are nested in the load.
+        for span in spans[:-1]:
+            self.assertGreaterEqual(span['ts'], outer['ts'])
+            self.assertLessEqual(span['ts'] + span['dur'],
+                                 outer['ts'] + outer['dur'])
+            self.assertEqual(span['tid'], outer['tid'])
+
+    def test_phases_of_a_core_load(self):
+        with tracing.Tracer() as tracer:
+            load.text('trace-a.txt')
+        self.assertEqual([span['name'] for span in self.spans(tracer)],
+                         ['resolve', 'read', 'decode', 'text trace-a.txt'])
+
+    def test_parallel_loads_record_threads(self):
+        with tracing.Tracer() as tracer:
+            load.text.glob('trace-*.txt', max_workers=3)
+        loads = [span for span in self.spans(tracer) if span['cat'] == 'load']
+        self.assertEqual(len(loads), 3)
+        self.assertNotIn(threading.get_ident(),
+                         {span['tid'] for span in loads})
+        names = [event for event in tracer.events if event['ph'] == 'M']
+        self.assertEqual({event['tid'] for event in names},
+                         {span['tid'] for span in loads})
+
+    def test_not_tracing(self):
+        tracer = tracing.Tracer()
+        load.text('trace-a.txt')
+        self.assertEqual(tracer.events, [])
+        self.assertIs(load.text, core.loaders['text'])
+
+    def test_save(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'trace.json')
+        with tracing.Tracer() as tracer:
+            load.text('trace-a.txt')
+            tracer.mark('first frame')
+        tracer.save(path)
+        with open(path) as trace_file:
+            trace = json.load(trace_file)
+        self.assertEqual(trace['traceEvents'][-1]['name'], 'first frame')
+        self.assertEqual(trace['traceEvents'][-1]['ph'], 'i')
+
+    def test_single_running_tracer(self):
+        with tracing.Tracer():
+            with self.assertRaises(RuntimeError):
+                tracing.Tracer().start()
+        self.assertIsNone(tracing.tracer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Tests for resolution-aware image variants."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pygame
+
+from pygame_assets import load, variants
+from pygame_assets.backends import LocalBackend
+from pygame_assets.configure import get_config
+from pygame_assets.exceptions import AssetNotFoundError
+
+from .utils import TestCase, change_config
+
+
+class TestVariantNames(unittest.TestCase):
+    """Unit tests for variant naming and ordering."""
+
+    def test_variant_filename(self):
+        self.assertEqual(variants.variant_filename('hero.png', 1), 'hero.png')
+        self.assertEqual(variants.variant_filename('hero.png', 2),
+                         'hero@2x.png')
+        self.assertEqual(variants.variant_filename('hero.png', 0.5),
+                         'hero@0.5x.png')
+
+    def test_candidate_scales(self):
+        scales = variants.candidate_scales(1.5)
+        self.assertEqual(scales[:3], [1.5, 2, 3])
+        self.assertLess(scales.index(1), scales.index(0.75))
+
+
+class TestImageVariants(TestCase):
+    """Test loading image variants."""
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.init()
+        cls.screen = pygame.display.set_mode((800, 600))
+        cls.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.directory, 'image'))
+        for name, size in (('hero.png', 20), ('hero@2x.png', 40),
+                           ('only@2x.png', 40)):
+            surface = pygame.Surface((size, size))
+            pygame.image.save(surface,
+                              os.path.join(cls.directory, 'image', name))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        super().setUp()
+        self.backend = LocalBackend(self.directory)
+        get_config().mount(self.backend)
+
+    def tearDown(self):
+        get_config().unmount(self.backend)
+        variants.cache.clear()
+        super().tearDown()
+
+    def test_find_variant(self):
+        self.assertEqual(variants.find_variant('image', 'hero.png', 2),
+                         (2, 'hero@2x.png'))
+        self.assertEqual(variants.find_variant('image', 'only.png', 1),
+                         (2, 'only@2x.png'))
+        with self.assertRaises(AssetNotFoundError):
+            variants.find_variant('image', 'nobody.png', 1)
+
+    def test_load_exact_variant(self):
+        self.assertEqual(load.image('hero.png', scale=2).get_size(), (40, 40))
+        self.assertEqual(load.image('hero.png').get_size(), (20, 20))
+
+    def test_target_scale_from_config(self):
+        with change_config('target_scale') as config:
+            config.target_scale = 2
+            self.assertEqual(load.image('hero.png').get_size(), (40, 40))
+
+    def test_missing_variant_is_scaled_and_cached(self):
+        image = load.image('only.png')
+        self.assertEqual(image.get_size(), (20, 20))
+        self.assertIs(load.image('only.png'), image)
+        # lower densities are scaled from the closest higher density.
+        self.assertEqual(load.image('hero.png', scale=0.5).get_size(),
+                         (10, 10))
+
+    def test_scaled_variants_are_cached_on_disk(self):
+        with change_config('cache_dir') as config:
+            config.cache_dir = os.path.join(self.directory, 'cache')
+            load.image('only.png')
+            cached = os.listdir(os.path.join(config.cache_dir, 'variants'))
+            self.assertEqual(len(cached), 1)
+            variants.cache.clear()
+            self.assertEqual(load.image('only.png').get_size(), (20, 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,617 @@
+"""Maps made with the Tiled editor, drawn from prerendered chunks.
+
+Tiled maps are layers of thousands of tiles: blitting each visible tile
+every frame is slow. A TileMap renders the tiles of each layer onto chunk
+surfaces, a chunk of tiles at a time, the first time the chunk is drawn.
+Drawing a screen then costs a few blits per layer. Editing a tile only
+renders the chunk holding it again.
+
+Tileset images are sliced into subsurfaces, which share the pixels of the
+image instead of copying them.
+
+Only orthogonal, finite maps are supported. Object and image layers are
+ignored; layers of group layers are drawn in order.
+
+Usage
+-----
+level = load.tilemap('level-1.tmx')
+
+# each frame: blit the chunks visible through the camera.
+level.draw(screen, camera_rect)
+
+# the chunk of the tile is rendered again when next drawn.
+level.set_tile('ground', 12, 7, 0)
+"""
+
+import base64
+import gzip
+import json
+import os
+import struct
+import xml.etree.ElementTree as ElementTree
+import zlib
+from collections import OrderedDict
+
+import pygame
+
+from .backends import normalize
+
+
+# flags stored in the high bits of global tile ids
+FLIPPED_HORIZONTALLY = 0x80000000
+FLIPPED_VERTICALLY = 0x40000000
+FLIPPED_DIAGONALLY = 0x20000000
+# the low bits are the tile id, the others are flags.
+GID_MASK = 0x0FFFFFFF
+
+
+def decode_gids(data, encoding=None, compression=None):
+    """Decode the global tile ids of a layer.
+
+    Raises a ValueError for unsupported encodings or compressions.
+
+    Parameters
+    ----------
+    data : str or list of int
+        As stored in the map file.
+    encoding : str, optional
+        'csv', 'base64', or None for a list of ids.
+    compression : str, optional
+        'zlib', 'gzip', or None or '' for uncompressed base64 data.
+
+    Returns
+    -------
+    gids : list of int
+    """
+    if encoding is None:
+        return [int(gid) for gid in data]
+    if encoding == 'csv':
+        return [int(gid) for gid in data.split(',') if gid.strip()]
+    if encoding != 'base64':
+        raise ValueError('Unsupported layer encoding: {}'.format(encoding))
+    raw = base64.b64decode(data.strip())
+    if compression == 'zlib':
+        raw = zlib.decompress(raw)
+    elif compression == 'gzip':
+        raw = gzip.decompress(raw)
+    elif compression:
+        raise ValueError(
+            'Unsupported layer compression: {}'.format(compression))
+    return list(struct.unpack('<{}I'.format(len(raw) // 4), raw))
+
+
+def _int_attributes(element, *names):
+    return {name: int(element.get(name)) for name in names
+            if element.get(name) is not None}
+
+
+def _tmx_tileset(element):
+    # a <tileset> element as a tileset of the JSON format.
+    tileset = _int_attributes(element, 'firstgid', 'tilewidth', 'tileheight',
+                              'spacing', 'margin', 'columns', 'tilecount')
+    if element.get('source') is not None:
+        tileset['source'] = element.get('source')
+    image = element.find('image')
+    if image is not None:
+        tileset['image'] = image.get('source')
+    return tileset
+
+
+def _tmx_layers(element):
+    layers = []
+    for child in element:
+        if child.tag == 'group':
+            layers.append({'type': 'group', 'layers': _tmx_layers(child),
+                           'visible': child.get('visible', '1') == '1'})
+        elif child.tag == 'layer':
+            data = child.find('data')
+            if data.find('chunk') is not None:
+                raise ValueError('Infinite maps are not supported')
+            encoding = data.get('encoding')
+            if encoding is None:
+                gids = [int(tile.get('gid', 0))
+                        for tile in data.findall('tile')]
+            else:
+                gids = decode_gids(data.text, encoding,
+                                   data.get('compression'))
+            layers.append({
+                'type': 'tilelayer', 'name': child.get('name', ''),
+                'width': int(child.get('width')),
+                'height': int(child.get('height')),
+                'data': gids,
+                'visible': child.get('visible', '1') == '1',
+                'opacity': float(child.get('opacity', 1)),
+            })
+    return layers
+
+
+def parse_tmx(data):
+    """Parse a TMX map into the structure of a map in JSON format.
+
+    Parameters
+    ----------
+    data : bytes
+
+    Returns
+    -------
+    map_data : dict
+        With the layers' data decoded into lists of global tile ids.
+    """
+    root = ElementTree.fromstring(data)
+    map_data = _int_attributes(root, 'width', 'height', 'tilewidth',
+                               'tileheight')
+    map_data.update(orientation=root.get('orientation', 'orthogonal'),
+                    infinite=root.get('infinite', '0') == '1',
+                    tilesets=[_tmx_tileset(element)
+                              for element in root.findall('tileset')],
+                    layers=_tmx_layers(root))
+    return map_data
+
+
+def parse_tsx(data):
+    """Parse an external TSX tileset into the structure of the JSON format.
+
+    Parameters
+    ----------
+    data : bytes
+
+    Returns
+    -------
+    tileset : dict
+    """
+    return _tmx_tileset(ElementTree.fromstring(data))
+
+
+def read_map(data, filename):
+    """Parse a map file, in TMX or JSON format depending on its extension.
+
+    Parameters
+    ----------
+    data : bytes
+    filename : str
+
+    Returns
+    -------
+    map_data : dict
+    """
+    if os.path.splitext(filename)[1].lower() in ('.tmx', '.xml'):
+        return parse_tmx(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def read_tileset(data, filename):
+    """Parse an external tileset file, in TSX or JSON format.
+
+    Parameters
+    ----------
+    data : bytes
+    filename : str
+
+    Returns
+    -------
+    tileset : dict
+    """
+    if os.path.splitext(filename)[1].lower() in ('.tsx', '.xml'):
+        return parse_tsx(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def slice_tileset(image, tile_width, tile_height, margin=0, spacing=0,
+                  columns=None, tilecount=None):
+    """Slice a tileset image into tiles.
+
+    Parameters
+    ----------
+    image : pygame.Surface
+    tile_width, tile_height : int
+    margin : int, optional
+        Pixels around the tiles. Default is 0.
+    spacing : int, optional
+        Pixels between tiles. Default is 0.
+    columns : int, optional
+        Default is as many as fit in the image.
+    tilecount : int, optional
+        Default is as many as fit in the image.
+
+    Returns
+    -------
+    tiles : list of pygame.Surface
+        Subsurfaces of the image, row by row.
+    """
+    width, height = image.get_size()
+    if columns is None:
+        columns = (width - 2 * margin + spacing) // (tile_width + spacing)
+    rows = (height - 2 * margin + spacing) // (tile_height + spacing)
+    if tilecount is None:
+        tilecount = columns * rows
+    bounds = image.get_rect()
+    tiles = []
+    for index in range(min(tilecount, columns * rows)):
+        row, col = divmod(index, columns)
+        rect = pygame.Rect(margin + col * (tile_width + spacing),
+                           margin + row * (tile_height + spacing),
+                           tile_width, tile_height)
+        if not bounds.contains(rect):
+            break
+        tiles.append(image.subsurface(rect))
+    return tiles
+
+
+def _flatten(layers, visible=True):
+    # tile layers, in drawing order, hidden if a group of theirs is.
+    for layer in layers:
+        if layer.get('type') == 'group':
+            yield from _flatten(layer.get('layers', []),
+                                visible and layer.get('visible', True))
+        elif layer.get('type', 'tilelayer') == 'tilelayer':
+            yield layer, visible and layer.get('visible', True)
+
+
+def load_map(data, filename, read_file, load_image, chunk_size=16,
+             cache_size=256):
+    """Build a TileMap from a map file.
+
+    Files referenced by the map are resolved relatively to the file which
+    references them, as in Tiled.
+
+    Raises a ValueError for maps which are not orthogonal or are infinite.
+
+    Parameters
+    ----------
+    data : bytes
+        The content of the map file.
+    filename : str
+        The path of the map file.
+    read_file : function
+        Takes the path of an external tileset and returns its content.
+    load_image : function
+        Takes the path of a tileset image and returns it as a surface.
+    chunk_size : int, optional
+    cache_size : int, optional
+        See TileMap.
+
+    Returns
+    -------
+    tilemap : TileMap
+    """
+    map_data = read_map(data, filename)
+    if map_data.get('orientation', 'orthogonal') != 'orthogonal':
+        raise ValueError('Unsupported map orientation: {}'.format(
+            map_data['orientation']))
+    if map_data.get('infinite'):
+        raise ValueError('Infinite maps are not supported')
+
+    tiles = {}
+    for tileset in map_data.get('tilesets', []):
+        firstgid = tileset['firstgid']
+        base = filename
+        if 'source' in tileset:
+            base = normalize(os.path.join(os.path.dirname(filename),
+                                          tileset['source']))
+            tileset = read_tileset(read_file(base), base)
+        if 'image' not in tileset:
+            # collections of images are not supported.
+            continue
+        image = load_image(normalize(os.path.join(os.path.dirname(base),
+                                                  tileset['image'])))
+        sliced = slice_tileset(
+            image, tileset['tilewidth'], tileset['tileheight'],
+            tileset.get('margin', 0), tileset.get('spacing', 0),
+            tileset.get('columns'), tileset.get('tilecount'))
+        for tile_id, tile in enumerate(sliced):
+            tiles[firstgid + tile_id] = tile
+
+    layers = []
+    for layer, visible in _flatten(map_data.get('layers', [])):
+        data = layer['data']
+        if isinstance(data, str):
+            gids = decode_gids(data, layer.get('encoding'),
+                               layer.get('compression'))
+        else:
+            gids = decode_gids(data)
+        layers.append(TileLayer(layer.get('name', ''), gids,
+                                visible=visible,
+                                opacity=layer.get('opacity', 1)))
+    return TileMap(map_data['width'], map_data['height'],
+                   (map_data['tilewidth'], map_data['tileheight']),
+                   tiles, layers, chunk_size=chunk_size,
+                   cache_size=cache_size)
+
+
+class TileLayer:
+    """A layer of tiles.
+
+    Attributes
+    ----------
+    name : str
+    gids : list of int
+        Global tile ids of the layer, row by row, with their flip flags.
+        0 is no tile.
+    visible : bool
+    opacity : float
+        Between 0 and 1.
+    """
+
+    def __init__(self, name, gids, visible=True, opacity=1):
+        self.name = name
+        self.gids = gids
+        self.visible = visible
+        self.opacity = opacity
+
+    def __repr__(self):
+        return '<TileLayer {!r}>'.format(self.name)
+
+
+class TileMap:
+    """A map of tile layers, drawn from prerendered chunks.
+
+    Chunks are rendered when first drawn, and cached until a tile they
+    hold is edited. The cache is bounded: the least recently drawn chunks
+    are dropped beyond cache_size, and chunks far from the viewport are
+    dropped when it moves. They are rendered again if drawn later. Tiles
+    larger than the map's tiles are drawn from the
+    bottom-left of their cell, as in Tiled, and clipped to their chunk.
+
+    Parameters
+    ----------
+    width, height : int
+        The size of the map, in tiles.
+    tile_size : (int, int)
+        The size of the map's cells, in pixels.
+    tiles : dict
+        Mapping of global tile ids to surfaces.
+    layers : list of TileLayer
+        In drawing order.
+    chunk_size : int, optional
+        The side of chunks, in tiles. Default is 16.
+    cache_size : int, optional
+        Maximum number of chunks kept rendered. Default is 256.
+    keep_distance : int, optional
+        Chunks more than this many chunks away from the viewport are
+        dropped. Default is 2.
+    """
+
+    def __init__(self, width, height, tile_size, tiles, layers,
+                 chunk_size=16, cache_size=256, keep_distance=2):
+        self.width = width
+        self.height = height
+        self.tile_size = tuple(tile_size)
+        self.tiles = tiles
+        self.layers = layers
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.keep_distance = keep_distance
+        self._flipped = {}
+        # (layer index, column, row) -> surface, or None if empty, least
+        # recently drawn first.
+        self._chunks = OrderedDict()
+        # columns and rows of chunks last drawn
+        self._last_range = None
+
+    @property
+    def size(self):
+        """The size of the map, in pixels."""
+        return (self.width * self.tile_size[0],
+                self.height * self.tile_size[1])
+
+    @property
+    def chunk_pixels(self):
+        """The size of chunks, in pixels."""
+        return (self.chunk_size * self.tile_size[0],
+                self.chunk_size * self.tile_size[1])
+
+    def layer_index(self, layer):
+        """Return the index of a layer.
+
+        Raises a KeyError if there is no layer with that name.
+
+        Parameters
+        ----------
+        layer : str or int
+            The name or index of the layer.
+        """
+        if isinstance(layer, int):
+            return layer
+        for index, candidate in enumerate(self.layers):
+            if candidate.name == layer:
+                return index
+        raise KeyError(layer)
+
+    def tile(self, gid):
+        """Return the surface of a global tile id, flipped by its flags.
+
+        Returns None for unknown tile ids.
+
+        Parameters
+        ----------
+        gid : int
+        """
+        surface = self.tiles.get(gid & GID_MASK)
+        flags = gid & ~GID_MASK
+        if surface is None or not flags:
+            return surface
+        flipped = self._flipped.get(gid)
+        if flipped is None:
+            flipped = surface
+            if flags & FLIPPED_DIAGONALLY:
+                # swap the axes: a transposition.
+                flipped = pygame.transform.flip(
+                    pygame.transform.rotate(flipped, 90), False, True)
+            flipped = pygame.transform.flip(
+                flipped, bool(flags & FLIPPED_HORIZONTALLY),
+                bool(flags & FLIPPED_VERTICALLY))
+            self._flipped[gid] = flipped
+        return flipped
+
+    def _cell(self, layer, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError('Tile ({}, {}) is out of the map'.format(x, y))
+        return self.layer_index(layer), y * self.width + x
+
+    def get_tile(self, layer, x, y):
+        """Return the global tile id of a cell, 0 if it is empty.
+
+        Parameters
+        ----------
+        layer : str or int
+            The name or index of the layer.
+        x, y : int
+            The cell's coordinates, in tiles.
+        """
+        index, cell = self._cell(layer, x, y)
+        return self.layers[index].gids[cell]
+
+    def set_tile(self, layer, x, y, gid):
+        """Change the tile of a cell.
+
+        Only the chunk holding the cell is rendered again.
+
+        Parameters
+        ----------
+        layer : str or int
+            The name or index of the layer.
+        x, y : int
+            The cell's coordinates, in tiles.
+        gid : int
+            The global tile id, 0 to empty the cell.
+        """
+        index, cell = self._cell(layer, x, y)
+        self.layers[index].gids[cell] = gid
+        self._chunks.pop((index, x // self.chunk_size,
+                          y // self.chunk_size), None)
+
+    def invalidate(self, layer=None):
+        """Render the chunks of a layer again when next drawn.
+
+        Needed after changing a layer's gids or opacity directly.
+
+        Parameters
+        ----------
+        layer : str or int, optional
+            Default is all layers.
+        """
+        if layer is None:
+            self._chunks.clear()
+            return
+        index = self.layer_index(layer)
+        for key in [key for key in self._chunks if key[0] == index]:
+            del self._chunks[key]
+
+    def _render(self, index, col, row):
+        layer = self.layers[index]
+        tile_width, tile_height = self.tile_size
+        left, top = col * self.chunk_size, row * self.chunk_size
+        columns = min(self.chunk_size, self.width - left)
+        rows = min(self.chunk_size, self.height - top)
+        blits = []
+        for y in range(rows):
+            start = (top + y) * self.width + left
+            for x, gid in enumerate(layer.gids[start:start + columns]):
+                tile = self.tile(gid) if gid else None
+                if tile is not None:
+                    blits.append((tile, (x * tile_width, (y + 1) * tile_height
+                                         - tile.get_height())))
+        if not blits:
+            return None
+        chunk = pygame.Surface((columns * tile_width, rows * tile_height),
+                               pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert_alpha()
+        chunk.blits(blits, doreturn=False)
+        if layer.opacity < 1:
+            chunk.set_alpha(round(layer.opacity * 255))
+        return chunk
+
+    def chunk(self, layer, col, row):
+        """Return the prerendered surface of a chunk, or None if empty.
+
+        Parameters
+        ----------
+        layer : str or int
+            The name or index of the layer.
+        col, row : int
+            The chunk's coordinates, in chunks.
+        """
+        key = (self.layer_index(layer), col, row)
+        try:
+            self._chunks.move_to_end(key)
+            return self._chunks[key]
+        except KeyError:
+            chunk = self._chunks[key] = self._render(*key)
+            while len(self._chunks) > self.cache_size:
+                self._chunks.popitem(last=False)
+            return chunk
+
+    def _drop_far_chunks(self, cols, rows):
+        if self._last_range == (cols, rows):
+            return
+        self._last_range = (cols, rows)
+        distance = self.keep_distance
+        far = [key for key in self._chunks
+               if not (cols.start - distance <= key[1] < cols.stop + distance
+                       and rows.start - distance <= key[2]
+                       < rows.stop + distance)]
+        for key in far:
+            del self._chunks[key]
+
+    @property
+    def cached(self):
+        """Number of chunks kept rendered."""
+        return len(self._chunks)
+
+    def visible(self, viewport, layers=None):
+        """Return the chunks intersecting a viewport, ready for blitting.
+
+        Parameters
+        ----------
+        viewport : pygame.Rect
+            In map pixels.
+        layers : list of str or int, optional
+            Default is the visible layers.
+
+        Returns
+        -------
+        blits : list of (pygame.Surface, (int, int))
+            Chunks and their positions relative to the viewport, layer
+            by layer, as expected by Surface.blits().
+        """
+        viewport = pygame.Rect(viewport)
+        chunk_width, chunk_height = self.chunk_pixels
+        cols = range(max(0, viewport.left // chunk_width),
+                     min(-(-self.width // self.chunk_size),
+                         -(-viewport.right // chunk_width)))
+        rows = range(max(0, viewport.top // chunk_height),
+                     min(-(-self.height // self.chunk_size),
+                         -(-viewport.bottom // chunk_height)))
+        if layers is None:
+            indices = [index for index, layer in enumerate(self.layers)
+                       if layer.visible]
+        else:
+            indices = [self.layer_index(layer) for layer in layers]
+        self._drop_far_chunks(cols, rows)
+        blits = []
+        for index in indices:
+            for row in rows:
+                for col in cols:
+                    chunk = self.chunk(index, col, row)
+                    if chunk is not None:
+                        blits.append((chunk,
+                                      (col * chunk_width - viewport.left,
+                                       row * chunk_height - viewport.top)))
+        return blits
+
+    def draw(self, surface, viewport=None, layers=None):
+        """Draw the map as seen through a viewport.
+
+        Parameters
+        ----------
+        surface : pygame.Surface
+        viewport : pygame.Rect, optional
+            In map pixels. Default is the size of surface, at the
+            top-left of the map.
+        layers : list of str or int, optional
+            Default is the visible layers.
+        """
+        if viewport is None:
+            viewport = surface.get_rect()
+        surface.blits(self.visible(viewport, layers), doreturn=False)
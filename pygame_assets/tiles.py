@@ -0,0 +1,352 @@
+"""Tile pyramids of very large images.
+
+Huge images, e.g. world backgrounds, may not fit in memory once decoded.
+They are preprocessed once into a tile pyramid on disk: the image is cut
+into square tiles, then halved and cut again, level after level, until it
+fits in a single tile. Only the tiles intersecting a viewport are then
+decoded, and kept in a bounded LRU cache. Tiles next to the viewport in
+the scrolling direction are decoded ahead of time in a background thread,
+shared by all tiled images.
+
+Pyramids are best built offline, by build tooling, and shipped with the
+game in place of the image, so that players never decode the full image.
+
+Usage
+-----
+# build tooling
+tiles.build_pyramid(pygame.image.load('world.png'),
+                    'assets/image/world.tiles')
+
+# game
+world = load.tiled_image('world.tiles')
+
+# each frame: blit the tiles visible through the camera.
+screen.blits(world.visible(camera_rect))
+"""
+
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from .files import atomic_write
+
+
+MANIFEST = 'pyramid.json'
+
+# decodes tiles ahead of the viewports of all tiled images
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _prefetch_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='pygame_assets-tiles')
+        return _executor
+
+
+def tile_path(directory, level, col, row):
+    """Return the path of a tile in a pyramid directory."""
+    return os.path.join(directory, str(level), '{}_{}.png'.format(col, row))
+
+
+def _save_tile(tile, path):
+    with atomic_write(path) as tile_file:
+        pygame.image.save(tile, tile_file, path)
+
+
+def _halve_tile(directory, level, col, row, size, tile_size):
+    # tile (col, row) of the next level, of the given size: scaled down
+    # from the block of at most 2x2 tiles of the level which it covers.
+    width, height = size
+    block = None
+    right = bottom = 0
+    for dy in range(2):
+        for dx in range(2):
+            x, y = dx * tile_size, dy * tile_size
+            if x >= 2 * width or y >= 2 * height:
+                continue
+            tile = pygame.image.load(
+                tile_path(directory, level, 2 * col + dx, 2 * row + dy))
+            if block is None:
+                block = pygame.Surface((2 * width, 2 * height),
+                                       tile.get_flags() & pygame.SRCALPHA, 32)
+            # copies pixels and alpha as they are, without blending.
+            block.blit(tile, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+            right = max(right, x + tile.get_width())
+            bottom = max(bottom, y + tile.get_height())
+    # levels one pixel wide or high are not halved in that direction.
+    block = block.subsurface((0, 0, min(right, 2 * width),
+                              min(bottom, 2 * height)))
+    return pygame.transform.smoothscale(block, size)
+
+
+def build_pyramid(surface, directory, tile_size=512):
+    """Cut a surface into a tile pyramid.
+
+    The surface is only cut into the tiles of the first level: each
+    coarser level is built from the tiles of the previous one, so that
+    no scaled copy of the full image is made. Tiles and the manifest are
+    written atomically, the manifest last, so that an interrupted build
+    is not mistaken for a complete pyramid.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+    directory : str
+        Where the tiles and the manifest are written.
+    tile_size : int, optional
+        The side of tiles, in pixels. Default is 512.
+
+    Returns
+    -------
+    manifest : dict
+    """
+    width, height = surface.get_size()
+    for row in range(math.ceil(height / tile_size)):
+        for col in range(math.ceil(width / tile_size)):
+            rect = pygame.Rect(col * tile_size, row * tile_size,
+                               tile_size, tile_size)
+            _save_tile(surface.subsurface(rect.clip(surface.get_rect())),
+                       tile_path(directory, 0, col, row))
+    # coarser levels are built from tiles: the image may be released.
+    del surface
+    level_sizes = [[width, height]]
+    level_width, level_height = width, height
+    while level_width > tile_size or level_height > tile_size:
+        level = len(level_sizes) - 1
+        level_width = max(1, level_width // 2)
+        level_height = max(1, level_height // 2)
+        level_sizes.append([level_width, level_height])
+        for row in range(math.ceil(level_height / tile_size)):
+            for col in range(math.ceil(level_width / tile_size)):
+                size = (min(tile_size, level_width - col * tile_size),
+                        min(tile_size, level_height - row * tile_size))
+                _save_tile(
+                    _halve_tile(directory, level, col, row, size, tile_size),
+                    tile_path(directory, level + 1, col, row))
+    manifest = {'width': width, 'height': height, 'tile_size': tile_size,
+                'levels': len(level_sizes), 'level_sizes': level_sizes}
+    with atomic_write(os.path.join(directory, MANIFEST), 'w') \
+            as manifest_file:
+        json.dump(manifest, manifest_file)
+    return manifest
+
+
+def read_manifest(directory):
+    """Return the manifest of a pyramid, or None if it was not built.
+
+    Pyramids built by older versions, without level sizes, are
+    considered not built.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST)) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+    return manifest if 'level_sizes' in manifest else None
+
+
+class TiledImage:
+    """A huge image whose tiles are decoded on demand.
+
+    Coordinates are given in pixels of the full resolution image, at
+    every level.
+
+    Parameters
+    ----------
+    directory : str
+        A pyramid directory, as built by build_pyramid().
+    cache_size : int, optional
+        Maximum number of decoded tiles kept in memory. Default is 64.
+    prefetch : bool, optional
+        Whether to decode tiles ahead of the scrolling direction in the
+        background thread shared by tiled images. Default is True.
+    """
+
+    def __init__(self, directory, *, cache_size=64, prefetch=True):
+        manifest = read_manifest(directory)
+        if manifest is None:
+            raise ValueError('Not a tile pyramid: {}'.format(directory))
+        self.directory = directory
+        self.size = (manifest['width'], manifest['height'])
+        self.tile_size = manifest['tile_size']
+        self.levels = manifest['levels']
+        # sizes of the levels, rounded down at each halving
+        self.level_sizes = [tuple(size) for size in manifest['level_sizes']]
+        self.cache_size = cache_size
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.prefetch = prefetch
+        self._closed = False
+        self._prefetching = set()
+        self._last_viewport = None
+
+    def get_rect(self):
+        """Return the full resolution rect of the image."""
+        return pygame.Rect((0, 0), self.size)
+
+    def level_for_scale(self, scale):
+        """Return the coarsest level detailed enough for a zoom scale.
+
+        Parameters
+        ----------
+        scale : float
+            The zoom scale the image is displayed at, 1 being full
+            resolution.
+        """
+        if scale >= 1:
+            return 0
+        return min(self.levels - 1, int(math.log2(1 / scale)))
+
+    def tiles_in(self, rect, level=0):
+        """Return the (col, row) of the tiles intersecting a rect.
+
+        Parameters
+        ----------
+        rect : pygame.Rect
+            In full resolution pixels.
+        level : int, optional
+        """
+        span = self.tile_size << level
+        rect = pygame.Rect(rect).clip(self.get_rect())
+        if not rect.width or not rect.height:
+            return []
+        # levels may be slightly smaller than the full resolution image
+        # scaled down, and have fewer tiles.
+        level_width, level_height = self.level_sizes[level]
+        cols = range(rect.left // span,
+                     min((rect.right - 1) // span + 1,
+                         math.ceil(level_width / self.tile_size)))
+        rows = range(rect.top // span,
+                     min((rect.bottom - 1) // span + 1,
+                         math.ceil(level_height / self.tile_size)))
+        return [(col, row) for row in rows for col in cols]
+
+    def _load_tile(self, key):
+        surface = pygame.image.load(tile_path(self.directory, *key))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if surface.get_alpha() \
+                else surface.convert()
+        return surface
+
+    def _store(self, key, surface):
+        with self._lock:
+            if self._closed:
+                return
+            self._tiles[key] = surface
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.cache_size:
+                self._tiles.popitem(last=False)
+
+    def tile(self, level, col, row):
+        """Return a decoded tile, decoding it if not cached.
+
+        Parameters
+        ----------
+        level : int
+        col : int
+        row : int
+
+        Returns
+        -------
+        pygame.Surface
+        """
+        key = (level, col, row)
+        with self._lock:
+            surface = self._tiles.get(key)
+            if surface is not None:
+                self._tiles.move_to_end(key)
+                return surface
+        surface = self._load_tile(key)
+        self._store(key, surface)
+        return surface
+
+    def visible(self, viewport, level=0):
+        """Return the tiles intersecting a viewport, ready for blitting.
+
+        Tiles of coarse levels are not scaled: blit them onto a surface
+        scaled down by 2 ** level.
+
+        Parameters
+        ----------
+        viewport : pygame.Rect
+            In full resolution pixels.
+        level : int, optional
+
+        Returns
+        -------
+        blits : list of (pygame.Surface, (int, int))
+            Tiles and their positions relative to the viewport, in pixels
+            of the level, as expected by Surface.blits().
+        """
+        viewport = pygame.Rect(viewport)
+        left, top = viewport.left >> level, viewport.top >> level
+        blits = [
+            (self.tile(level, col, row),
+             (col * self.tile_size - left, row * self.tile_size - top))
+            for col, row in self.tiles_in(viewport, level)
+        ]
+        self._prefetch_ahead(viewport, level)
+        return blits
+
+    def _prefetch_ahead(self, viewport, level):
+        last, self._last_viewport = self._last_viewport, (viewport, level)
+        if not self.prefetch or self._closed or last is None \
+                or last[1] != level:
+            return
+        dx = viewport.x - last[0].x
+        dy = viewport.y - last[0].y
+        if not dx and not dy:
+            return
+        span = self.tile_size << level
+        ahead = viewport.move(span * ((dx > 0) - (dx < 0)),
+                              span * ((dy > 0) - (dy < 0)))
+        visible = set(self.tiles_in(viewport, level))
+        for col, row in self.tiles_in(ahead, level):
+            key = (level, col, row)
+            with self._lock:
+                if (col, row) in visible or key in self._tiles \
+                        or key in self._prefetching:
+                    continue
+                self._prefetching.add(key)
+            _prefetch_executor().submit(self._prefetch, key)
+
+    def _prefetch(self, key):
+        try:
+            if not self._closed:
+                self._store(key, self._load_tile(key))
+        finally:
+            with self._lock:
+                self._prefetching.discard(key)
+
+    def wait(self):
+        """Wait until tiles being prefetched are decoded."""
+        with self._lock:
+            if not self._prefetching:
+                return
+        # tiles are prefetched in order, by a single thread.
+        _prefetch_executor().submit(lambda: None).result()
+
+    def close(self):
+        """Stop prefetching and release decoded tiles.
+
+        Tiles queued for prefetching are skipped. Closing is optional:
+        the background thread is shared by all tiled images and outlives
+        them.
+        """
+        with self._lock:
+            self._closed = True
+            self._tiles.clear()
+
+    @property
+    def cached(self):
+        """Number of decoded tiles kept in memory."""
+        return len(self._tiles)
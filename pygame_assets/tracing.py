@@ -0,0 +1,159 @@
+"""Timelines of asset loads, in Chrome's trace event format.
+
+While a Tracer runs, each load made through pygame_assets.load is
+recorded as a span, on the thread it runs on, with nested spans for the
+phases of the load:
+
+- resolve: finding the file in the search directories and backends,
+- hash: hashing the file's content, for content-keyed caches,
+- read: opening the file,
+- decode: decoding the file into an asset,
+- convert: converting images for blitting,
+- post-process: other stages of loader pipelines, and scaling.
+
+Loaders decoding files themselves record their reading in decode.
+
+Saved traces open in chrome://tracing or https://ui.perfetto.dev. Mark
+the first frame to see which loads delay it.
+
+Usage
+-----
+tracer = tracing.Tracer()
+tracer.start()
+...  # load assets
+tracer.mark('first frame')
+tracer.stop()
+tracer.save('startup.json')
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+# the running tracer, if any
+tracer = None
+_tracer_lock = threading.Lock()
+
+_untraced = contextlib.nullcontext()
+
+
+class Tracer:
+    """Record the loads made through pygame_assets.load.
+
+    A single tracer can run at a time. Tracers are also context managers,
+    recording within the with block.
+
+    Attributes
+    ----------
+    events : list of dict
+        Trace events, as written by save().
+    """
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._threads = set()
+
+    def _timestamp(self, counter):
+        # microseconds since the tracer was created
+        return (counter - self._origin) * 1e6
+
+    def _add(self, event):
+        thread = threading.current_thread()
+        event.update(pid=os.getpid(), tid=thread.ident)
+        with self._lock:
+            if thread.ident not in self._threads:
+                self._threads.add(thread.ident)
+                self.events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': event['pid'],
+                    'tid': thread.ident, 'args': {'name': thread.name}})
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, category, args):
+        """Record the time spent in a with block.
+
+        Parameters
+        ----------
+        name : str
+        category : str
+        args : dict
+            Shown with the span in trace viewers.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._add({'name': name, 'cat': category, 'ph': 'X',
+                       'ts': self._timestamp(start),
+                       'dur': (end - start) * 1e6, 'args': args})
+
+    def mark(self, name):
+        """Record an instant event, e.g. when the first frame is drawn.
+
+        Parameters
+        ----------
+        name : str
+        """
+        self._add({'name': name, 'cat': 'mark', 'ph': 'i', 's': 'g',
+                   'ts': self._timestamp(time.perf_counter())})
+
+    def start(self):
+        """Start recording loads.
+
+        Raises a RuntimeError if another tracer is running.
+        """
+        global tracer
+        with _tracer_lock:
+            if tracer is not None and tracer is not self:
+                raise RuntimeError('Another tracer is running')
+            tracer = self
+
+    def stop(self):
+        """Stop recording loads."""
+        global tracer
+        with _tracer_lock:
+            if tracer is self:
+                tracer = None
+
+    def save(self, filepath):
+        """Save the trace in Chrome's trace event format.
+
+        Parameters
+        ----------
+        filepath : str
+        """
+        with self._lock:
+            events = list(self.events)
+        with open(filepath, 'w') as trace_file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'},
+                      trace_file)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def span(name, category='phase', **args):
+    """Return a context manager recording a span if a tracer is running.
+
+    Parameters
+    ----------
+    name : str
+    category : str, optional
+        Default is 'phase'.
+    **args :
+        Shown with the span in trace viewers.
+    """
+    running = tracer
+    if running is None:
+        return _untraced
+    return running.span(name, category, args)
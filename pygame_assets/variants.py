@@ -0,0 +1,161 @@
+"""Resolution-aware image variants.
+
+Images can be shipped in several densities, named after the scale they
+were drawn for: 'player.png' (scale 1), 'player@2x.png', 'player@0.5x.png'.
+The image loader picks the variant best matching the config's
+target_scale, and scales it when no exact match exists.
+"""
+
+import hashlib
+import math
+import os
+
+import pygame
+
+from . import content, tracing
+from .cache import AssetCache
+from .configure import get_config
+from .core import find_asset
+from .exceptions import AssetNotFoundError
+from .files import atomic_write
+
+
+# densities probed for variants, besides the target scale
+SCALES = (0.25, 0.5, 0.75, 1, 1.5, 2, 3, 4)
+
+# scaled surfaces generated for missing variants
+cache = AssetCache(max_size=128 * 1024 * 1024)
+
+
+def variant_filename(filename, scale):
+    """Return the filename of an asset's variant.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the scale 1 variant, e.g. 'player.png'.
+    scale : float
+
+    Returns
+    -------
+    filename : str
+        e.g. 'player@2x.png' for a scale of 2.
+    """
+    if scale == 1:
+        return filename
+    stem, ext = os.path.splitext(filename)
+    return '{}@{:g}x{}'.format(stem, scale, ext)
+
+
+def candidate_scales(target_scale):
+    """Return variant scales in order of preference for a target scale.
+
+    The exact scale comes first, then higher densities (downscaling
+    looks better than upscaling), then lower densities, closest first.
+
+    Parameters
+    ----------
+    target_scale : float
+    """
+    scales = set(SCALES) | {target_scale}
+    return sorted(scales, key=lambda scale: (
+        scale < target_scale, abs(math.log(scale / target_scale))))
+
+
+def find_variant(loader_name, filename, target_scale):
+    """Find the variant of an asset best matching a target scale.
+
+    Raises an AssetNotFoundError if no variant exists.
+
+    Parameters
+    ----------
+    loader_name : str
+        The loader whose search directories are searched.
+    filename : str
+    target_scale : float
+
+    Returns
+    -------
+    scale : float
+        The scale of the found variant.
+    filename : str
+        The filename of the found variant.
+    """
+    config = get_config()
+    for scale in candidate_scales(target_scale):
+        name = variant_filename(filename, scale)
+        try:
+            find_asset(name, config.search_paths(loader_name, name))
+        except AssetNotFoundError:
+            continue
+        return scale, name
+    raise AssetNotFoundError(filename,
+                             config.search_paths(loader_name, filename))
+
+
+def smoothscale(surface, factor):
+    """Return a surface scaled by a factor, smoothly if possible.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+    factor : float
+    """
+    width, height = surface.get_size()
+    size = (max(1, round(width * factor)), max(1, round(height * factor)))
+    try:
+        return pygame.transform.smoothscale(surface, size)
+    except ValueError:
+        # smoothscale only supports 24 and 32-bit surfaces.
+        return pygame.transform.scale(surface, size)
+
+
+def load_scaled(loader_name, filename, factor, load, convert, options=()):
+    """Load an asset variant scaled by a factor, caching the result.
+
+    Scaled surfaces are cached in memory, and on disk if the config's
+    cache_dir is set, so that the variant is only scaled once.
+
+    Parameters
+    ----------
+    loader_name : str
+    filename : str
+        The filename of the variant to scale.
+    factor : float
+    load : function
+        Called without arguments to load the variant to scale.
+    convert : function
+        Takes a surface loaded from the disk cache and returns it
+        converted for blitting.
+    options : hashable, optional
+        Loader options the scaled surface depends on, e.g. conversion
+        flags. Scaled surfaces are cached separately for each options.
+
+    Returns
+    -------
+    surface : pygame.Surface
+    """
+    config = get_config()
+    backend, path = find_asset(
+        filename, config.search_paths(loader_name, filename))
+    digest = content.index.digest(backend, path)
+    key = '{}-{:g}'.format(digest, factor)
+
+    def generate():
+        cache_path = None
+        if config.cache_dir is not None:
+            cache_path = os.path.join(
+                config.cache_dir, 'variants',
+                hashlib.sha1(key.encode()).hexdigest() + '.png')
+            if os.path.isfile(cache_path):
+                return convert(pygame.image.load(cache_path))
+        original = load()
+        with tracing.span('post-process', stage='scale'):
+            surface = smoothscale(original, factor)
+        if cache_path is not None:
+            with atomic_write(cache_path) as cache_file:
+                pygame.image.save(surface, cache_file, cache_path)
+        return surface
+
+    surface, _ = cache.get_or_load((loader_name, key, options), generate)
+    return surface
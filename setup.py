@@ -40,9 +40,10 @@ CLASSIFIERS = [
     'Topic :: Software Development :: Libraries :: pygame',
     'Intended Audience :: Developers',
     'Programming Language :: Python :: 3',
-    'Programming Language :: Python :: 3.4',
-    'Programming Language :: Python :: 3.5',
-    'Programming Language :: Python :: 3.6',
+    'Programming Language :: Python :: 3.8',
+    'Programming Language :: Python :: 3.9',
+    'Programming Language :: Python :: 3.10',
+    'Programming Language :: Python :: 3.11',
     'License :: OSI Approved :: MIT License',
 ]
 
@@ -58,6 +59,11 @@ setup(
     keywords=KEYWORDS,
     classifiers=CLASSIFIERS,
     packages=find_packages(exclude=('example_project',)),
-    python_requires='>=3.4',
+    python_requires='>=3.8',
+    install_requires=['pygame>=2.1.3'],
+    extras_require={
+        # recoloring images, faster detection of hard-edged images
+        'numpy': ['numpy'],
+    },
     include_package_data=True,
 )